@@ -22,6 +22,7 @@ function App() {
     can_redo: false,
     hand_detected: false
   });
+  const [shapeSuggestions, setShapeSuggestions] = useState({});
 
   useEffect(() => {
     websocketService.connect();
@@ -37,26 +38,29 @@ function App() {
       setVideoStarted(false);
     });
 
+    // Server pushes the full status on connect, then only changed fields - no polling
+    websocketService.onStatus((changes) => {
+      setStatus((previous) => ({ ...previous, ...changes }));
+    });
+
+    // Shape each hand's stroke would become (hand id -> shape type)
+    websocketService.onShapeSuggestion(({ hand_id, shape }) => {
+      setShapeSuggestions((previous) => {
+        const next = { ...previous };
+        if (shape) {
+          next[hand_id] = shape.type;
+        } else {
+          delete next[hand_id];
+        }
+        return next;
+      });
+    });
+
     return () => {
       websocketService.disconnect();
     };
   }, []);
 
-  useEffect(() => {
-    if (!isConnected) return;
-
-    const statusInterval = setInterval(async () => {
-      try {
-        const statusData = await api.getStatus();
-        setStatus(statusData);
-      } catch (error) {
-        console.error('Error fetching status:', error);
-      }
-    }, 500);
-
-    return () => clearInterval(statusInterval);
-  }, [isConnected]);
-
   const handleStartVideo = () => {
     websocketService.startVideo();
     setVideoStarted(true);
@@ -174,6 +178,7 @@ function App() {
               handDetected={status.hand_detected}
               canUndo={status.can_undo}
               canRedo={status.can_redo}
+              shapeSuggestions={Object.values(shapeSuggestions)}
             />
           </>
         )}
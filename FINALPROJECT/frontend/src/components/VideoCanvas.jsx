@@ -31,8 +31,9 @@ function VideoCanvas() {
         canvas.width = img.width;
         canvas.height = img.height;
         ctx.drawImage(img, 0, 0);
+        websocketService.ackFrame(frameData.seq);
       };
-      img.src = 'data:image/jpeg;base64,' + frameData;
+      img.src = 'data:image/jpeg;base64,' + frameData.frame;
     });
 
   }, []);
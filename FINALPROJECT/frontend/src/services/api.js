@@ -7,9 +7,13 @@ import axios from 'axios';
 
 const API_BASE_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:5000';
 
+// Whiteboard room (open the app with ?room=name for a separate board)
+export const ROOM = new URLSearchParams(window.location.search).get('room') || 'default';
+
 const api = axios.create({
   baseURL: API_BASE_URL,
   timeout: 5000,
+  params: { room: ROOM },
   headers: {
     'Content-Type': 'application/json'
   }
@@ -4,6 +4,10 @@
  */
 
 import { io } from 'socket.io-client';
+import { ROOM } from './api';
+
+// Video quality tier ('high', 'medium', 'low' or 'none' = stroke deltas only), e.g. ?quality=low for passive viewers
+const QUALITY = new URLSearchParams(window.location.search).get('quality') || 'high';
 
 class WebSocketService {
   constructor() {
@@ -16,6 +20,7 @@ class WebSocketService {
     
     this.socket = io(backendUrl, {
       transports: ['websocket', 'polling'],
+      query: { room: ROOM, quality: QUALITY },
       reconnection: true,
       reconnectionDelay: 1000,
       reconnectionAttempts: 5
@@ -44,9 +49,10 @@ class WebSocketService {
     }
   }
 
-  startVideo() {
+  startVideo(options) {
+    // options (optional): { source: 'demo.npz', speed: 'realtime' | 'max' } replays a recording
     if (this.socket && this.isConnected) {
-      this.socket.emit('start_video');
+      this.socket.emit('start_video', options);
       console.log('📹 Video stream started');
     }
   }
@@ -63,6 +69,60 @@ class WebSocketService {
       this.socket.on('video_frame', callback);
     }
   }
+
+  ackFrame(seq) {
+    // Tells the server this frame was shown - slow clients get frames skipped instead of queued
+    if (this.socket && this.isConnected) {
+      this.socket.emit('frame_ack', { seq });
+    }
+  }
+
+  onStrokeDelta(callback) {
+    // One board change ({ seq, type, ... }) - lets a client render strokes itself
+    if (this.socket) {
+      this.socket.on('stroke_delta', callback);
+    }
+  }
+
+  onStrokeSync(callback) {
+    // Snapshot + events to catch up (sent on join and after requestStrokeSync)
+    if (this.socket) {
+      this.socket.on('stroke_sync', callback);
+    }
+  }
+
+  requestStrokeSync(since) {
+    if (this.socket && this.isConnected) {
+      this.socket.emit('stroke_sync_request', { since });
+    }
+  }
+
+  onShapeSuggestion(callback) {
+    // Live shape guess ({ hand_id, shape }) of a stroke being drawn - shape is null when there is none
+    if (this.socket) {
+      this.socket.on('shape_suggestion', callback);
+    }
+  }
+
+  onStatus(callback) {
+    // Full status on connect, then only the fields that changed
+    if (this.socket) {
+      this.socket.on('status', callback);
+    }
+  }
+
+  subscribeDebugMetrics(enabled = true) {
+    // Per-stage video latency (p50/p95/p99) pushed about once a second
+    if (this.socket && this.isConnected) {
+      this.socket.emit('debug_metrics', { enabled });
+    }
+  }
+
+  onDebugMetrics(callback) {
+    if (this.socket) {
+      this.socket.on('debug_metrics', callback);
+    }
+  }
 }
 
 const websocketService = new WebSocketService();
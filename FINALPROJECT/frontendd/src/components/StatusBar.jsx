@@ -6,7 +6,7 @@
 import React from 'react';
 import '../styles/StatusBar.css';
 
-function StatusBar({ mode, color, brushSize, handDetected, canUndo, canRedo }) {
+function StatusBar({ mode, color, brushSize, handDetected, canUndo, canRedo, shapeSuggestions = [] }) {
   return (
     <div className="status-bar">
       <div className="status-item">
@@ -37,6 +37,13 @@ function StatusBar({ mode, color, brushSize, handDetected, canUndo, canRedo }) {
           Undo: {canUndo ? 'YES' : 'NO'} | Redo: {canRedo ? 'YES' : 'NO'}
         </span>
       </div>
+      
+      {shapeSuggestions.length > 0 && (
+        <div className="status-item">
+          <span className="status-label">Shape:</span>
+          <span className="status-value">{shapeSuggestions.join(' | ').toUpperCase()}</span>
+        </div>
+      )}
     </div>
   );
 }
@@ -3,43 +3,58 @@ API Routes
 REST endpoints for whiteboard control
 """
 
-from flask import Blueprint, jsonify, request
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Blueprint, g, jsonify, request
 import config
+from utils.ocr_service import get_ocr_service
 
 # Create Blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 # This will be set by the main app
-whiteboard_state = None
+room_registry = None
 
-def init_routes(state):
-    """Initialize routes with whiteboard state"""
-    global whiteboard_state
-    whiteboard_state = state
+# Endpoints that do not act on a room
+_ROOMLESS_ENDPOINTS = {'api.get_config', 'api.get_rooms'}
+
+def init_routes(registry):
+    """Initialize routes with the room registry"""
+    global room_registry
+    room_registry = registry
+
+@api_bp.before_request
+def load_room():
+    """Select the whiteboard of ?room=... (default room if not given)"""
+    if request.endpoint in _ROOMLESS_ENDPOINTS:
+        return None
+    if room_registry is None:
+        return jsonify({'error': 'Whiteboard not initialized'}), 500
+    
+    # Rooms are only created by a socket client joining - REST calls cannot fill the registry
+    room_id = request.args.get('room') or config.DEFAULT_ROOM
+    room = room_registry.get(room_id)
+    if room is None:
+        return jsonify({'error': f'Unknown room: {room_id}'}), 404
+    
+    g.whiteboard_state = room.state
+    return None
 
 @api_bp.route('/status', methods=['GET'])
 def get_status():
     """Get current whiteboard status"""
-    if whiteboard_state is None:
-        return jsonify({'error': 'Whiteboard not initialized'}), 500
-    
-    return jsonify({
-        'mode': whiteboard_state['gesture_recognizer'].get_mode_display_text(),
-        'color': whiteboard_state['gesture_recognizer'].get_current_color_name(),
-        'brush_size': whiteboard_state['brush_thickness'],
-        'can_undo': whiteboard_state['canvas'].can_undo(),
-        'can_redo': whiteboard_state['canvas'].can_redo(),
-        'hand_detected': whiteboard_state.get('hand_detected', False)
-    })
+    # Same snapshot that is pushed to clients as the 'status' socket event
+    return jsonify(g.whiteboard_state['status_publisher'].snapshot())
+
+def _publish_status():
+    """Push status changes (undo/redo availability, brush, ...) to connected clients"""
+    g.whiteboard_state['status_publisher'].publish()
 
 @api_bp.route('/clear', methods=['POST'])
 def clear_canvas():
     """Clear the canvas"""
-    if whiteboard_state is None:
-        return jsonify({'error': 'Whiteboard not initialized'}), 500
-    
     try:
-        whiteboard_state['canvas'].clear()
+        g.whiteboard_state['canvas'].clear()
+        _publish_status()
         return jsonify({'success': True, 'message': 'Canvas cleared'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -47,11 +62,9 @@ def clear_canvas():
 @api_bp.route('/undo', methods=['POST'])
 def undo():
     """Undo last stroke"""
-    if whiteboard_state is None:
-        return jsonify({'error': 'Whiteboard not initialized'}), 500
-    
     try:
-        success = whiteboard_state['canvas'].undo()
+        success = g.whiteboard_state['canvas'].undo()
+        _publish_status()
         return jsonify({'success': success})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -59,11 +72,9 @@ def undo():
 @api_bp.route('/redo', methods=['POST'])
 def redo():
     """Redo last undone stroke"""
-    if whiteboard_state is None:
-        return jsonify({'error': 'Whiteboard not initialized'}), 500
-    
     try:
-        success = whiteboard_state['canvas'].redo()
+        success = g.whiteboard_state['canvas'].redo()
+        _publish_status()
         return jsonify({'success': success})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -71,11 +82,9 @@ def redo():
 @api_bp.route('/perfect-shape', methods=['POST'])
 def perfect_shape():
     """Apply shape recognition to last stroke"""
-    if whiteboard_state is None:
-        return jsonify({'error': 'Whiteboard not initialized'}), 500
-    
     try:
-        success = whiteboard_state['canvas'].apply_shape_recognition()
+        success = g.whiteboard_state['canvas'].apply_shape_recognition()
+        _publish_status()
         return jsonify({
             'success': success,
             'message': 'Shape converted' if success else 'Could not recognize shape'
@@ -83,12 +92,56 @@ def perfect_shape():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/perfect-shape/all', methods=['POST'])
+def perfect_shape_all():
+    """Apply shape recognition to every stroke on the board"""
+    try:
+        converted = g.whiteboard_state['canvas'].apply_shape_recognition_all()
+        _publish_status()
+        return jsonify({
+            'success': converted > 0,
+            'converted': converted,
+            'message': f'{converted} shape(s) converted' if converted else 'Could not recognize any shapes'
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/recognize-text', methods=['POST'])
+def recognize_text():
+    """Read the handwritten text on the board (OCR runs in the worker pool)"""
+    ocr_service = get_ocr_service()
+    if ocr_service is None:
+        return jsonify({'error': 'Text recognition is not running'}), 503
+    
+    canvas = g.whiteboard_state['canvas']
+    # Pixels, version and stroke bounds must describe the same moment
+    with canvas.lock:
+        image = canvas.get_canvas().copy()
+        version = canvas.version
+        strokes = canvas.stroke_manager.get_stroke_bounds()
+    
+    # Only regions whose strokes changed since the last request are OCR'd
+    future = ocr_service.submit(image, version=version, strokes=strokes)
+    if future is None:
+        return jsonify({'error': 'Text recognition busy, try again'}), 503
+    
+    try:
+        result = future.result(timeout=config.OCR_REQUEST_TIMEOUT)
+    except FutureTimeoutError:
+        return jsonify({'error': 'Text recognition timed out'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'success': bool(result['text']),
+        'text': result['text'],
+        'confidence': result['confidence'],
+        'regions': result['regions']
+    })
+
 @api_bp.route('/change-color', methods=['POST'])
 def change_color():
     """Change drawing color"""
-    if whiteboard_state is None:
-        return jsonify({'error': 'Whiteboard not initialized'}), 500
-    
     try:
         data = request.get_json()
         color_name = data.get('color')
@@ -96,7 +149,7 @@ def change_color():
         if color_name not in config.COLOR_ORDER:
             return jsonify({'error': f'Invalid color. Choose from: {config.COLOR_ORDER}'}), 400
         
-        whiteboard_state['gesture_recognizer'].set_color_by_name(color_name)
+        g.whiteboard_state['gesture_recognizer'].set_color_by_name(color_name)
         return jsonify({
             'success': True,
             'color': color_name
@@ -107,9 +160,6 @@ def change_color():
 @api_bp.route('/brush-size', methods=['POST'])
 def change_brush_size():
     """Change brush size"""
-    if whiteboard_state is None:
-        return jsonify({'error': 'Whiteboard not initialized'}), 500
-    
     try:
         data = request.get_json()
         size = data.get('size')
@@ -124,7 +174,8 @@ def change_brush_size():
                 'error': f'Size must be between {config.BRUSH_THICKNESS_MIN} and {config.BRUSH_THICKNESS_MAX}'
             }), 400
         
-        whiteboard_state['brush_thickness'] = size
+        g.whiteboard_state['brush_thickness'] = size
+        _publish_status()
         return jsonify({
             'success': True,
             'size': size
@@ -135,14 +186,11 @@ def change_brush_size():
 @api_bp.route('/save', methods=['POST'])
 def save_canvas():
     """Save canvas as PNG"""
-    if whiteboard_state is None:
-        return jsonify({'error': 'Whiteboard not initialized'}), 500
-    
     try:
-        file_handler = whiteboard_state['file_handler']
+        file_handler = g.whiteboard_state['file_handler']
         export_path = file_handler.get_export_path()
         
-        success = whiteboard_state['canvas'].save_as_png(export_path)
+        success = g.whiteboard_state['canvas'].save_as_png(export_path)
         
         if success:
             return jsonify({
@@ -160,7 +208,7 @@ def get_colors():
     """Get available colors"""
     return jsonify({
         'colors': config.COLOR_ORDER,
-        'current': whiteboard_state['gesture_recognizer'].get_current_color_name() if whiteboard_state else None
+        'current': g.whiteboard_state['gesture_recognizer'].get_current_color_name()
     })
 
 @api_bp.route('/config', methods=['GET'])
@@ -175,3 +223,14 @@ def get_config():
         'colors': config.COLOR_ORDER,
         'max_history': config.MAX_HISTORY_SIZE
     })
+
+@api_bp.route('/rooms', methods=['GET'])
+def get_rooms():
+    """List open rooms"""
+    if room_registry is None:
+        return jsonify({'error': 'Whiteboard not initialized'}), 500
+    
+    return jsonify({
+        'rooms': room_registry.list_rooms(),
+        'max_rooms': room_registry.max_rooms
+    })
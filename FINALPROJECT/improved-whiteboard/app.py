@@ -3,84 +3,244 @@ Main Flask Application
 AI-Enhanced Hand Tracking Whiteboard Backend
 """
 
-from flask import Flask
-from flask_socketio import SocketIO, emit
-from flask_cors import CORS
-import threading
+import hmac
+import math
+import os
 import time
 
+from flask import Flask, Response, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from flask_cors import CORS
+
 import config
-from core.hand_tracker import HandTracker
-from core.gesture_recognizer import GestureRecognizer
-from core.canvas import Canvas
-from utils.file_handler import FileHandler
 from api.routes import api_bp, init_routes
-from websocket.video_handler import VideoHandler
+from core.shape_recognizer import shutdown_batch_pool, start_batch_pool
+from utils.latency_metrics import escape_label
+from utils.ocr_service import shutdown_ocr_service, start_ocr_service
+from utils.offload import set_async_mode
+from utils.replay_source import SESSION_EXTENSION, resolve_replay_path
+from utils.stream_profiler import PROFILE_MODES
+from websocket.room_registry import RoomRegistry
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change in production
 CORS(app)  # Enable CORS for React frontend
 
-# Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Initialize SocketIO (threading, or green threads - see run_server.py)
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=config.SERVER_ASYNC_MODE)
+set_async_mode(socketio.async_mode)
 
-# Global whiteboard state
-whiteboard_state = {
-    'hand_tracker': HandTracker(),
-    'gesture_recognizer': GestureRecognizer(),
-    'canvas': Canvas(config.CAMERA_WIDTH, config.CAMERA_HEIGHT),
-    'file_handler': FileHandler(),
-    'brush_thickness': config.BRUSH_THICKNESS_DEFAULT,
-    'hand_detected': False
-}
+# Independent whiteboards (rooms), each with its own canvas, gestures and video
+room_registry = RoomRegistry(socketio)
 
-# Initialize video handler
-video_handler = VideoHandler(socketio, whiteboard_state)
-
-# Initialize API routes with state
-init_routes(whiteboard_state)
+# Initialize API routes with the rooms
+init_routes(room_registry)
 app.register_blueprint(api_bp)
 
 # ============================================
 # WEBSOCKET EVENTS
 # ============================================
 
+def _int_field(data, key):
+    """data[key] as an int, or None if the payload is missing it or it is not a number"""
+    value = data.get(key) if isinstance(data, dict) else None
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def _join(room_id):
+    """Move the calling client into a room and send it the room's status"""
+    previous = room_registry.room_of(request.sid)
+    room = room_registry.join(request.sid, room_id)
+    if room is None:
+        emit('room_error', {'room': room_id, 'error': f'Room limit reached ({room_registry.max_rooms})'})
+        return None
+    
+    if previous is not None and previous is not room:
+        leave_room(previous.id)
+        leave_room(previous.video_handler.debug_room())
+    join_room(room.id)
+    emit('room_joined', {'room': room.id})
+    
+    # Full status and board once; after that only changes are pushed
+    emit('status', room.status_publisher.snapshot())
+    emit('stroke_sync', room.stroke_sync.sync_payload())
+    return room
+
 @socketio.on('connect')
 def handle_connect():
-    """Handle client connection"""
+    """Handle client connection (joins ?room=... or the default room)"""
     print('✅ Client connected')
     emit('connection_response', {'status': 'connected'})
+    room = _join(request.args.get('room') or config.DEFAULT_ROOM)
+    
+    # Optional ?quality=... (viewers of a tier share one encoded frame, 'none' = strokes only)
+    quality = request.args.get('quality')
+    if room is not None and quality == 'none':
+        room.video_handler.broadcaster.remove_viewer(request.sid)
+    elif room is not None and quality:
+        room.video_handler.broadcaster.add_viewer(request.sid, quality)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     print('❌ Client disconnected')
+    room_registry.leave(request.sid)
+
+@socketio.on('join_room')
+def handle_join_room(data):
+    """Switch to another room"""
+    room_id = (data or {}).get('room')
+    if not room_id:
+        emit('room_error', {'error': 'Room parameter required'})
+        return
+    _join(str(room_id))
+
+@socketio.on('watch')
+def handle_watch(data):
+    """Choose the video quality tier ('high', 'medium', 'low')"""
+    room = room_registry.room_of(request.sid)
+    if room is None:
+        emit('room_error', {'error': 'Not in a room'})
+        return
+    
+    quality = (data or {}).get('quality', config.VIDEO_DEFAULT_TIER)
+    if quality == 'none':
+        # Stroke deltas only - the client renders the board itself
+        room.video_handler.broadcaster.remove_viewer(request.sid)
+    elif not room.video_handler.broadcaster.add_viewer(request.sid, quality):
+        emit('room_error', {'error': f'Invalid quality. Choose from: {list(config.VIDEO_QUALITY_TIERS) + ["none"]}'})
+
+@socketio.on('stroke_sync_request')
+def handle_stroke_sync_request(data):
+    """Catch up on stroke deltas after {'since': last applied seq} (snapshot if too far behind)"""
+    room = room_registry.room_of(request.sid)
+    if room is None:
+        emit('room_error', {'error': 'Not in a room'})
+        return
+    
+    # A missing or malformed 'since' gets a full snapshot, like a new client
+    emit('stroke_sync', room.stroke_sync.sync_payload(_int_field(data, 'since')))
+
+@socketio.on('frame_ack')
+def handle_frame_ack(data):
+    """Client has shown a frame (slow clients skip frames instead of queueing them)"""
+    room = room_registry.room_of(request.sid)
+    seq = _int_field(data, 'seq')
+    if room is not None and seq is not None:  # Malformed acks are ignored
+        room.video_handler.broadcaster.ack(request.sid, seq)
+
+@socketio.on('debug_metrics')
+def handle_debug_metrics(data):
+    """Subscribe to ({'enabled': true}) or stop per-stage latency pushes; replies with the current numbers"""
+    room = room_registry.room_of(request.sid)
+    if room is None:
+        emit('room_error', {'error': 'Not in a room'})
+        return
+    
+    video_handler = room.video_handler
+    if (data or {}).get('enabled', True):
+        join_room(video_handler.debug_room())
+    else:
+        leave_room(video_handler.debug_room())
+    emit('debug_metrics', {'room': room.id, 'stages': video_handler.metrics.summary()})
 
 @socketio.on('start_video')
-def handle_start_video():
-    """Start video streaming"""
-    print('📹 Starting video stream...')
-    video_handler.start_camera()
+def handle_start_video(data=None):
+    """
+    Start video streaming for the client's room
+    
+    Optional {'source': replay file in REPLAY_FOLDER, 'speed': 'realtime' or 'max'}
+    replays a recording instead of the camera.
+    """
+    room = room_registry.room_of(request.sid)
+    if room is None:
+        emit('room_error', {'error': 'Not in a room'})
+        return
+    
+    video_handler = room.video_handler
+    if video_handler.running:
+        emit('video_started', {'status': 'streaming'})
+        return
+    
+    source = None
+    name = (data or {}).get('source')
+    if name:
+        source = resolve_replay_path(name)
+        if source is None:
+            emit('video_error', {'error': f'Replay file not found in {config.REPLAY_FOLDER}: {name}'})
+            return
     
-    # Start video streaming thread
+    print(f'📹 Starting video stream (room: {room.id})...')
+    if not video_handler.start_camera(source, realtime=(data or {}).get('speed', 'realtime') != 'max'):
+        emit('video_error', {'error': 'Cannot open video source'})
+        return
+    
+    # Start video streaming task (a thread, or a green thread in async mode)
     def stream_video():
-        while video_handler.running:
-            video_handler.process_frame()
-            time.sleep(0.033)  # ~30 FPS
+        profiler = video_handler.profiler
+        try:
+            while video_handler.running:
+                profiler.frame_started()
+                try:
+                    processed = video_handler.process_frame()
+                finally:
+                    profiler.frame_finished()
+                if not processed and video_handler.replay_finished():
+                    video_handler.stop_camera()
+                    socketio.emit('video_stopped', {'status': 'replay finished'}, to=room.id)
+                    break
+                socketio.sleep(video_handler.frame_delay())
+        finally:
+            video_handler.loop_stopped.set()  # Room.close() waits for this
     
-    thread = threading.Thread(target=stream_video)
-    thread.daemon = True
-    thread.start()
+    video_handler.loop_stopped.clear()
+    socketio.start_background_task(stream_video)
     
-    emit('video_started', {'status': 'streaming'})
+    emit('video_started', {'status': 'streaming'}, to=room.id)
 
 @socketio.on('stop_video')
 def handle_stop_video():
-    """Stop video streaming"""
-    print('📹 Stopping video stream...')
-    video_handler.stop_camera()
-    emit('video_stopped', {'status': 'stopped'})
+    """Stop video streaming for the client's room"""
+    room = room_registry.room_of(request.sid)
+    if room is None:
+        emit('room_error', {'error': 'Not in a room'})
+        return
+    
+    print(f'📹 Stopping video stream (room: {room.id})...')
+    room.video_handler.stop_camera()
+    emit('video_stopped', {'status': 'stopped'}, to=room.id)
+
+@socketio.on('start_recording')
+def handle_start_recording():
+    """Record the room's hand landmarks as a replayable session"""
+    room = room_registry.room_of(request.sid)
+    if room is None:
+        emit('room_error', {'error': 'Not in a room'})
+        return
+    
+    room.video_handler.start_recording()
+    emit('recording_started', {'status': 'recording'}, to=room.id)
+
+@socketio.on('stop_recording')
+def handle_stop_recording(data=None):
+    """Save the recorded session to REPLAY_FOLDER ({'name': file name}, optional)"""
+    room = room_registry.room_of(request.sid)
+    if room is None:
+        emit('room_error', {'error': 'Not in a room'})
+        return
+    
+    name = os.path.basename(str((data or {}).get('name') or time.strftime('session_%Y-%m-%d_%H-%M-%S')))
+    if not name.endswith(SESSION_EXTENSION):
+        name += SESSION_EXTENSION
+    os.makedirs(config.REPLAY_FOLDER, exist_ok=True)
+    
+    frames = room.video_handler.stop_recording(os.path.join(config.REPLAY_FOLDER, name))
+    emit('recording_saved', {'file': name, 'frames': frames}, to=room.id)
 
 # ============================================
 # HTTP ROUTES
@@ -104,6 +264,81 @@ def health():
     """Health check endpoint"""
     return {'status': 'healthy'}
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics: per-stage video latency and frame counters of every room"""
+    rooms = list(room_registry.rooms.values())
+    lines = [
+        '# HELP whiteboard_rooms Whiteboard rooms in this process',
+        '# TYPE whiteboard_rooms gauge',
+        f'whiteboard_rooms {len(rooms)}',
+        '# HELP whiteboard_stage_latency_seconds Video pipeline stage latency (rolling window quantiles)',
+        '# TYPE whiteboard_stage_latency_seconds summary'
+    ]
+    for room in rooms:
+        lines += room.video_handler.metrics.prometheus({'room': room.id})
+    
+    for name, help_text in (('encoded', 'Frames encoded (once per quality tier)'),
+                            ('sent', 'Frames delivered to viewers'),
+                            ('skipped', 'Frames skipped for slow viewers')):
+        lines += [f'# HELP whiteboard_frames_{name}_total {help_text}',
+                  f'# TYPE whiteboard_frames_{name}_total counter']
+        lines += [f'whiteboard_frames_{name}_total{{room="{escape_label(room.id)}"}} {room.video_handler.broadcaster.stats[name]}'
+                  for room in rooms]
+    
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profile', methods=['POST'])
+def admin_profile():
+    """
+    Profile a room's video loop for a few seconds (needs the X-Admin-Token header)
+    
+    Query: room, mode ('sample' or 'cprofile'), seconds, interval (between samples),
+    tracemalloc=1 (per-frame memory snapshots), format=raw (collapsed stacks as
+    text, or a pstats file, instead of JSON)
+    """
+    token = request.headers.get('X-Admin-Token', '')
+    if not config.ADMIN_TOKEN or not hmac.compare_digest(token.encode(), str(config.ADMIN_TOKEN).encode()):
+        return jsonify({'error': 'Admin token required (set ADMIN_TOKEN in config.py)'}), 403
+    
+    room = room_registry.get(request.args.get('room') or config.DEFAULT_ROOM)
+    if room is None:
+        return jsonify({'error': 'Unknown room'}), 404
+    if not room.video_handler.running:
+        return jsonify({'error': 'Video is not streaming in this room'}), 409
+    
+    mode = request.args.get('mode', 'sample')
+    if mode not in PROFILE_MODES:
+        return jsonify({'error': f'Invalid mode. Choose from: {list(PROFILE_MODES)}'}), 400
+    try:
+        seconds = float(request.args.get('seconds', config.PROFILE_DEFAULT_SECONDS))
+        interval = float(request.args.get('interval', config.PROFILE_SAMPLE_INTERVAL))
+    except ValueError:
+        return jsonify({'error': 'seconds and interval must be numbers'}), 400
+    # float() accepts 'nan' and 'inf' - neither is a usable duration
+    if not (math.isfinite(seconds) and math.isfinite(interval)):
+        return jsonify({'error': 'seconds and interval must be finite'}), 400
+    if not 0 < seconds <= config.PROFILE_MAX_SECONDS:
+        return jsonify({'error': f'seconds must be between 0 and {config.PROFILE_MAX_SECONDS}'}), 400
+    if not 0.001 <= interval <= seconds:
+        return jsonify({'error': 'interval must be at least 0.001 and at most seconds'}), 400
+    trace_memory = request.args.get('tracemalloc', '').lower() in ('1', 'true', 'yes')
+    
+    print(f'🔬 Profiling video loop (room: {room.id}, {mode}, {seconds:g}s)...')
+    result = room.video_handler.profiler.run(mode, seconds, interval, trace_memory)
+    if result is None:
+        return jsonify({'error': 'Another profile capture is running'}), 409
+    
+    pstats_data = result.pop('pstats', None)
+    if request.args.get('format') == 'raw':
+        if mode == 'sample':
+            return Response(result['collapsed'] + '\n', mimetype='text/plain')
+        return Response(pstats_data, mimetype='application/octet-stream',
+                        headers={'Content-Disposition': 'attachment; filename="stream_video.pstats"'})
+    
+    result['room'] = room.id
+    return jsonify(result)
+
 # ============================================
 # MAIN
 # ============================================
@@ -118,11 +353,22 @@ if __name__ == '__main__':
     print("=" * 60)
     print("\n✅ Backend ready! Waiting for frontend connection...\n")
     
+    # Evict rooms nobody has used for ROOM_IDLE_TIMEOUT seconds
+    room_registry.start_sweeper()
+    
+    # Worker processes for "perfect all shapes" on large boards and for text recognition
+    start_batch_pool()
+    start_ocr_service()
+    
     # Run Flask app with SocketIO
-    socketio.run(
-        app,
-        host='0.0.0.0',
-        port=5000,
-        debug=True,
-        use_reloader=False  # Disable reloader to avoid issues with camera
-    )
+    try:
+        socketio.run(
+            app,
+            host='0.0.0.0',
+            port=5000,
+            debug=True,
+            use_reloader=False  # Disable reloader to avoid issues with camera
+        )
+    finally:
+        shutdown_batch_pool()
+        shutdown_ocr_service()
@@ -0,0 +1,145 @@
+"""
+Video Fan-out Benchmark
+Server CPU per frame for 1 vs many viewers with FrameBroadcaster
+(encode once per tier, one shared packet) against a per-viewer
+encode + emit baseline, plus a check that slow viewers skip frames
+
+Usage:
+    python benchmarks/fanout_benchmark.py [--viewers 50] [--frames 30]
+
+Runs in-process without a camera or network: viewers are registered with
+the Socket.IO manager and outgoing packets are collected in per-viewer
+inboxes (what the transport queues would hold), so only server-side work
+is timed.
+"""
+
+import argparse
+import base64
+import itertools
+import os
+import sys
+import time
+from collections import defaultdict
+
+# Add backend to path (first and before flask_socketio, which imports websocket-client's
+# 'websocket' module if it is installed - that would shadow this backend's package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from flask import Flask
+from flask_socketio import SocketIO
+
+import config
+from websocket.frame_broadcaster import FrameBroadcaster
+
+
+def _make_frame(width: int, height: int) -> np.ndarray:
+    """Camera-like composite frame (gradient, noise and some strokes)"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    frame = np.repeat(np.repeat(x[None, :, None], height, axis=0), 3, axis=2)
+    frame += rng.normal(0, 8, frame.shape)
+    frame = np.clip(frame, 0, 255).astype(np.uint8)
+    for i in range(20):
+        points = rng.integers([0, 0], [width, height], (6, 2)).astype(np.int32)
+        cv2.polylines(frame, [points], False, config.COLORS[config.COLOR_ORDER[i % 12]], 5)
+    return frame
+
+
+_viewer_ids = itertools.count()
+
+
+def _connect(socketio, count):
+    """Register viewers with the Socket.IO manager, return their sids"""
+    return [socketio.server.manager.connect(f"viewer-{next(_viewer_ids)}", '/') for _ in range(count)]
+
+
+def _collect_packets(socketio):
+    """Queue outgoing packets per viewer instead of writing them to a socket"""
+    inboxes = defaultdict(list)
+    manager = socketio.server.manager
+
+    def send(eio_sid, pkt):
+        inboxes[manager.sid_from_eio_sid(eio_sid, '/')].append(pkt)
+
+    socketio.server._send_eio_packet = send
+    return inboxes
+
+
+def _baseline(socketio, sids, frame):
+    """Per-viewer delivery: encode and emit separately for every viewer"""
+    for sid in sids:
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, config.FRAME_ENCODE_QUALITY])
+        socketio.emit('video_frame', {'frame': base64.b64encode(buffer).decode('utf-8')}, to=sid)
+
+
+def _time_ms(func, frames, inboxes):
+    """Average ms per call (inboxes are drained outside the timing)"""
+    total = 0.0
+    for _ in range(frames):
+        start = time.perf_counter()
+        func()
+        total += time.perf_counter() - start
+        inboxes.clear()
+    return total / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark video fan-out to many viewers")
+    parser.add_argument("--viewers", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    socketio = SocketIO(Flask(__name__), async_mode='threading')
+    inboxes = _collect_packets(socketio)
+    frame = _make_frame(config.CAMERA_WIDTH, config.CAMERA_HEIGHT)
+    print(f"Frame: {config.CAMERA_WIDTH}x{config.CAMERA_HEIGHT}, {args.frames} frames\n")
+
+    print(f"{'viewers':>8} {'baseline':>10} {'fan-out':>10} {'encodes/frame':>14}")
+    for count in (1, args.viewers):
+        sids = _connect(socketio, count)
+        broadcaster = FrameBroadcaster(socketio, room=f'bench-{count}')
+        for sid in sids:
+            broadcaster.add_viewer(sid)
+
+        baseline_ms = _time_ms(lambda: _baseline(socketio, sids, frame), args.frames, inboxes)
+        fanout_ms = _time_ms(lambda: broadcaster.broadcast(frame), args.frames, inboxes)
+        encodes = broadcaster.stats['encoded'] / args.frames
+        print(f"{count:>8} {baseline_ms:>8.2f}ms {fanout_ms:>8.2f}ms {encodes:>14.1f}")
+
+    # Mixed tiers: one encode per tier, whatever the number of viewers
+    sids = _connect(socketio, args.viewers)
+    broadcaster = FrameBroadcaster(socketio, room='tiers')
+    tiers = list(config.VIDEO_QUALITY_TIERS)
+    for i, sid in enumerate(sids):
+        broadcaster.add_viewer(sid, tiers[i % len(tiers)])
+    mixed_ms = _time_ms(lambda: broadcaster.broadcast(frame), args.frames, inboxes)
+    print(f"\n{args.viewers} viewers over tiers {tiers}: {mixed_ms:.2f}ms/frame, "
+          f"{broadcaster.stats['encoded'] / args.frames:.1f} encodes/frame")
+
+    # Slow viewer: acknowledges once, then stops - it must skip frames, not queue them
+    slow_sid, fast_sids = sids[0], sids[1:]
+    broadcaster.ack(slow_sid, broadcaster.seq)
+    for _ in range(args.frames):
+        broadcaster.broadcast(frame)
+        for sid in fast_sids:
+            broadcaster.ack(sid, broadcaster.seq)
+    slow_frames = len(inboxes[slow_sid])
+    fast_frames = len(inboxes[fast_sids[0]])
+    print(f"Slow viewer queued {slow_frames} of {args.frames} frames, fast viewer {fast_frames} "
+          f"(limit {config.VIDEO_MAX_IN_FLIGHT} in flight)")
+
+    # ...and gets frames again once its unacknowledged frames time out
+    time.sleep(config.VIDEO_ACK_TIMEOUT)
+    broadcaster.broadcast(frame)
+    recovered = len(inboxes[slow_sid]) > slow_frames
+    print(f"Slow viewer {'gets frames again' if recovered else 'is still skipped'} "
+          f"after {config.VIDEO_ACK_TIMEOUT}s without acks")
+
+    if slow_frames > config.VIDEO_MAX_IN_FLIGHT or fast_frames != args.frames or not recovered:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Benchmark Fixtures
+Camera frames and hand landmark streams for running the pipeline headless
+
+Landmark streams are lists with one (hands, 21, 3) array of normalized
+MediaPipe landmarks per frame. They come from make_landmark_stream() (a
+seeded, synthetic drawing session: hands move, draw shapes, erase, change
+color and leave the view), from record_landmarks(), which runs MediaPipe
+over a recorded video once so later runs can replay the exact same hands,
+or from a session recorded in the app (utils/replay_source.py - same .npz
+format). LandmarkReplay plays a stream back in place of MediaPipe's Hands,
+so everything after inference runs unchanged.
+
+FrameLoop plays frames held in memory back like a cv2.VideoCapture.
+"""
+
+from types import SimpleNamespace
+from typing import List
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic_strokes import SHAPE_TYPES, make_stroke
+from utils.replay_source import ReplayHands
+
+# Landmark layout of a right hand, palm to the camera, in units of hand size
+# (wrist -> middle finger MCP); y grows downwards like image coordinates
+_THUMB = {True: [(-0.3, -0.2), (-0.55, -0.35), (-0.75, -0.5), (-0.95, -0.6)],
+          False: [(-0.3, -0.2), (-0.45, -0.4), (-0.5, -0.55), (-0.2, -0.6)]}
+_FINGER_X = [-0.25, 0.0, 0.22, 0.42]  # Index, middle, ring, pinky
+_FINGER_Y = {True: [-1.0, -1.45, -1.75, -2.0],  # MCP, PIP, DIP, tip
+             False: [-1.0, -1.3, -1.05, -0.95]}
+
+# Fingers up for each finger count (thumb, index, middle, ring, pinky)
+_POSES = {
+    0: (False, False, False, False, False),
+    1: (False, True, False, False, False),
+    2: (False, True, True, False, False),
+    3: (False, True, True, True, False),
+    4: (False, True, True, True, True),
+    5: (True, True, True, True, True)
+}
+
+_INDEX_TIP = 8
+
+
+def make_hand(tip, finger_count: int, size: float = 0.08, rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Landmarks of one hand
+
+    Args:
+        tip: (x, y) normalized position of the index finger tip
+        finger_count: Pose (0 = fist ... 5 = open hand)
+        size: Wrist to middle finger MCP distance (normalized)
+        rng: Adds a little landmark noise if given
+
+    Returns:
+        (21, 3) normalized landmarks
+    """
+    thumb, *fingers = _POSES[finger_count]
+    points = [(0.0, 0.0)] + _THUMB[thumb]
+    for x, up in zip(_FINGER_X, fingers):
+        points += [(x, y) for y in _FINGER_Y[up]]
+
+    hand = np.zeros((21, 3))
+    hand[:, :2] = np.array(points) * size
+    if rng is not None:
+        hand[:, :2] += rng.normal(0.0, size * 0.01, (21, 2))
+    hand[:, :2] += np.asarray(tip) - hand[_INDEX_TIP, :2]
+    return hand
+
+
+def _session(num_frames: int, rng: np.random.Generator, width: int, height: int, center_x: float) -> List:
+    """One hand's drawing session: (tip, finger count) per frame, None = hand out of view"""
+    frames = []
+    offset = np.array([center_x - 0.5, 0.0])  # Shapes are centered in the frame
+    position = np.array([center_x, 0.5])
+    strokes = 0
+
+    def move_to(target, finger_count, steps):
+        nonlocal position
+        for t in np.linspace(0.0, 1.0, steps):
+            frames.append((position + (target - position) * t, finger_count))
+        position = np.asarray(target, dtype=float)
+
+    while len(frames) < num_frames:
+        shape = make_stroke(SHAPE_TYPES[strokes % len(SHAPE_TYPES)], rng, jitter=1.5)
+        path = shape[::2] / (width, height) + offset
+        strokes += 1
+
+        move_to(path[0], 2, 10)         # Idle (2 fingers) to the start of the shape
+        move_to(path[0], 1, 3)          # Index finger up: start drawing
+        for point in path[1:]:
+            frames.append((point, 1))
+        position = path[-1]
+        move_to(position, 2, 10)        # Stop
+
+        if strokes % 4 == 0:            # Erase across the last shape with a fist
+            move_to(position + rng.uniform(-0.1, 0.1, 2), 0, 20)
+        if strokes % 5 == 0:            # Hold 3 fingers: next color
+            move_to(position, 3, 50)
+        if strokes % 7 == 0:            # Hand leaves the view
+            frames += [None] * 10
+
+    return frames[:num_frames]
+
+
+def make_landmark_stream(num_frames: int, hands: int = 1, seed: int = 0,
+                         width: int = 1280, height: int = 720) -> List[np.ndarray]:
+    """
+    Synthetic drawing session
+
+    Args:
+        num_frames: Frames in the stream
+        hands: Hands drawing at the same time (independent sessions)
+        seed: Random seed (same seed = same stream)
+        width, height: Frame size the shapes are drawn for
+
+    Returns:
+        list of (hands in view, 21, 3) normalized landmark arrays
+    """
+    rng = np.random.default_rng(seed)
+    # Hands draw side by side
+    sessions = [_session(num_frames, rng, width, height, center_x=(i + 1) / (hands + 1)) for i in range(hands)]
+
+    stream = []
+    for frame in zip(*sessions):
+        visible = [hand for hand in frame if hand is not None]
+        stream.append(np.array([make_hand(np.clip(tip, 0.02, 0.98), finger_count, rng=rng)
+                                for tip, finger_count in visible]).reshape(-1, 21, 3))
+    return stream
+
+
+def record_landmarks(frames: List[np.ndarray]) -> List[np.ndarray]:
+    """Run MediaPipe (through HandTracker) over BGR frames once, keeping the landmarks"""
+    from core.hand_tracker import HandTracker
+
+    tracker = HandTracker()
+    stream = []
+    for frame in frames:
+        tracker.detect_hands(cv2.flip(frame, 1))  # VideoHandler mirrors frames first
+        stream.append(tracker.landmark_array.copy())
+    tracker.release()
+    return stream
+
+
+class LandmarkReplay(ReplayHands):
+    """ReplayHands that moves on by itself: every process() call returns the next frame (looping)"""
+
+    def __init__(self, stream: List[np.ndarray]):
+        super().__init__(SimpleNamespace(stream=stream, index=-1))
+
+    def process(self, rgb_frame):
+        self.source.index = (self.source.index + 1) % len(self.frames)
+        return super().process(rgb_frame)
+
+
+def synthetic_frames(count: int, width: int, height: int, seed: int = 0) -> List[np.ndarray]:
+    """Camera-like BGR frames (lit background with sensor noise)"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(60, 200, width, dtype=np.float32)
+    y = np.linspace(0.8, 1.1, height, dtype=np.float32)
+    background = (y[:, None] * x[None, :])[:, :, None] * np.array([0.9, 1.0, 1.1], dtype=np.float32)
+    return [np.clip(background + rng.normal(0, 6, background.shape), 0, 255).astype(np.uint8)
+            for _ in range(count)]
+
+
+def load_video(path: str, max_frames: int, width: int, height: int) -> List[np.ndarray]:
+    """
+    Decode a recorded video into memory (so decoding is not timed)
+
+    Returns:
+        list of BGR frames resized to width x height (empty if the file cannot be read)
+    """
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        success, frame = capture.read()
+        if not success:
+            break
+        if frame.shape[1] != width or frame.shape[0] != height:
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+class FrameLoop:
+    """cv2.VideoCapture stand-in that loops frames held in memory"""
+
+    def __init__(self, frames: List[np.ndarray]):
+        self.frames = frames
+        self.index = 0
+
+    def isOpened(self) -> bool:
+        return bool(self.frames)
+
+    def read(self):
+        # A copy, like a capture filling a fresh buffer (the pipeline draws on frames)
+        frame = self.frames[self.index % len(self.frames)].copy()
+        self.index += 1
+        return True, frame
+
+    def set(self, prop_id, value) -> bool:
+        return False
+
+    def release(self):
+        pass
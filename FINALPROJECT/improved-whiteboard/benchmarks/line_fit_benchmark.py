@@ -0,0 +1,123 @@
+"""
+Line Fit Accuracy & Speed Benchmark
+Checks fit_line_tls() across a sweep of orientations (including vertical)
+and compares its speed with np.polyfit and np.linalg.eigh
+
+Usage:
+    python benchmarks/line_fit_benchmark.py
+
+Exits with status 1 if any accuracy case fails.
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.line_fit import fit_line_tls
+
+ANGLES_DEG = [0, 1, 15, 30, 45, 60, 75, 89, 89.9, 90, 90.1, 120, 135, 179]
+NOISE_LEVELS = [0.0, 2.0, 5.0]
+MAX_ANGLE_ERROR_DEG = 1.0
+
+
+def _noisy_line(angle_deg: float, noise: float, rng: np.random.Generator,
+                length: float = 400.0, num_points: int = 80) -> np.ndarray:
+    """Points along a line at angle_deg with perpendicular noise"""
+    theta = np.radians(angle_deg)
+    direction = np.array([np.cos(theta), np.sin(theta)])
+    normal = np.array([-direction[1], direction[0]])
+    t = np.linspace(-length / 2, length / 2, num_points)
+    offsets = rng.normal(0.0, noise, num_points) if noise > 0 else np.zeros(num_points)
+    return np.array([640.0, 360.0]) + t[:, None] * direction + offsets[:, None] * normal
+
+
+def _angle_error_deg(direction: np.ndarray, angle_deg: float) -> float:
+    """Unsigned angle between a fitted direction and the true (undirected) line"""
+    fitted = np.degrees(np.arctan2(direction[1], direction[0])) % 180.0
+    diff = abs(fitted - angle_deg % 180.0)
+    return min(diff, 180.0 - diff)
+
+
+def check_accuracy() -> bool:
+    """Run the orientation x noise sweep, return True if every case passes"""
+    rng = np.random.default_rng(0)
+    all_passed = True
+
+    print(f"{'angle':>7} {'noise':>6} {'angle err':>10} {'mean err':>9} {'expected':>9}  result")
+    for angle in ANGLES_DEG:
+        for noise in NOISE_LEVELS:
+            points = _noisy_line(angle, noise, rng)
+            fit = fit_line_tls(points)
+
+            angle_error = _angle_error_deg(fit.direction, angle)
+            # Mean |N(0, s)| = s * sqrt(2/pi)
+            expected = noise * np.sqrt(2 / np.pi)
+            passed = angle_error < MAX_ANGLE_ERROR_DEG and fit.mean_error < expected * 1.5 + 1e-6
+
+            all_passed &= passed
+            print(f"{angle:>7} {noise:>6} {angle_error:>10.4f} {fit.mean_error:>9.3f} "
+                  f"{expected:>9.3f}  {'PASS' if passed else 'FAIL'}")
+
+    # Degenerate input: all points identical must not crash or return NaN
+    fit = fit_line_tls(np.full((20, 2), 7.0))
+    degenerate_ok = bool(np.isfinite(fit.direction).all() and fit.mean_error == 0)
+    all_passed &= degenerate_ok
+    print(f"degenerate (identical points): {'PASS' if degenerate_ok else 'FAIL'}")
+
+    return all_passed
+
+
+def _time(func, repeats: int) -> float:
+    """Microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def compare_speed(repeats: int = 5000):
+    """Time TLS fit against polyfit and a generic eigen solver"""
+    rng = np.random.default_rng(1)
+    points = _noisy_line(30, 2.0, rng)
+    sections = np.stack([points[:26], points[-26:]])
+
+    def polyfit_fit():
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            slope, intercept = np.polyfit(points[:, 0], points[:, 1], 1)
+        return np.abs(points[:, 1] - (slope * points[:, 0] + intercept)).mean()
+
+    def eigh_fit():
+        centered = points - points.mean(axis=0)
+        _, vecs = np.linalg.eigh(centered.T @ centered / len(centered))
+        return np.abs(centered @ vecs[:, 0]).mean()
+
+    def two_polyfits():
+        for section in sections:
+            np.polyfit(section[:, 0], section[:, 1], 1)
+
+    print(f"np.polyfit             : {_time(polyfit_fit, repeats):7.1f} us")
+    print(f"np.linalg.eigh         : {_time(eigh_fit, repeats):7.1f} us")
+    print(f"fit_line_tls           : {_time(lambda: fit_line_tls(points), repeats):7.1f} us")
+    print(f"2 sections, polyfit    : {_time(two_polyfits, repeats):7.1f} us")
+    print(f"2 sections, TLS batched: {_time(lambda: fit_line_tls(sections), repeats):7.1f} us")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("📐 LINE FIT ACCURACY")
+    print("=" * 60)
+    passed = check_accuracy()
+
+    print("\n" + "=" * 60)
+    print("⏱️  LINE FIT SPEED")
+    print("=" * 60)
+    compare_speed()
+
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,262 @@
+"""
+Server Load Test
+Many concurrent Socket.IO clients plus HTTP calls against a running server
+
+Usage:
+    python benchmarks/load_test.py [--mode eventlet] [--clients 200] [--duration 15]
+    python benchmarks/load_test.py --url http://localhost:5000   # already running server
+
+Starts run_server.py in the given mode (unless --url is given), connects
+--clients websocket clients spread over rooms and has each of them request
+a stroke sync in a loop, while --http-workers threads call GET /api/status
+and POST /api/undo. Reports round-trip percentiles, throughput, failed
+connections and the server's OS thread count (Linux only), so threading
+and async mode can be compared on the same machine:
+
+    python benchmarks/load_test.py --mode threading
+    python benchmarks/load_test.py --mode eventlet
+
+--presenters N --replay demo.npz adds N rooms whose video replays a
+recording from the server's REPLAY_FOLDER (no camera needed) at real-time
+speed, each watched by one client, and reports the frame rate they got.
+
+Needs the client packages: pip install "python-socketio[client]" requests
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+import socketio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _start_server(mode: str, port: int) -> subprocess.Popen:
+    """Run run_server.py in the background and wait for /health"""
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'run_server.py'), '--mode', mode,
+         '--host', '127.0.0.1', '--port', str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        if server.poll() is not None:
+            raise SystemExit(f"❌ Server exited with code {server.returncode}")
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return server
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise SystemExit("❌ Server did not start")
+
+
+def _thread_count(pid: int):
+    """OS threads of a process (None if /proc is not available)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('Threads:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+class _SocketClient:
+    """One whiteboard client requesting stroke syncs back to back"""
+
+    def __init__(self, url: str, room: str):
+        self.url = url
+        self.room = room
+        self.sio = socketio.Client(reconnection=False)
+        self.latencies = []
+        self.synced = threading.Event()
+        self.sio.on('stroke_sync', lambda data: self.synced.set())
+
+    def connect(self) -> bool:
+        try:
+            # quality=none: no video frames, this test is about server concurrency
+            self.sio.connect(f"{self.url}?room={self.room}&quality=none", transports=['websocket'],
+                             wait_timeout=10)
+        except Exception:
+            return False
+        self.synced.wait(10)  # Initial sync sent on join
+        return True
+
+    def run(self, stop: threading.Event):
+        while not stop.is_set() and self.sio.connected:
+            self.synced.clear()
+            start = time.perf_counter()
+            self.sio.emit('stroke_sync_request', {})
+            if not self.synced.wait(10):
+                break
+            self.latencies.append(time.perf_counter() - start)
+
+    def close(self):
+        if self.sio.connected:
+            self.sio.disconnect()
+
+
+class _Presenter:
+    """A room running on a replayed recording, watched by one client"""
+
+    def __init__(self, url: str, room: str, replay: str, quality: str):
+        self.url = url
+        self.room = room
+        self.replay = replay
+        self.quality = quality
+        self.sio = socketio.Client(reconnection=False)
+        self.frames = 0
+        self.errors = []
+        self.started = threading.Event()
+        self.sio.on('video_frame', self._on_frame)
+        self.sio.on('video_started', lambda data: self.started.set())
+        self.sio.on('video_error', lambda data: (self.errors.append(data.get('error')), self.started.set()))
+
+    def _on_frame(self, data):
+        self.frames += 1
+        try:
+            self.sio.emit('frame_ack', {'seq': data.get('seq')})
+        except socketio.exceptions.SocketIOError:
+            pass  # Frame arrived while disconnecting
+
+    def start(self) -> bool:
+        try:
+            self.sio.connect(f"{self.url}?room={self.room}&quality={self.quality}", transports=['websocket'],
+                             wait_timeout=10)
+        except Exception:
+            return False
+        self.sio.emit('start_video', {'source': self.replay, 'speed': 'realtime'})
+        return self.started.wait(10) and not self.errors
+
+    def close(self):
+        if self.sio.connected:
+            try:
+                self.sio.emit('stop_video')
+            except socketio.exceptions.SocketIOError:
+                pass
+            self.sio.disconnect()
+
+
+def _http_worker(url: str, room: str, stop: threading.Event, latencies: list, errors: list):
+    """GET /api/status and POST /api/undo in turns"""
+    session = requests.Session()
+    calls = [
+        lambda: session.get(f"{url}/api/status", params={'room': room}, timeout=10),
+        lambda: session.post(f"{url}/api/undo", params={'room': room}, timeout=10)
+    ]
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            response = calls[i % 2]()
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except requests.RequestException as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+        i += 1
+
+
+def _report(name: str, latencies: list, duration: float):
+    if not latencies:
+        print(f"{name:>10}: no completed calls")
+        return
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    print(f"{name:>10}: {len(ms):>7} calls {len(ms) / duration:>8.0f}/s   "
+          f"p50 {p50:6.1f}ms  p95 {p95:6.1f}ms  p99 {p99:6.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the whiteboard server")
+    parser.add_argument("--mode", choices=['threading', 'eventlet', 'gevent'], default='eventlet')
+    parser.add_argument("--url", help="Test a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--http-workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--presenters", type=int, default=0, help="Rooms replaying --replay as their video")
+    parser.add_argument("--replay", help="Recording in the server's REPLAY_FOLDER for the presenters")
+    parser.add_argument("--quality", default='low', help="Video quality tier the presenters' viewers watch")
+    args = parser.parse_args()
+    if args.presenters and not args.replay:
+        parser.error("--presenters needs --replay")
+
+    server = None
+    url = args.url
+    if url is None:
+        server = _start_server(args.mode, args.port)
+        url = f"http://127.0.0.1:{args.port}"
+        print(f"Server: run_server.py --mode {args.mode} (pid {server.pid}, "
+              f"{_thread_count(server.pid)} threads idle)")
+
+    try:
+        rooms = [f"load-{i}" for i in range(args.rooms)]
+        clients = [_SocketClient(url, rooms[i % len(rooms)]) for i in range(args.clients)]
+
+        start = time.perf_counter()
+        connected = [client for client in clients if client.connect()]
+        print(f"Connected {len(connected)}/{len(clients)} clients in {time.perf_counter() - start:.1f}s "
+              f"over {len(rooms)} rooms")
+
+        presenters = [_Presenter(url, f"replay-{i}", args.replay, args.quality) for i in range(args.presenters)]
+        streaming = [presenter for presenter in presenters if presenter.start()]
+        if presenters:
+            errors = {error for presenter in presenters for error in presenter.errors}
+            print(f"Started {len(streaming)}/{len(presenters)} replaying presenters"
+                  + (f" ({'; '.join(errors)})" if errors else ""))
+
+        stop = threading.Event()
+        http_latencies, http_errors = [], []
+        workers = [threading.Thread(target=client.run, args=(stop,), daemon=True) for client in connected]
+        # REST calls only reach rooms that exist, i.e. that a socket client joined
+        http_rooms = sorted({client.room for client in connected}) or rooms
+        workers += [threading.Thread(target=_http_worker, args=(url, http_rooms[i % len(http_rooms)], stop,
+                                                                  http_latencies, http_errors), daemon=True)
+                    for i in range(args.http_workers)]
+        for worker in workers:
+            worker.start()
+        for presenter in streaming:
+            presenter.frames = 0  # Count frames during the measured time only
+
+        time.sleep(args.duration / 2)
+        peak_threads = _thread_count(server.pid) if server else None
+        time.sleep(args.duration / 2)
+        stop.set()
+        for worker in workers:
+            worker.join(15)
+
+        print()
+        _report('socket', [t for client in connected for t in client.latencies], args.duration)
+        _report('http', http_latencies, args.duration)
+        print(f"HTTP errors: {len(http_errors)}")
+        if peak_threads is not None:
+            print(f"Server OS threads under load: {peak_threads}")
+        if streaming:
+            fps = np.array([presenter.frames for presenter in streaming]) / args.duration
+            print(f"Presenter video: {fps.mean():.1f} fps per room (min {fps.min():.1f}) "
+                  f"over {len(streaming)} rooms")
+
+        # Disconnect in parallel (each disconnect waits for its transport to close)
+        closers = [threading.Thread(target=client.close, daemon=True) for client in connected + presenters]
+        for closer in closers:
+            closer.start()
+        for closer in closers:
+            closer.join(15)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""
+Pipeline Benchmark
+Headless throughput of HandTracker, GestureRecognizer, Canvas and the full
+VideoHandler frame loop - no camera, no display
+
+Usage:
+    python benchmarks/pipeline_benchmark.py [--frames 600] [--hands 2]
+    python benchmarks/pipeline_benchmark.py --video clip.mp4                   # real MediaPipe on a recording
+    python benchmarks/pipeline_benchmark.py --video clip.mp4 --record-landmarks clip.npz
+    python benchmarks/pipeline_benchmark.py --landmarks clip.npz [--video clip.mp4]
+    python benchmarks/pipeline_benchmark.py --compare benchmarks/results/<commit>.json
+
+Fixtures (benchmarks/fixtures.py): frames are a recorded video or
+synthetic camera frames; hands are either detected by MediaPipe (--video
+without --landmarks) or replayed from a landmark stream - synthetic by
+default, or recorded once with --record-landmarks. Replayed runs are
+deterministic and need no hands in front of a camera, so they are the
+ones to compare across commits ('inference' then only measures the landmark
+post-processing).
+
+Each scenario reports FPS, per-frame latency (p50/p95/p99), per-stage
+latency (VideoHandler) and memory (Python heap peak/growth from a
+tracemalloc pass, process peak RSS). Results are written as JSON to
+benchmarks/results/<commit>.json; --compare prints the change against an
+earlier result and exits with status 1 on a regression beyond --threshold.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# Add backend to path (first, so the 'websocket' package is not shadowed by websocket-client)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import config
+from core.hand_tracker import HandTracker
+from core.gesture_recognizer import GestureRecognizer
+from core.canvas import Canvas
+from utils.latency_metrics import LatencyMetrics
+from utils.replay_source import load_session, save_session
+from benchmarks.fixtures import (FrameLoop, LandmarkReplay, load_video, make_landmark_stream,
+                                 record_landmarks, synthetic_frames)
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+
+class Fixture:
+    """Frames and hands every scenario runs over"""
+
+    def __init__(self, frames, stream=None, description=None):
+        """
+        Args:
+            frames: BGR frames (camera input)
+            stream: Landmark stream to replay (None = run MediaPipe on the frames)
+            description: What the fixture is (stored in the results)
+        """
+        self.frames = frames
+        self.stream = stream
+        self.description = description or {}
+        self.height, self.width = frames[0].shape[:2]
+
+    def make_tracker(self) -> HandTracker:
+        tracker = HandTracker()
+        if self.stream is not None:
+            tracker.hands.close()
+            tracker.hands = LandmarkReplay(self.stream)
+        return tracker
+
+    def hand_frames(self, count: int):
+        """(hand ids, pixel tips, finger counts) per frame, tracked once up front"""
+        tracker = self.make_tracker()
+        result = []
+        for i in range(count):
+            tracker.detect_hands(cv2.flip(self.frames[i % len(self.frames)], 1))
+            result.append((list(tracker.hand_ids), tracker.get_index_finger_tips(self.width, self.height),
+                           tracker.count_fingers_all().copy()))
+        tracker.release()
+        return result
+
+
+# ============================================
+# SCENARIOS (setup outside the timing, return a per-frame step)
+# ============================================
+
+def hand_tracker_scenario(fixture, frames):
+    """Detection + tip lookup + finger counting"""
+    tracker = fixture.make_tracker()
+
+    def step(i):
+        tracker.detect_hands(fixture.frames[i % len(fixture.frames)])
+        tracker.get_index_finger_tips(fixture.width, fixture.height)
+        tracker.count_fingers_all()
+
+    return step, {}
+
+
+def gesture_scenario(fixture, frames):
+    """Gesture recognition of every hand in view"""
+    hand_frames = fixture.hand_frames(frames)
+    recognizers = [GestureRecognizer(color_index=i, hand_id=i) for i in range(config.MAX_NUM_HANDS)]
+
+    def step(i):
+        hand_ids, _, finger_counts = hand_frames[i]
+        for hand_id, finger_count in zip(hand_ids, finger_counts):
+            recognizers[hand_id].recognize_gesture(int(finger_count), i / config.CAMERA_FPS)
+
+    return step, {}
+
+
+def canvas_scenario(fixture, frames):
+    """Drawing/erasing, live shape suggestion and reading the canvas, like VideoHandler"""
+    hand_frames = fixture.hand_frames(frames)
+    recognizers = [GestureRecognizer(color_index=i, hand_id=i) for i in range(config.MAX_NUM_HANDS)]
+    actions = []
+    for i, (hand_ids, tips, finger_counts) in enumerate(hand_frames):
+        timestamp = i / config.CAMERA_FPS
+        actions.append([(hand_id, (int(x), int(y)),
+                         recognizers[hand_id].recognize_gesture(int(count), timestamp)['mode'],
+                         recognizers[hand_id].get_current_color_bgr())
+                        for hand_id, (x, y), count in zip(hand_ids, tips, finger_counts)])
+
+    canvas = Canvas(fixture.width, fixture.height)
+    drawing = set()
+
+    def step(i):
+        seen = set()
+        for hand_id, (x, y), mode, color in actions[i]:
+            seen.add(hand_id)
+            if mode in ('draw', 'erase'):
+                if mode == 'erase':
+                    color, thickness = (0, 0, 0), config.ERASER_THICKNESS
+                else:
+                    thickness = config.BRUSH_THICKNESS_DEFAULT
+                if hand_id in drawing:
+                    canvas.continue_drawing(x, y, color, thickness, mode, hand_id)
+                else:
+                    canvas.start_drawing(x, y, color, thickness, mode, hand_id)
+                    drawing.add(hand_id)
+            elif hand_id in drawing:
+                canvas.stop_drawing(hand_id)
+                drawing.discard(hand_id)
+        for hand_id in drawing - seen:
+            canvas.stop_drawing(hand_id)
+            drawing.discard(hand_id)
+        canvas.get_live_shape_suggestion()
+        canvas.get_canvas()
+
+    return step, {'strokes': lambda: len(canvas.stroke_manager.get_all_strokes())}
+
+
+_viewer_ids = itertools.count()
+
+
+def video_handler_scenario(fixture, frames, viewers=4):
+    """Whole VideoHandler.process_frame (capture to emit) of one room with viewers"""
+    from flask import Flask
+    from flask_socketio import SocketIO
+    from websocket.room_registry import Room
+    from utils.file_handler import FileHandler
+
+    socketio = SocketIO(Flask(__name__), async_mode='threading')
+
+    # Viewers get their packets dropped instead of written to sockets - only server work is timed
+    socketio.server._send_eio_packet = lambda eio_sid, pkt: None
+
+    room = Room('bench', socketio, FileHandler())
+    if fixture.stream is not None:
+        room.state['hand_tracker'].hands.close()
+        room.state['hand_tracker'].hands = LandmarkReplay(fixture.stream)
+    handler = room.video_handler
+    handler.cap = FrameLoop(fixture.frames)
+    tiers = list(config.VIDEO_QUALITY_TIERS)
+    for i in range(viewers):
+        sid = socketio.server.manager.connect(f"viewer-{next(_viewer_ids)}", '/')
+        handler.broadcaster.add_viewer(sid, tiers[i % len(tiers)])
+
+    def step(i):
+        handler.process_frame()
+
+    return step, {'stages_ms': lambda: {stage: {key: value for key, value in stats.items() if key != 'count'}
+                                        for stage, stats in handler.metrics.summary().items()
+                                        if stage != 'frame'},
+                  'strokes': lambda: len(room.state['canvas'].stroke_manager.get_all_strokes())}
+
+
+SCENARIOS = {
+    'hand_tracker': hand_tracker_scenario,
+    'gesture': gesture_scenario,
+    'canvas': canvas_scenario,
+    'video_handler': video_handler_scenario
+}
+
+
+# ============================================
+# RUNNER
+# ============================================
+
+def _peak_rss_mb() -> float:
+    """Peak resident memory of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _setup(name, fixture, frames, viewers):
+    if name == 'video_handler':
+        return video_handler_scenario(fixture, frames, viewers)
+    return SCENARIOS[name](fixture, frames)
+
+
+def run_scenario(name, fixture, frames, warmup, memory_frames, viewers):
+    """
+    Time one scenario, then measure its memory in a separate tracemalloc pass
+
+    Returns:
+        {'fps', 'latency_ms', ..., 'memory'}
+    """
+    step, extras = _setup(name, fixture, frames, viewers)
+    for i in range(warmup):
+        step(i)
+
+    metrics = LatencyMetrics(stages=('frame',), window=frames)
+    start = time.perf_counter()
+    for i in range(frames):
+        timer = metrics.frame()
+        step(i)
+        metrics.record(timer)
+    elapsed = time.perf_counter() - start
+
+    latency = metrics.summary()['frame']
+    result = {
+        'fps': round(frames / elapsed, 1),
+        'latency_ms': {key: latency[key] for key in ('p50', 'p95', 'p99', 'mean')}
+    }
+    result.update({key: value() for key, value in extras.items()})
+
+    # Memory: fresh setup, heap tracing only around the steps (tracing slows Python code down)
+    step, _ = _setup(name, fixture, frames, viewers)
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for i in range(min(frames, memory_frames)):
+        step(i)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result['memory'] = {
+        'python_peak_kb': round((peak - baseline) / 1024, 1),
+        'python_growth_kb': round((current - baseline) / 1024, 1),
+        'rss_peak_mb': _peak_rss_mb()
+    }
+    return result
+
+
+def _git_commit():
+    """(short commit, working tree has changes) or (None, None) outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def compare(results, baseline, threshold) -> bool:
+    """
+    Print the change of every scenario against a baseline result
+
+    Returns:
+        bool: True if any scenario lost more than threshold FPS or gained more than threshold p95
+    """
+    regressed = False
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    print(f"{'scenario':<15} {'fps':>10} {'change':>8} {'p95 ms':>10} {'change':>8}")
+    for name, result in results['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            continue
+        fps_change = result['fps'] / old['fps'] - 1 if old['fps'] else 0.0
+        p95_old = old['latency_ms']['p95']
+        p95_change = result['latency_ms']['p95'] / p95_old - 1 if p95_old else 0.0
+        flag = fps_change < -threshold or p95_change > threshold
+        regressed |= flag
+        print(f"{name:<15} {result['fps']:>10.1f} {fps_change:>+7.1%} {result['latency_ms']['p95']:>10.3f} "
+              f"{p95_change:>+7.1%}{'  ❌ REGRESSION' if flag else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless pipeline benchmark")
+    parser.add_argument("--frames", type=int, default=600, help="Timed frames per scenario")
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--memory-frames", type=int, default=200, help="Frames in the tracemalloc pass")
+    parser.add_argument("--hands", type=int, default=1, help="Hands in the synthetic landmark stream")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--video", help="Recorded video to use as camera input")
+    parser.add_argument("--landmarks", help="Landmark session (.npz) to replay instead of running MediaPipe")
+    parser.add_argument("--record-landmarks", metavar="NPZ",
+                        help="Run MediaPipe over --video, save the landmarks and exit")
+    parser.add_argument("--save-landmarks", metavar="NPZ", help="Also save the synthetic stream")
+    parser.add_argument("--viewers", type=int, default=4, help="Video viewers (spread over quality tiers)")
+    parser.add_argument("--scenarios", nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Regression threshold (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    total = args.frames + args.warmup
+    width, height = config.CAMERA_WIDTH, config.CAMERA_HEIGHT
+
+    # Camera input
+    if args.video:
+        frames = load_video(args.video, total, width, height)
+        if not frames:
+            raise SystemExit(f"❌ Cannot read video: {args.video}")
+        source = {'video': os.path.basename(args.video), 'video_frames': len(frames)}
+    else:
+        frames = synthetic_frames(30, width, height, args.seed)
+        source = {'video': 'synthetic'}
+
+    if args.record_landmarks:
+        if not args.video:
+            raise SystemExit("❌ --record-landmarks needs --video")
+        stream = record_landmarks(frames)
+        save_session(args.record_landmarks, stream)
+        print(f"💾 Saved {len(stream)} frames of landmarks "
+              f"({sum(len(hands) > 0 for hands in stream)} with hands) to {args.record_landmarks}")
+        return
+
+    # Hands
+    if args.landmarks:
+        stream, _ = load_session(args.landmarks)
+        source['hands'] = os.path.basename(args.landmarks)
+    elif args.video:
+        stream = None
+        source['hands'] = 'mediapipe'
+    else:
+        stream = make_landmark_stream(total, hands=args.hands, seed=args.seed, width=width, height=height)
+        source.update({'hands': 'synthetic', 'hand_count': args.hands, 'seed': args.seed})
+        if args.save_landmarks:
+            save_session(args.save_landmarks, stream)
+    fixture = Fixture(frames, stream, source)
+
+    print("=" * 72)
+    print(f"⏱️  PIPELINE BENCHMARK - {args.frames} frames {width}x{height}, fixture {source}")
+    print("=" * 72)
+    print(f"{'scenario':<15} {'fps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'heap peak KB':>13}")
+
+    scenarios = {}
+    for name in args.scenarios:
+        result = run_scenario(name, fixture, args.frames, args.warmup, args.memory_frames, args.viewers)
+        scenarios[name] = result
+        latency = result['latency_ms']
+        print(f"{name:<15} {result['fps']:>10.1f} {latency['p50']:>9.3f} {latency['p95']:>9.3f} "
+              f"{latency['p99']:>9.3f} {result['memory']['python_peak_kb']:>13.1f}")
+
+    if 'video_handler' in scenarios:
+        print("\nVideoHandler stages (ms):")
+        for stage, stats in scenarios['video_handler']['stages_ms'].items():
+            print(f"  {stage:<10} p50 {stats['p50']:>8.3f}  p95 {stats['p95']:>8.3f}  p99 {stats['p99']:>8.3f}")
+    print(f"\nPeak RSS: {_peak_rss_mb()} MB")
+
+    commit, dirty = _git_commit()
+    results = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'frames': args.frames,
+            'resolution': [width, height],
+            'fixture': source
+        },
+        'scenarios': scenarios
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'local'}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Replay Regression Check
+Replays a recording through the whole video pipeline and compares the drawing
+
+Usage:
+    python benchmarks/replay_regression.py recordings/demo.npz --save-reference demo.json
+    python benchmarks/replay_regression.py recordings/demo.npz --reference demo.json
+    python benchmarks/replay_regression.py --synthetic 600 --save-reference synthetic.json
+
+Runs a landmark session (or a video file, with MediaPipe) through
+VideoHandler.process_frame of an in-process room at max speed, once, and
+collects what was drawn: the strokes (as sent to clients) and a hash of
+the canvas. --save-reference writes them to a JSON file; --reference
+compares a run against one and exits with status 1 if the drawing
+changed. Gesture holds use the recording's timestamps, so the result does
+not depend on how fast the machine is.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add backend to path (first, so the 'websocket' package is not shadowed by websocket-client)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from utils.replay_source import save_session
+from benchmarks.fixtures import make_landmark_stream
+
+
+def replay(path: str) -> dict:
+    """
+    Play a recording once through a fresh room
+
+    Returns:
+        {'frames', 'strokes' (serialized, without ids), 'canvas_md5', 'seconds'}
+    """
+    from flask import Flask
+    from flask_socketio import SocketIO
+    from websocket.room_registry import Room
+    from websocket.stroke_sync import serialize_stroke
+    from utils.file_handler import FileHandler
+
+    socketio = SocketIO(Flask(__name__), async_mode='threading')
+    room = Room('replay', socketio, FileHandler())
+    handler = room.video_handler
+    if not handler.start_camera(path, realtime=False, loop=False):
+        raise SystemExit(f"❌ Cannot replay {path}")
+
+    start = time.perf_counter()
+    frames = 0
+    while handler.process_frame():
+        frames += 1
+    seconds = time.perf_counter() - start
+    if not handler.replay_finished():
+        raise SystemExit(f"❌ Replay stopped after {frames} frames before the end of {path}")
+
+    canvas = room.state['canvas']
+    strokes = []
+    for stroke in canvas.stroke_manager.get_all_strokes():
+        data = serialize_stroke(stroke)
+        del data['id']  # Ids come from a process-wide counter
+        strokes.append(data)
+    canvas_md5 = hashlib.md5(canvas.get_canvas().tobytes()).hexdigest()
+    room.close()
+    return {'frames': frames, 'strokes': strokes, 'canvas_md5': canvas_md5, 'seconds': seconds}
+
+
+def compare(result: dict, reference: dict) -> bool:
+    """Print differences against a reference run; True if the drawing is the same"""
+    same = True
+    if result['frames'] != reference['frames']:
+        print(f"❌ Frames: {result['frames']} (reference {reference['frames']})")
+        same = False
+    if result['strokes'] != reference['strokes']:
+        print(f"❌ Strokes: {len(result['strokes'])} (reference {len(reference['strokes'])})")
+        for i, (stroke, expected) in enumerate(zip(result['strokes'], reference['strokes'])):
+            if stroke != expected:
+                print(f"   first difference at stroke {i}: {stroke['type']} with {len(stroke['points'])} points "
+                      f"(reference {expected['type']} with {len(expected['points'])} points)")
+                break
+        same = False
+    if result['canvas_md5'] != reference['canvas_md5']:
+        print("❌ Canvas pixels differ")
+        same = False
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recording and compare the drawing")
+    parser.add_argument("recording", nargs='?', help="Landmark session (.npz) or video file")
+    parser.add_argument("--synthetic", type=int, metavar="FRAMES",
+                        help="Replay a synthetic session of this many frames instead")
+    parser.add_argument("--hands", type=int, default=1, help="Hands in the synthetic session")
+    parser.add_argument("--save-reference", metavar="JSON", help="Write the result as the reference")
+    parser.add_argument("--reference", metavar="JSON", help="Compare against a saved reference")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        path = os.path.join(tempfile.mkdtemp(), 'synthetic.npz')
+        save_session(path, make_landmark_stream(args.synthetic, hands=args.hands))
+    elif args.recording:
+        path = args.recording
+    else:
+        parser.error("give a recording or --synthetic")
+
+    result = replay(path)
+    print(f"Replayed {result['frames']} frames in {result['seconds']:.1f}s "
+          f"({result['frames'] / max(result['seconds'], 1e-9):.0f} fps): "
+          f"{len(result['strokes'])} strokes, canvas {result['canvas_md5']}")
+    del result['seconds']
+
+    if args.save_reference:
+        with open(args.save_reference, 'w') as f:
+            json.dump(result, f)
+        print(f"💾 Reference saved to {args.save_reference}")
+
+    if args.reference:
+        with open(args.reference) as f:
+            reference = json.load(f)
+        if not compare(result, reference):
+            sys.exit(1)
+        print("✅ Drawing matches the reference")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Shape Recognition Micro-Benchmark
+Runs ShapeRecognizer over thousands of synthetic strokes per shape type
+
+Usage:
+    python benchmarks/shape_benchmark.py [strokes_per_shape]
+
+Exits with status 1 if a shape is recognized less often than MIN_ACCURACY
+(e.g. arrows swallowed by the line check).
+"""
+
+import os
+import sys
+import time
+from collections import Counter
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.shape_features import StrokeFeatures
+from core.shape_recognizer import ShapeRecognizer
+from benchmarks.synthetic_strokes import make_dataset
+
+# Fraction of strokes that must get their own label
+MIN_ACCURACY = {
+    'line': 0.95, 'circle': 0.95, 'arrow': 0.9, 'triangle': 0.95, 'rectangle': 0.95,
+    'square': 0.95, 'pentagon': 0.95, 'hexagon': 0.95, 'star': 0.95
+}
+
+
+def run(per_shape: int = 2000) -> bool:
+    """Benchmark every shape type, return True if all meet MIN_ACCURACY"""
+    recognizer = ShapeRecognizer(verbose=False)
+    dataset = make_dataset(per_shape)
+
+    print("=" * 72)
+    print(f"🔷 SHAPE RECOGNITION BENCHMARK - {per_shape} strokes per shape")
+    print("=" * 72)
+    print(f"{'shape':<10} {'features us':>12} {'recognize us':>13} {'strokes/s':>10} {'accuracy':>9}  labels")
+    passed = True
+
+    for shape_type, strokes in dataset.items():
+        # Feature pass alone
+        start = time.perf_counter()
+        for stroke in strokes:
+            StrokeFeatures(stroke)
+        features_time = time.perf_counter() - start
+
+        # Full recognition (feature pass + all detectors)
+        labels = Counter()
+        start = time.perf_counter()
+        for stroke in strokes:
+            shape_info = recognizer.recognize_shape(stroke)
+            labels[shape_info['type'] if shape_info else 'none'] += 1
+        recognize_time = time.perf_counter() - start
+
+        per_stroke_us = recognize_time / len(strokes) * 1e6
+        accuracy = labels[shape_type] / len(strokes)
+        ok = accuracy >= MIN_ACCURACY.get(shape_type, 0.0)
+        passed = passed and ok
+        label_text = ', '.join(f"{name}:{count}" for name, count in labels.most_common())
+        print(f"{shape_type:<10} {features_time / len(strokes) * 1e6:>12.1f} "
+              f"{per_stroke_us:>13.1f} {len(strokes) / recognize_time:>10.0f} "
+              f"{accuracy:>8.0%}{'' if ok else '❌'}  {label_text}")
+
+    print("=" * 72)
+    print("✅ All shapes meet MIN_ACCURACY" if passed else "❌ Some shapes are below MIN_ACCURACY")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000) else 1)
@@ -0,0 +1,103 @@
+"""
+Synthetic Stroke Generator
+Produces hand-drawn-looking strokes (random size, rotation and jitter)
+for benchmarking shape recognition without a camera
+"""
+
+import numpy as np
+
+SHAPE_TYPES = ['line', 'circle', 'arrow', 'triangle', 'rectangle', 'square',
+               'pentagon', 'hexagon', 'star']
+
+
+def _polyline(vertices: np.ndarray, num_points: int) -> np.ndarray:
+    """Sample num_points evenly along a polyline through vertices"""
+    segments = np.diff(vertices, axis=0)
+    lengths = np.hypot(segments[:, 0], segments[:, 1])
+    cumulative = np.concatenate([[0.0], np.cumsum(lengths)])
+    t = np.linspace(0.0, cumulative[-1], num_points)
+    x = np.interp(t, cumulative, vertices[:, 0])
+    y = np.interp(t, cumulative, vertices[:, 1])
+    return np.stack([x, y], axis=1)
+
+
+def _rotate(points: np.ndarray, angle: float) -> np.ndarray:
+    """Rotate points around the origin"""
+    c, s = np.cos(angle), np.sin(angle)
+    return points @ np.array([[c, s], [-s, c]])
+
+
+def make_stroke(shape_type: str, rng: np.random.Generator,
+                num_points: int = None, jitter: float = 2.0) -> np.ndarray:
+    """
+    Generate one synthetic stroke
+
+    Args:
+        shape_type: One of SHAPE_TYPES
+        rng: numpy random generator
+        num_points: Points in the stroke (random 40-120 if None)
+        jitter: Standard deviation of hand tremor noise in pixels
+
+    Returns:
+        (N, 2) int array of points on a 1280x720 canvas
+    """
+    if num_points is None:
+        num_points = int(rng.integers(40, 120))
+
+    size = rng.uniform(80, 250)
+    angle = rng.uniform(0, 2 * np.pi)
+
+    if shape_type == 'line':
+        local = _polyline(np.array([[-size, 0.0], [size, 0.0]]), num_points)
+
+    elif shape_type == 'circle':
+        t = np.linspace(0, 2 * np.pi, num_points)
+        local = np.stack([np.cos(t), np.sin(t)], axis=1) * size
+
+    elif shape_type == 'arrow':
+        barb = size * 0.3
+        vertices = np.array([
+            [-size, 0.0], [size, 0.0],
+            [size - barb, barb], [size, 0.0],
+            [size - barb, -barb]
+        ])
+        local = _polyline(vertices, num_points)
+
+    elif shape_type in ('triangle', 'pentagon', 'hexagon'):
+        sides = {'triangle': 3, 'pentagon': 5, 'hexagon': 6}[shape_type]
+        t = np.arange(sides + 1) * 2 * np.pi / sides + np.pi / 2
+        local = _polyline(np.stack([np.cos(t), np.sin(t)], axis=1) * size, num_points)
+
+    elif shape_type == 'star':
+        t = np.arange(11) * np.pi / 5 + np.pi / 2
+        radii = np.where(np.arange(11) % 2 == 0, 1.0, 0.4)
+        local = _polyline(np.stack([np.cos(t), np.sin(t)], axis=1) * (radii * size)[:, None], num_points)
+
+    elif shape_type in ('rectangle', 'square'):
+        height = size if shape_type == 'square' else size * rng.uniform(0.35, 0.6)
+        vertices = np.array([
+            [-size, -height], [size, -height], [size, height],
+            [-size, height], [-size, -height]
+        ]) / 2
+        local = _polyline(vertices, num_points)
+
+    else:
+        raise ValueError(f"Unknown shape type: {shape_type}")
+
+    points = _rotate(local, angle) + np.array([640.0, 360.0])
+    points += rng.normal(0.0, jitter, points.shape)
+    return points.round().astype(int)
+
+
+def make_dataset(per_shape: int, seed: int = 0) -> dict:
+    """
+    Generate per_shape strokes for every shape type
+
+    Returns:
+        dict: {shape_type: [stroke, ...]}
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        shape_type: [make_stroke(shape_type, rng) for _ in range(per_shape)]
+        for shape_type in SHAPE_TYPES
+    }
@@ -10,10 +10,15 @@ CAMERA_WIDTH = 1280
 CAMERA_HEIGHT = 720
 CAMERA_FPS = 30
 
+# Replay instead of a live camera (no hardware needed)
+CAMERA_SOURCE = 0             # Camera index, or a video file / recorded session (.npz) in REPLAY_FOLDER
+REPLAY_FOLDER = "recordings"  # Replayable files and recorded sessions
+REPLAY_LOOP = True            # Start a replay over when it ends
+
 # ============================================
 # MEDIAPIPE HAND TRACKING SETTINGS
 # ============================================
-MAX_NUM_HANDS = 1  # Track only one hand
+MAX_NUM_HANDS = 2  # Hands tracked at once (each draws its own strokes with its own color)
 MIN_DETECTION_CONFIDENCE = 0.7  # Higher = more strict detection
 MIN_TRACKING_CONFIDENCE = 0.7   # Higher = smoother tracking
 
@@ -100,6 +105,22 @@ GESTURE_PREV_COLOR = 4  # 4 fingers
 GESTURE_ERASE = 0       # Fist (0 fingers)
 GESTURE_PAUSE = 5       # 5 fingers (all)
 
+# Gesture -> action table (actions: 'draw', 'erase', 'idle', 'pause', 'next_color', 'prev_color')
+GESTURE_ACTIONS = {
+    GESTURE_ERASE: 'erase',
+    GESTURE_DRAW: 'draw',
+    GESTURE_STOP: 'idle',
+    GESTURE_NEXT_COLOR: 'next_color',
+    GESTURE_PREV_COLOR: 'prev_color',
+    GESTURE_PAUSE: 'pause'
+}
+GESTURE_HOLD_ACTIONS = ('next_color', 'prev_color')  # Fire once after GESTURE_HOLD_TIME
+
+# Finger state smoothing (stops half-bent fingers from flickering the gesture)
+FINGER_STATE_SMOOTHING = True  # Hysteresis + voting (False = raw single-frame count)
+FINGER_HYSTERESIS = 0.1        # Margin a finger must pass to flip, as a fraction of hand size
+FINGER_VOTE_FRAMES = 3         # Majority vote over this many frames
+
 # ============================================
 # SHAPE RECOGNITION SETTINGS - MORE SHAPES!
 # ============================================
@@ -107,9 +128,16 @@ MIN_POINTS_FOR_SHAPE = 10  # Minimum points needed to recognize a shape
 
 # Circle detection
 CIRCLE_STD_THRESHOLD = 0.25  # Stricter: 25% variance allowed
+CIRCLE_CLEAR_STD_THRESHOLD = 0.035  # Rounder than any polygon: accepted before the template bank
+CIRCLE_MAX_BOX_FILL = 0.84  # Circles fill ~0.785 (pi/4) of their bounding box, rectangles 0.86+
+
+# Line detection (perpendicular distance to the fitted line)
+LINE_ERROR_THRESHOLD = 20     # pixels
+LINE_ERROR_RATIO = 0.012      # ...and at most this fraction of the stroke length
 
-# Line detection
-LINE_ERROR_THRESHOLD = 20  # pixels
+# Arrow detection (straight shaft + head that bends one end away from the line)
+ARROW_MAX_LINE_ERROR_RATIO = 0.03  # Whole-stroke line error vs stroke length (more = too curved)
+ARROW_HEAD_MIN_ERROR_RATIO = 0.01  # Line error of the head end vs stroke length
 
 # Polygon approximation
 POLYGON_EPSILON = 0.03  # More accurate
@@ -127,6 +155,22 @@ HEXAGON_SIDE_VARIANCE = 0.25  # 25% variance allowed
 STAR_INNER_OUTER_RATIO = 0.4   # Ratio of inner to outer radius
 STAR_RATIO_VARIANCE = 0.3      # Allowed variance
 
+# Template matching ($1-style) - recognizes any shape with a template
+SHAPE_TEMPLATES_ENABLED = True
+SHAPE_TEMPLATE_FILE = None       # Optional JSON file with extra templates
+TEMPLATE_RESAMPLE_POINTS = 64    # Points each stroke/template is resampled to
+TEMPLATE_MIN_SCORE = 0.985       # Match score (0-1) needed to accept a template
+
+# Batch recognition ("perfect all shapes")
+SHAPE_BATCH_POOL_MIN_STROKES = 256  # Use a process pool from this many strokes
+SHAPE_BATCH_WORKERS = None         # Pool size (None = number of CPU cores)
+
+# Rasterised shape sprites kept for canvas redraws (LRU)
+SHAPE_SPRITE_CACHE_SIZE = 256
+
+# Live shape suggestion while drawing (sent over the 'shape_suggestion' socket event)
+LIVE_SHAPE_SUGGESTIONS = True
+
 # ============================================
 # FILL TOOL SETTINGS (NEW!)
 # ============================================
@@ -141,6 +185,22 @@ IMAGE_MAX_WIDTH = 800          # Max width for imported images
 IMAGE_MAX_HEIGHT = 600         # Max height for imported images
 IMAGE_OPACITY = 0.7            # Opacity when overlaying image (0-1)
 
+# ============================================
+# TEXT RECOGNITION (OCR) SETTINGS
+# ============================================
+OCR_SAVE_DEBUG_IMAGE = False                    # Write preprocessed image on every OCR call
+OCR_DEBUG_IMAGE_PATH = "preprocessed_for_ocr.png"
+OCR_WORKERS = None                              # OCR worker processes (None = number of CPU cores)
+OCR_MAX_PENDING = 4                             # Requests queued before new ones are rejected
+OCR_REQUEST_TIMEOUT = 30                        # Seconds /api/recognize-text waits for a result
+OCR_BINARY_THRESHOLD = 50                       # Threshold on the inverted canvas (ink -> black)
+OCR_SCALE = 2                                   # Upscale factor for text regions
+OCR_REGION_MERGE_KERNEL = (25, 9)               # (width, height) dilation joining letters into words
+OCR_REGION_PADDING = 10                         # White margin kept around each text region
+OCR_REGION_MIN_AREA = 50                        # Ignore ink blobs smaller than this (pixels)
+OCR_PARALLEL_REGIONS = True                     # OCR regions in parallel threads
+OCR_REGION_CACHE_SIZE = 512                     # Cached region results (reused while a region's strokes are unchanged)
+
 # ============================================
 # UNDO/REDO SETTINGS
 # ============================================
@@ -219,3 +279,44 @@ KEY_SHORTCUTS = {
 # WEBSOCKET SETTINGS
 # ============================================
 FRAME_ENCODE_QUALITY = 80  # JPEG quality (1-100)
+
+# Viewer quality tiers - each frame is encoded once per tier that has viewers
+VIDEO_QUALITY_TIERS = {
+    'high': {'quality': FRAME_ENCODE_QUALITY, 'scale': 1.0},
+    'medium': {'quality': 60, 'scale': 0.75},
+    'low': {'quality': 40, 'scale': 0.5}
+}
+VIDEO_DEFAULT_TIER = 'high'
+VIDEO_MAX_IN_FLIGHT = 4  # Unacknowledged frames before a slow viewer skips frames (~130 ms RTT at 30 fps)
+VIDEO_ACK_TIMEOUT = 1.0  # Seconds without an ack before in-flight frames count as lost
+
+# Stroke delta stream ('stroke_delta' events - clients can render the board themselves)
+STROKE_SYNC_TAIL = 512               # Recent stroke events kept for late joiners / reconnects
+STROKE_SYNC_SNAPSHOT_INTERVAL = 256  # Events between board snapshot rebuilds
+
+# ============================================
+# SERVER SETTINGS
+# ============================================
+# 'threading' (one OS thread per client), or 'eventlet' / 'gevent' (green threads,
+# many clients per OS thread - start with run_server.py, which sets this)
+SERVER_ASYNC_MODE = 'threading'
+
+# Video pipeline latency metrics (GET /metrics, 'debug_metrics' event)
+METRICS_WINDOW = 900               # Frames per rolling percentile window (~30s at 30 FPS)
+METRICS_DEBUG_INTERVAL = 1.0       # Seconds between 'debug_metrics' pushes to subscribed clients
+
+# Admin endpoints (POST /admin/profile) - disabled while no token is set
+ADMIN_TOKEN = None                 # Sent by admins as the X-Admin-Token header
+PROFILE_DEFAULT_SECONDS = 10       # Capture length when the request does not give one
+PROFILE_MAX_SECONDS = 60           # Longest capture (the request waits for it)
+PROFILE_SAMPLE_INTERVAL = 0.005    # Seconds between stack samples ('sample' mode)
+PROFILE_TOP_N = 40                 # Functions / source lines in text reports
+
+# ============================================
+# ROOM SETTINGS (independent whiteboards in one process)
+# ============================================
+DEFAULT_ROOM = "default"   # Room used when a client does not name one
+MAX_ROOMS = 8              # Rooms at once (each has its own canvas, hand tracker and camera)
+ROOM_IDLE_TIMEOUT = 600    # Seconds an empty room is kept before it is evicted
+ROOM_SWEEP_INTERVAL = 60   # Seconds between idle-room checks
+ROOM_CLOSE_TIMEOUT = 5.0   # Seconds an evicted room waits for its video loop to stop
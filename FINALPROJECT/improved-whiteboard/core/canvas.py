@@ -1,15 +1,30 @@
 """
 Canvas Management Module
 Handles drawing canvas with stroke-based rendering
+
+Thread safety: the video thread draws while HTTP/socket threads undo,
+clear or perfect shapes. Every change to strokes or pixels happens under
+self.lock. Full redraws render into a back buffer WITHOUT the lock and
+swap it in, so the video thread never waits for a redraw, and the image
+returned by get_canvas() is never cleared or half-redrawn underneath a
+reader - reading it needs no lock.
 """
 
+import itertools
+import threading
 import cv2
 import numpy as np
 from typing import Tuple, Optional
 from .stroke_manager import StrokeManager, Stroke
 from .shape_recognizer import ShapeRecognizer
+from .incremental_shape_recognizer import IncrementalShapeRecognizer
+from .shape_cache import ShapeSpriteCache
 import config
 
+# Canvas versions come from one process-wide counter, so a version also tells
+# WHICH canvas it belongs to (OCR workers serve every room and memoise by version)
+_versions = itertools.count(1)
+
 class Canvas:
     def __init__(self, width: int, height: int):
         """
@@ -26,11 +41,37 @@ class Canvas:
         # Stroke management
         self.stroke_manager = StrokeManager()
         self.shape_recognizer = ShapeRecognizer()
+        self.live_recognizers = {}  # Hand id -> live shape recognizer
+        self.sprite_cache = ShapeSpriteCache()
+        
+        # Drawing state (hand id -> last point of that hand's stroke)
+        self.prev_points = {}
+        
+        # Changes on every pixel change (lets OCR etc. skip work on an unchanged canvas)
+        self.version = next(_versions)
         
-        # Drawing state
-        self.prev_point = None
+        # Guards strokes, pixels and drawing state (re-entrant: drawing calls nest)
+        self.lock = threading.RLock()
+        
+        # Bumped when the stroke list changes (a redraw started before is out of date)
+        self._generation = 0
+        
+        # One redraw at a time (the sprite cache is not shared between threads)
+        self._render_lock = threading.Lock()
+    
+    @property
+    def prev_point(self) -> Optional[Tuple[int, int]]:
+        """Last point of the first hand's stroke"""
+        return self.prev_points.get(0)
     
-    def start_drawing(self, x: int, y: int, color: Tuple[int, int, int], thickness: int, mode: str):
+    def _live_recognizer(self, hand_id: int) -> IncrementalShapeRecognizer:
+        """Live shape recognizer of one hand"""
+        if hand_id not in self.live_recognizers:
+            self.live_recognizers[hand_id] = IncrementalShapeRecognizer()
+        return self.live_recognizers[hand_id]
+    
+    def start_drawing(self, x: int, y: int, color: Tuple[int, int, int], thickness: int, mode: str,
+                      hand_id: int = 0):
         """
         Start a new drawing stroke
         
@@ -39,13 +80,22 @@ class Canvas:
             color: BGR color
             thickness: Brush thickness
             mode: 'draw' or 'erase'
+            hand_id: Hand drawing the stroke
         """
         stroke_type = 'erase' if mode == 'erase' else 'line'
-        self.stroke_manager.start_new_stroke(color, thickness, stroke_type)
-        self.stroke_manager.add_point_to_current_stroke(x, y)
-        self.prev_point = (x, y)
+        with self.lock:
+            self.stroke_manager.start_new_stroke(color, thickness, stroke_type, hand_id)
+            self.stroke_manager.add_point_to_current_stroke(x, y, hand_id)
+            self.prev_points[hand_id] = (x, y)
+            
+            # Live shape suggestion (only for drawing strokes)
+            live_recognizer = self._live_recognizer(hand_id)
+            live_recognizer.reset()
+            if stroke_type == 'line':
+                live_recognizer.add_point(x, y)
     
-    def continue_drawing(self, x: int, y: int, color: Tuple[int, int, int], thickness: int, mode: str):
+    def continue_drawing(self, x: int, y: int, color: Tuple[int, int, int], thickness: int, mode: str,
+                         hand_id: int = 0):
         """
         Continue current drawing stroke
         
@@ -54,27 +104,50 @@ class Canvas:
             color: BGR color
             thickness: Brush thickness
             mode: 'draw' or 'erase'
+            hand_id: Hand drawing the stroke
         """
-        if self.prev_point is None:
-            self.start_drawing(x, y, color, thickness, mode)
-            return
-        
-        # Add point to current stroke
-        self.stroke_manager.add_point_to_current_stroke(x, y)
+        with self.lock:
+            prev_point = self.prev_points.get(hand_id)
+            if prev_point is None:
+                self.start_drawing(x, y, color, thickness, mode, hand_id)
+                return
+            
+            # Add point to current stroke
+            self.stroke_manager.add_point_to_current_stroke(x, y, hand_id)
+            if mode != 'erase':
+                self._live_recognizer(hand_id).add_point(x, y)
+            
+            # Draw line on canvas immediately (for real-time feedback)
+            if mode == 'erase':
+                cv2.line(self.canvas, prev_point, (x, y), (0, 0, 0), thickness)
+            else:
+                cv2.line(self.canvas, prev_point, (x, y), color, thickness)
+            self.version = next(_versions)
+            
+            self.prev_points[hand_id] = (x, y)
+    
+    def stop_drawing(self, hand_id: int = 0):
+        """Stop current drawing stroke of a hand"""
+        with self.lock:
+            if self.prev_points.pop(hand_id, None) is not None:
+                self.stroke_manager.complete_current_stroke(hand_id)
+                self._live_recognizer(hand_id).reset()
+                self._generation += 1
+    
+    def get_live_shape_suggestion(self, hand_id: int = 0):
+        """
+        Get shape suggestion for the stroke currently being drawn
         
-        # Draw line on canvas immediately (for real-time feedback)
-        if mode == 'erase':
-            cv2.line(self.canvas, self.prev_point, (x, y), (0, 0, 0), thickness)
-        else:
-            cv2.line(self.canvas, self.prev_point, (x, y), color, thickness)
+        Args:
+            hand_id: Hand drawing the stroke
         
-        self.prev_point = (x, y)
-    
-    def stop_drawing(self):
-        """Stop current drawing stroke"""
-        if self.prev_point is not None:
-            self.stroke_manager.complete_current_stroke()
-            self.prev_point = None
+        Returns:
+            Shape info dict (line or circle) or None
+        """
+        with self.lock:
+            if not config.LIVE_SHAPE_SUGGESTIONS or hand_id not in self.prev_points:
+                return None
+            return self._live_recognizer(hand_id).get_suggestion()
     
     def apply_shape_recognition(self):
         """
@@ -84,16 +157,17 @@ class Canvas:
         Returns:
             bool: True if shape recognized and replaced, False otherwise
         """
-        last_stroke = self.stroke_manager.get_last_completed_stroke()
-        
-        if last_stroke is None or len(last_stroke.points) < config.MIN_POINTS_FOR_SHAPE:
-            print("⚠️ No stroke to recognize")
-            return False
-        
-        # Get points as numpy array
-        points = last_stroke.get_numpy_points()
+        with self.lock:
+            last_stroke = self.stroke_manager.get_last_completed_stroke()
+            
+            if last_stroke is None or len(last_stroke.points) < config.MIN_POINTS_FOR_SHAPE:
+                print("⚠️ No stroke to recognize")
+                return False
+            
+            # Get points as numpy array
+            points = last_stroke.get_numpy_points()
         
-        # Recognize shape
+        # Recognize shape (without the lock - drawing continues meanwhile)
         shape_info = self.shape_recognizer.recognize_shape(points)
         
         if shape_info is None:
@@ -104,14 +178,64 @@ class Canvas:
         shape_stroke.shape_info = shape_info  # Store shape info
         shape_stroke.complete()
         
-        # Replace last stroke with shape stroke
-        self.stroke_manager.replace_last_stroke_with_shape(shape_stroke)
+        with self.lock:
+            # Another stroke was finished (or this one undone) while recognizing
+            if self.stroke_manager.get_last_completed_stroke() is not last_stroke:
+                return False
+            
+            # Replace last stroke with shape stroke
+            self.stroke_manager.replace_last_stroke_with_shape(shape_stroke)
+            self._generation += 1
         
         # Redraw entire canvas
         self._redraw_canvas()
         
         return True
     
+    def apply_shape_recognition_all(self) -> int:
+        """
+        Apply shape recognition to every freehand stroke on the board
+        All replacements are applied together, then the canvas is redrawn once
+        
+        Returns:
+            int: Number of strokes converted to perfect shapes
+        """
+        with self.lock:
+            candidates = [
+                stroke for stroke in self.stroke_manager.get_unrecognized_strokes()
+                if len(stroke.points) >= config.MIN_POINTS_FOR_SHAPE
+            ]
+        
+        if not candidates:
+            print("⚠️ No strokes to recognize")
+            return 0
+        
+        # Recognize all strokes in one batch (without the lock - completed strokes never change)
+        results = self.shape_recognizer.recognize_shapes(
+            [stroke.get_numpy_points() for stroke in candidates]
+        )
+        
+        replacements = {}
+        for stroke, shape_info in zip(candidates, results):
+            if shape_info is None:
+                continue
+            shape_stroke = Stroke(stroke.color, stroke.thickness, 'shape')
+            shape_stroke.shape_info = shape_info
+            shape_stroke.complete()
+            replacements[stroke] = shape_stroke
+        
+        if replacements:
+            with self.lock:
+                # Skip strokes undone or cleared while recognizing
+                on_board = set(self.stroke_manager.get_all_strokes())
+                replacements = {stroke: shape for stroke, shape in replacements.items() if stroke in on_board}
+                self.stroke_manager.replace_strokes_with_shapes(replacements)
+                self._generation += 1
+            self._redraw_canvas()
+        
+        print(f"✨ Converted {len(replacements)}/{len(candidates)} strokes to perfect shapes")
+        return len(replacements)
+    
     def undo(self) -> bool:
         """
         Undo last stroke
@@ -119,7 +243,9 @@ class Canvas:
         Returns:
             bool: True if successful
         """
-        success = self.stroke_manager.undo()
+        with self.lock:
+            success = self.stroke_manager.undo()
+            self._generation += 1
         if success:
             self._redraw_canvas()
         return success
@@ -131,49 +257,79 @@ class Canvas:
         Returns:
             bool: True if successful
         """
-        success = self.stroke_manager.redo()
+        with self.lock:
+            success = self.stroke_manager.redo()
+            self._generation += 1
         if success:
             self._redraw_canvas()
         return success
     
     def clear(self):
         """Clear entire canvas"""
-        self.canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-        self.stroke_manager.clear_all()
-        self.prev_point = None
+        with self.lock:
+            self.canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+            self.version = next(_versions)
+            self._generation += 1
+            self.stroke_manager.clear_all()
+            self.prev_points = {}
+            for live_recognizer in self.live_recognizers.values():
+                live_recognizer.reset()
     
     def _redraw_canvas(self):
-        """Redraw entire canvas from stroke history"""
-        # Clear canvas
-        self.canvas = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-        
-        # Redraw all strokes
-        for stroke in self.stroke_manager.get_all_strokes():
-            if hasattr(stroke, 'shape_info'):
-                # It's a perfect shape
-                self.shape_recognizer.draw_perfect_shape(
-                    self.canvas,
-                    stroke.shape_info,
-                    stroke.color,
-                    stroke.thickness
-                )
-            else:
-                # It's a regular stroke - draw lines between points
-                points = stroke.get_points()
-                if len(points) < 2:
-                    continue
+        """
+        Redraw entire canvas from stroke history
+        
+        Renders into a back buffer without holding self.lock (the video thread
+        keeps drawing), then swaps it in. Strokes still being drawn are added
+        at the swap; if a stroke was finished, undone etc. during rendering,
+        rendering starts over.
+        """
+        with self._render_lock:
+            while True:
+                with self.lock:
+                    strokes = list(self.stroke_manager.get_all_strokes())
+                    generation = self._generation
+                
+                back = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+                for stroke in strokes:
+                    self._draw_stroke(back, stroke)
                 
-                for i in range(len(points) - 1):
-                    pt1 = points[i]
-                    pt2 = points[i + 1]
+                with self.lock:
+                    if generation != self._generation:
+                        continue
                     
-                    if stroke.stroke_type == 'erase':
-                        cv2.line(self.canvas, pt1, pt2, (0, 0, 0), stroke.thickness)
-                    else:
-                        cv2.line(self.canvas, pt1, pt2, stroke.color, stroke.thickness)
+                    for stroke in self.stroke_manager.current_strokes.values():
+                        self._draw_stroke(back, stroke)
+                    self.canvas = back
+                    self.version = next(_versions)
+                    return
+    
+    def _draw_stroke(self, image: np.ndarray, stroke: Stroke):
+        """Draw one stroke onto an image"""
+        if hasattr(stroke, 'shape_info'):
+            # It's a perfect shape - blit cached sprite
+            self.sprite_cache.draw(
+                image,
+                stroke.shape_info,
+                stroke.color,
+                stroke.thickness,
+                self.shape_recognizer.draw_perfect_shape
+            )
+            return
+        
+        # It's a regular stroke - draw lines between points
+        points = stroke.get_points()
+        color = (0, 0, 0) if stroke.stroke_type == 'erase' else stroke.color
+        for i in range(len(points) - 1):
+            cv2.line(image, points[i], points[i + 1], color, stroke.thickness)
     
     def get_canvas(self) -> np.ndarray:
-        """Get current canvas image"""
+        """
+        Get current canvas image (no lock needed)
+        
+        Redraws and clears swap in a new image instead of changing this one;
+        only the video thread's own drawing writes into it.
+        """
         return self.canvas
     
     def can_undo(self) -> bool:
@@ -195,7 +351,9 @@ class Canvas:
             bool: True if successful
         """
         try:
-            cv2.imwrite(filepath, self.canvas)
+            with self.lock:
+                image = self.canvas.copy()
+            cv2.imwrite(filepath, image)
             print(f"💾 Saved canvas to: {filepath}")
             return True
         except Exception as e:
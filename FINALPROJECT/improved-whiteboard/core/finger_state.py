@@ -0,0 +1,109 @@
+"""
+Finger State Classification Module
+Stable finger up/down states with hysteresis and N-frame voting
+
+Single-frame comparisons (tip above PIP, thumb tip left of IP) flicker when
+a finger is half bent, and every flicker changes the gesture, which ends
+strokes and adds history entries. Here each finger needs a clear margin
+(relative to hand size) to change state, and the reported state is the
+majority over the last few frames. All hands are processed in one batch.
+"""
+
+import numpy as np
+from typing import List, Tuple
+import config
+
+# Landmark indices (MediaPipe HandLandmark)
+_WRIST, _MIDDLE_MCP = 0, 9
+_TIPS = np.array([4, 8, 12, 16, 20])  # Thumb, index, middle, ring, pinky
+_JOINTS = np.array([3, 6, 10, 14, 18])  # Thumb IP, then PIP of the other fingers
+
+
+class FingerStateClassifier:
+    def __init__(self, max_hands: int = config.MAX_NUM_HANDS,
+                 hysteresis: float = config.FINGER_HYSTERESIS,
+                 vote_frames: int = config.FINGER_VOTE_FRAMES):
+        """
+        Initialize classifier
+
+        Args:
+            max_hands: Number of hand ids (0 .. max_hands-1)
+            hysteresis: Margin (fraction of hand size) a finger must pass to flip state
+            vote_frames: Frames in the majority vote (1 = no voting)
+        """
+        self.hysteresis = hysteresis
+        self.vote_frames = max(1, vote_frames)
+
+        self.states = np.zeros((max_hands, 5), dtype=bool)  # After hysteresis
+        self.history = np.zeros((max_hands, self.vote_frames, 5), dtype=bool)
+        self.cursor = np.zeros(max_hands, dtype=int)  # Next history slot per hand
+        self.counts = np.zeros(max_hands, dtype=int)  # Confirmed finger counts
+        self.active = np.zeros(max_hands, dtype=bool)  # Hand seen last frame
+
+    @staticmethod
+    def raw_signals(landmarks: np.ndarray) -> np.ndarray:
+        """
+        How far each finger is extended, in units of hand size
+
+        Args:
+            landmarks: (hands, 21, 3) normalized landmarks
+
+        Returns:
+            (hands, 5) array - positive = up, negative = down
+        """
+        scale = np.linalg.norm(landmarks[:, _MIDDLE_MCP, :2] - landmarks[:, _WRIST, :2], axis=1)
+        scale = np.maximum(scale, 1e-6)[:, None]
+
+        # Thumb: tip to the left of IP joint (right hand); fingers: tip above PIP
+        signals = landmarks[:, _JOINTS, 1] - landmarks[:, _TIPS, 1]
+        signals[:, 0] = landmarks[:, _JOINTS[0], 0] - landmarks[:, _TIPS[0], 0]
+        return signals / scale
+
+    def update(self, landmarks: np.ndarray, hand_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Add one frame of landmarks
+
+        Args:
+            landmarks: (hands, 21, 3) normalized landmarks
+            hand_ids: Hand id of every row
+
+        Returns:
+            (counts, changed): (hands,) confirmed finger counts and whether
+            each hand's count changed this frame
+        """
+        ids = np.asarray(hand_ids, dtype=int)
+        seen = np.zeros_like(self.active)
+        seen[ids] = True
+
+        # Hands that left the view start fresh when they come back
+        self.active &= seen
+
+        if len(ids) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=bool)
+
+        signals = self.raw_signals(landmarks)
+        new = ~self.active[ids]
+
+        # Hysteresis: flip only when clearly past the threshold
+        states = self.states[ids]
+        states = np.where(signals > self.hysteresis, True,
+                          np.where(signals < -self.hysteresis, False, states))
+        # New hands have no previous state - use the plain sign
+        states[new] = signals[new] > 0
+        self.states[ids] = states
+
+        # N-frame majority vote (new hands fill their whole history)
+        self.history[ids[new]] = states[new][:, None, :]
+        self.history[ids, self.cursor[ids]] = states
+        self.cursor[ids] = (self.cursor[ids] + 1) % self.vote_frames
+        voted = self.history[ids].sum(axis=1) * 2 > self.vote_frames
+
+        counts = voted.sum(axis=1)
+        changed = new | (counts != self.counts[ids])
+        self.counts[ids] = counts
+        self.active[ids] = True
+        return counts, changed
+
+    def reset(self):
+        """Forget all hands"""
+        self.active[:] = False
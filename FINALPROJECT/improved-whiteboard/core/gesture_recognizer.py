@@ -1,94 +1,172 @@
 """
 Gesture Recognition Module
 Converts finger counts into specific actions/modes
+
+A small state machine: config.GESTURE_ACTIONS maps each finger count to an
+action, and the table is only consulted when the finger count changes (or
+while a hold action is waiting). Listeners are told about mode and color
+transitions, so nothing downstream has to poll every frame.
 """
 
 import time
+from typing import Callable, Dict, List
 import config
 
+# Actions that switch the drawing mode (the action name is the mode)
+MODE_ACTIONS = {'draw', 'erase', 'idle', 'pause'}
+
+
 class GestureRecognizer:
-    def __init__(self):
-        """Initialize gesture recognizer"""
+    def __init__(self, color_index: int = 0, hand_id: int = 0):
+        """
+        Initialize gesture recognizer
+        
+        Args:
+            color_index: Starting color in COLOR_ORDER (default first color, red)
+            hand_id: Hand this recognizer belongs to (reported in events)
+        """
+        self.hand_id = hand_id
         self.current_mode = 'idle'
-        self.current_color_index = 0  # Start with first color (red)
+        self.current_color_index = color_index % len(config.COLOR_ORDER)
+        
+        # Transition table: finger count -> (action, needs hold)
+        self.transitions = {
+            finger_count: (action, action in config.GESTURE_HOLD_ACTIONS)
+            for finger_count, action in config.GESTURE_ACTIONS.items()
+        }
         
-        # Gesture timing
+        # One-shot actions (everything that is not a mode)
+        self.commands = {
+            'next_color': self._next_color,
+            'prev_color': self._prev_color
+        }
+        
+        # Gesture state
         self.last_gesture = None
+        self.pending_action = None  # Hold action waiting for GESTURE_HOLD_TIME
         self.gesture_start_time = None
-        self.gesture_confirmed = False
+        
+        # Mode/color change listeners
+        self.listeners: List[Callable[[Dict], None]] = []
+        
+        # Result dict reused every frame
+        self._result = {'mode': self.current_mode, 'action': None, 'color_changed': False}
+    
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """
+        Register a callback for mode/color transitions
+        
+        Args:
+            listener: Called with {'type': 'mode_changed' or 'color_changed',
+                      'hand_id', 'mode', 'color', 'previous'}
+        """
+        self.listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[Dict], None]):
+        """Unregister a callback"""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+    
+    def _notify(self, event_type: str, previous):
+        """Tell all listeners about a transition"""
+        event = {
+            'type': event_type,
+            'hand_id': self.hand_id,
+            'mode': self.current_mode,
+            'color': self.get_current_color_name(),
+            'previous': previous
+        }
+        for listener in self.listeners:
+            listener(event)
     
-    def recognize_gesture(self, finger_count: int) -> dict:
+    def recognize_gesture(self, finger_count: int, timestamp: float = None) -> dict:
         """
         Convert finger count to action
         
         Args:
             finger_count: Number of fingers detected (0-5)
-            
+            timestamp: Time of the frame in seconds (None = now; replays pass the
+                       recording's time so holds fire at the same frame at any speed)
+        
         Returns:
-            dict with 'mode' and 'action' keys
+            dict with 'mode' and 'action' keys (the same dict is reused every call)
         """
-        result = {
-            'mode': self.current_mode,
-            'action': None,
-            'color_changed': False
-        }
+        result = self._result
+        result['action'] = None
+        result['color_changed'] = False
+        now = time.time() if timestamp is None else timestamp
+        
+        # Same gesture as last frame - only a waiting hold action can fire
+        if finger_count == self.last_gesture:
+            if self.pending_action is not None:
+                self._check_hold(result, now)
+            result['mode'] = self.current_mode
+            return result
         
-        # Track gesture timing for color changes
-        current_time = time.time()
-        
-        # Check if gesture changed
-        if finger_count != self.last_gesture:
-            self.last_gesture = finger_count
-            self.gesture_start_time = current_time
-            self.gesture_confirmed = False
-        
-        # Check if gesture held long enough
-        if self.gesture_start_time:
-            hold_duration = current_time - self.gesture_start_time
-            if hold_duration >= config.GESTURE_HOLD_TIME and not self.gesture_confirmed:
-                self.gesture_confirmed = True
-        
-        # Map finger counts to modes/actions
-        if finger_count == config.GESTURE_ERASE:  # 0 fingers (fist)
-            self.current_mode = 'erase'
-            result['mode'] = 'erase'
-        
-        elif finger_count == config.GESTURE_DRAW:  # 1 finger
-            self.current_mode = 'draw'
-            result['mode'] = 'draw'
-        
-        elif finger_count == config.GESTURE_STOP:  # 2 fingers
-            self.current_mode = 'idle'
-            result['mode'] = 'idle'
-        
-        elif finger_count == config.GESTURE_NEXT_COLOR:  # 3 fingers
-            if self.gesture_confirmed:
-                self._next_color()
-                result['action'] = 'next_color'
-                result['color_changed'] = True
-                self.gesture_confirmed = False  # Prevent continuous triggering
-        
-        elif finger_count == config.GESTURE_PREV_COLOR:  # 4 fingers
-            if self.gesture_confirmed:
-                self._prev_color()
-                result['action'] = 'prev_color'
-                result['color_changed'] = True
-                self.gesture_confirmed = False
-        
-        elif finger_count == config.GESTURE_PAUSE:  # 5 fingers (palm)
-            self.current_mode = 'pause'
-            result['mode'] = 'pause'
+        # Gesture changed - look it up in the transition table
+        self.last_gesture = finger_count
+        self.pending_action = None
         
+        action, needs_hold = self.transitions.get(finger_count, (None, False))
+        if needs_hold:
+            # Must be held before it fires (prevents accidental triggers)
+            self.pending_action = action
+            self.gesture_start_time = now
+        elif action is not None:
+            self._run_action(action, result)
+        
+        result['mode'] = self.current_mode
         return result
     
+    def _check_hold(self, result: dict, now: float):
+        """Fire the pending hold action once it has been held long enough"""
+        if now - self.gesture_start_time < config.GESTURE_HOLD_TIME:
+            return
+        
+        action = self.pending_action
+        self.pending_action = None  # Fire once per hold
+        self._run_action(action, result)
+    
+    def _run_action(self, action: str, result: dict):
+        """Apply an action from the transition table"""
+        if action in MODE_ACTIONS:
+            self._set_mode(action)
+            return
+        
+        command = self.commands.get(action)
+        if command is None:
+            print(f"⚠️ Unknown gesture action: {action}")
+            return
+        
+        command()
+        result['action'] = action
+        result['color_changed'] = action in ('next_color', 'prev_color')
+    
+    def _set_mode(self, mode: str):
+        """Change mode (listeners are only told about real changes)"""
+        if mode == self.current_mode:
+            return
+        previous = self.current_mode
+        self.current_mode = mode
+        self._notify('mode_changed', previous)
+    
+    def _set_color_index(self, index: int):
+        """Change color (listeners are only told about real changes)"""
+        index %= len(config.COLOR_ORDER)
+        if index == self.current_color_index:
+            return
+        previous = self.get_current_color_name()
+        self.current_color_index = index
+        self._notify('color_changed', previous)
+    
     def _next_color(self):
         """Cycle to next color"""
-        self.current_color_index = (self.current_color_index + 1) % len(config.COLOR_ORDER)
+        self._set_color_index(self.current_color_index + 1)
         print(f"🎨 Color changed to: {self.get_current_color_name()}")
     
     def _prev_color(self):
         """Cycle to previous color"""
-        self.current_color_index = (self.current_color_index - 1) % len(config.COLOR_ORDER)
+        self._set_color_index(self.current_color_index - 1)
         print(f"🎨 Color changed to: {self.get_current_color_name()}")
     
     def get_current_color_name(self) -> str:
@@ -103,7 +181,7 @@ class GestureRecognizer:
     def set_color_by_name(self, color_name: str):
         """Set color by name (for keyboard shortcuts)"""
         if color_name in config.COLOR_ORDER:
-            self.current_color_index = config.COLOR_ORDER.index(color_name)
+            self._set_color_index(config.COLOR_ORDER.index(color_name))
             print(f"🎨 Color set to: {color_name}")
     
     def get_mode_display_text(self) -> str:
@@ -1,12 +1,25 @@
 """
 Hand Tracking Module
 Uses MediaPipe to detect hand landmarks and count fingers
+
+Several hands can be tracked at once. Their landmarks are kept in one
+(hands, 21, 3) array, so finger counting and tip lookup are single numpy
+operations for all hands, and every hand gets a stable id (slot) that
+follows it from frame to frame.
 """
 
 import cv2
 import mediapipe as mp
-from typing import Optional, Tuple
+import numpy as np
+from typing import List, Optional, Tuple
 import config
+from .finger_state import FingerStateClassifier
+
+# Landmark indices (MediaPipe HandLandmark)
+_THUMB_TIP, _THUMB_IP = 4, 3
+_INDEX_TIP = 8
+_FINGER_TIPS = np.array([8, 12, 16, 20])  # Index, middle, ring, pinky
+_FINGER_PIPS = np.array([6, 10, 14, 18])
 
 class HandTracker:
     def __init__(self):
@@ -23,33 +36,115 @@ class HandTracker:
         )
         
         self.hand_detected = False
-        self.landmarks = None
+        self.landmarks = None  # First hand (lowest id)
+        
+        # All detected hands, ordered by hand id
+        self.multi_landmarks = []
+        self.hand_ids = []
+        self.landmark_array = np.zeros((0, 21, 3))  # (hands, 21, xyz) normalized
+        
+        # Last index tip of each hand id (for matching hands between frames)
+        self._last_tips = {}
+        
+        # Confirmed finger counts (updated once per detect_hands call)
+        self.finger_classifier = FingerStateClassifier() if config.FINGER_STATE_SMOOTHING else None
+        self.finger_counts = np.zeros(0, dtype=int)
+        self.finger_count_changed = np.zeros(0, dtype=bool)
     
-    def detect_hand(self, frame):
+    def detect_hands(self, frame) -> int:
         """
-        Detect hand in frame and extract landmarks
+        Detect all hands in frame and extract landmarks
         
         Args:
             frame: BGR image from webcam
             
         Returns:
-            bool: True if hand detected, False otherwise
+            int: Number of hands detected
         """
         # Convert BGR to RGB (MediaPipe uses RGB)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return self.detect_hands_rgb(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    
+    def detect_hands_rgb(self, rgb_frame) -> int:
+        """
+        Detect all hands in an RGB frame (detect_hands without the colour conversion)
         
-        # Process frame
+        Args:
+            rgb_frame: RGB image
+            
+        Returns:
+            int: Number of hands detected
+        """
         results = self.hands.process(rgb_frame)
         
-        # Check if hand detected
-        if results.multi_hand_landmarks:
-            self.hand_detected = True
-            self.landmarks = results.multi_hand_landmarks[0]
-            return True
-        else:
+        hands = results.multi_hand_landmarks or []
+        if not hands:
             self.hand_detected = False
             self.landmarks = None
-            return False
+            self.multi_landmarks = []
+            self.hand_ids = []
+            self.landmark_array = np.zeros((0, 21, 3))
+            self._last_tips = {}
+            self._update_finger_counts()
+            return 0
+        
+        landmark_array = np.array([[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in hands])
+        hand_ids = self._assign_hand_ids(landmark_array[:, _INDEX_TIP, :2])
+        
+        # Order hands by id so index 0 is always the "first" hand
+        order = np.argsort(hand_ids)
+        self.hand_ids = [hand_ids[i] for i in order]
+        self.multi_landmarks = [hands[i] for i in order]
+        self.landmark_array = landmark_array[order]
+        
+        self.hand_detected = True
+        self.landmarks = self.multi_landmarks[0]
+        self._update_finger_counts()
+        return len(hands)
+    
+    def detect_hand(self, frame):
+        """
+        Detect hand in frame and extract landmarks
+        
+        Args:
+            frame: BGR image from webcam
+            
+        Returns:
+            bool: True if hand detected, False otherwise
+        """
+        return self.detect_hands(frame) > 0
+    
+    def _assign_hand_ids(self, tips: np.ndarray) -> List[int]:
+        """
+        Give each detected hand the id of the nearest hand from the last frame
+        
+        Args:
+            tips: (hands, 2) normalized index tip positions
+            
+        Returns:
+            list: Hand id (0 .. MAX_NUM_HANDS-1) for every detected hand
+        """
+        ids = [None] * len(tips)
+        free = list(range(max(config.MAX_NUM_HANDS, len(tips))))
+        
+        if self._last_tips:
+            last_ids = list(self._last_tips)
+            last = np.array([self._last_tips[i] for i in last_ids])
+            distances = np.linalg.norm(tips[:, None, :] - last[None, :, :], axis=2)
+            
+            # Greedy matching, closest pairs first
+            for flat in np.argsort(distances, axis=None):
+                hand, previous = divmod(int(flat), len(last_ids))
+                if ids[hand] is None and last_ids[previous] in free:
+                    ids[hand] = last_ids[previous]
+                    free.remove(last_ids[previous])
+        
+        # New hands take the lowest free id
+        for hand in range(len(ids)):
+            if ids[hand] is None:
+                ids[hand] = free.pop(0)
+        
+        self._last_tips = {hand_id: tip for hand_id, tip in zip(ids, tips)}
+        return ids
     
     def get_index_finger_tip(self, frame_width: int, frame_height: int) -> Optional[Tuple[int, int]]:
         """
@@ -65,14 +160,57 @@ class HandTracker:
         if not self.hand_detected or self.landmarks is None:
             return None
         
-        # Index finger tip is landmark 8
-        index_tip = self.landmarks.landmark[self.mp_hands.HandLandmark.INDEX_FINGER_TIP]
+        x, y = self.get_index_finger_tips(frame_width, frame_height)[0]
+        return (int(x), int(y))
+    
+    def get_index_finger_tips(self, frame_width: int, frame_height: int) -> np.ndarray:
+        """
+        Get index finger tip positions of all hands
         
-        # Convert normalized coordinates to pixel coordinates
-        x = int(index_tip.x * frame_width)
-        y = int(index_tip.y * frame_height)
+        Returns:
+            (hands, 2) int array of pixel coordinates (same order as hand_ids)
+        """
+        # Index finger tip is landmark 8; convert normalized coordinates to pixels
+        tips = self.landmark_array[:, _INDEX_TIP, :2] * (frame_width, frame_height)
+        return tips.astype(int)
+    
+    def _update_finger_counts(self):
+        """Classify fingers of all hands for this frame (once per frame)"""
+        if self.finger_classifier is None:
+            counts = self.count_fingers_raw()
+            self.finger_count_changed = np.ones(len(counts), dtype=bool)
+            self.finger_counts = counts
+            return
+        
+        self.finger_counts, self.finger_count_changed = self.finger_classifier.update(
+            self.landmark_array, self.hand_ids
+        )
+    
+    def count_fingers_all(self) -> np.ndarray:
+        """
+        Confirmed extended-finger count of all hands (hysteresis + voting)
+        
+        Returns:
+            (hands,) int array of fingers up (0-5), same order as hand_ids
+        """
+        return self.finger_counts
+    
+    def count_fingers_raw(self) -> np.ndarray:
+        """
+        Count extended fingers of all hands from this frame alone
         
-        return (x, y)
+        Returns:
+            (hands,) int array of fingers up (0-5), same order as hand_ids
+        """
+        lm = self.landmark_array
+        
+        # Thumb: tip to the left of IP joint (simplified check, right hand)
+        thumb_up = lm[:, _THUMB_TIP, 0] < lm[:, _THUMB_IP, 0]
+        
+        # Other four fingers: tip above PIP joint (lower y value)
+        fingers_up = lm[:, _FINGER_TIPS, 1] < lm[:, _FINGER_PIPS, 1]
+        
+        return thumb_up.astype(int) + fingers_up.sum(axis=1)
     
     def count_fingers(self) -> int:
         """
@@ -84,44 +222,7 @@ class HandTracker:
         if not self.hand_detected or self.landmarks is None:
             return 0
         
-        fingers = []
-        
-        # Thumb: Check if tip is to the left of IP joint (for right hand)
-        # This is a simplified check - works for most cases
-        thumb_tip = self.landmarks.landmark[self.mp_hands.HandLandmark.THUMB_TIP]
-        thumb_ip = self.landmarks.landmark[self.mp_hands.HandLandmark.THUMB_IP]
-        
-        if thumb_tip.x < thumb_ip.x:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-        
-        # Other four fingers: Check if tip is above PIP joint
-        finger_tips = [
-            self.mp_hands.HandLandmark.INDEX_FINGER_TIP,
-            self.mp_hands.HandLandmark.MIDDLE_FINGER_TIP,
-            self.mp_hands.HandLandmark.RING_FINGER_TIP,
-            self.mp_hands.HandLandmark.PINKY_TIP
-        ]
-        
-        finger_pips = [
-            self.mp_hands.HandLandmark.INDEX_FINGER_PIP,
-            self.mp_hands.HandLandmark.MIDDLE_FINGER_PIP,
-            self.mp_hands.HandLandmark.RING_FINGER_PIP,
-            self.mp_hands.HandLandmark.PINKY_PIP
-        ]
-        
-        for tip, pip in zip(finger_tips, finger_pips):
-            tip_landmark = self.landmarks.landmark[tip]
-            pip_landmark = self.landmarks.landmark[pip]
-            
-            # If tip is above PIP (lower y value), finger is up
-            if tip_landmark.y < pip_landmark.y:
-                fingers.append(1)
-            else:
-                fingers.append(0)
-        
-        return sum(fingers)
+        return int(self.count_fingers_all()[0])
     
     def draw_hand_skeleton(self, frame):
         """
@@ -133,10 +234,10 @@ class HandTracker:
         Returns:
             frame with hand skeleton drawn
         """
-        if self.hand_detected and self.landmarks is not None:
+        for landmarks in self.multi_landmarks:
             self.mp_drawing.draw_landmarks(
                 frame,
-                self.landmarks,
+                landmarks,
                 self.mp_hands.HAND_CONNECTIONS,
                 self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
                 self.mp_drawing.DrawingSpec(color=(255, 0, 255), thickness=2)
@@ -0,0 +1,153 @@
+"""
+Incremental Shape Recognition Module
+Live shape suggestion while the stroke is still being drawn
+
+Keeps running moment sums that are updated in O(1) per point, so a
+suggestion (line or circle) is always ready when the finger lifts.
+"""
+
+import math
+import numpy as np
+from typing import Optional, Dict
+import config
+
+# Mean |residual| of a Gaussian is sqrt(2/pi) * its RMS
+_RMS_TO_MEAN_ABS = math.sqrt(2.0 / math.pi)
+
+
+class IncrementalShapeRecognizer:
+    def __init__(self):
+        """Initialize incremental shape recognizer"""
+        self.reset()
+
+    def reset(self):
+        """Forget the current stroke"""
+        self.n = 0
+        self.origin = None      # First point - sums are kept relative to it
+        self.last_point = None
+        self.arc_length = 0.0
+
+        # Running moments of (x, y, z = x^2 + y^2) relative to origin
+        self.sx = self.sy = 0.0
+        self.sxx = self.syy = self.sxy = 0.0
+        self.sxz = self.syz = self.szz = 0.0
+
+    def add_point(self, x: int, y: int):
+        """
+        Add a point to the running statistics (O(1))
+
+        Args:
+            x, y: Point coordinates
+        """
+        if self.origin is None:
+            self.origin = (x, y)
+        else:
+            self.arc_length += math.hypot(x - self.last_point[0], y - self.last_point[1])
+        self.last_point = (x, y)
+
+        dx = float(x - self.origin[0])
+        dy = float(y - self.origin[1])
+        z = dx * dx + dy * dy
+
+        self.n += 1
+        self.sx += dx
+        self.sy += dy
+        self.sxx += dx * dx
+        self.syy += dy * dy
+        self.sxy += dx * dy
+        self.sxz += dx * z
+        self.syz += dy * z
+        self.szz += z * z
+
+    def _closure_ratio(self) -> float:
+        """Distance back to the first point, in units of average point spacing"""
+        avg_spacing = self.arc_length / (self.n - 1)
+        if avg_spacing == 0:
+            return math.inf
+        gap = math.hypot(self.last_point[0] - self.origin[0], self.last_point[1] - self.origin[1])
+        return gap / avg_spacing
+
+    def _line_suggestion(self) -> Optional[Dict]:
+        """Line from the running covariance (orientation-free, like fit_line_tls)"""
+        n = self.n
+        mx, my = self.sx / n, self.sy / n
+        cxx = self.sxx / n - mx * mx
+        cyy = self.syy / n - my * my
+        cxy = self.sxy / n - mx * my
+
+        # Minor eigenvalue of the 2x2 covariance = mean squared perpendicular error
+        half_trace = 0.5 * (cxx + cyy)
+        minor = half_trace - math.hypot(0.5 * (cxx - cyy), cxy)
+        line_error = math.sqrt(max(minor, 0.0)) * _RMS_TO_MEAN_ABS
+
+        # Same limits as ShapeRecognizer, so an arrow's shaft is not previewed as a line
+        if line_error >= config.LINE_ERROR_THRESHOLD or line_error >= self.arc_length * config.LINE_ERROR_RATIO:
+            return None
+
+        # Project first and current point onto the major axis
+        theta = 0.5 * math.atan2(2.0 * cxy, cxx - cyy)
+        ux, uy = math.cos(theta), math.sin(theta)
+        ox, oy = self.origin
+
+        def project(px, py):
+            t = (px - mx) * ux + (py - my) * uy
+            return (int(round(ox + mx + t * ux)), int(round(oy + my + t * uy)))
+
+        end_x = self.last_point[0] - ox
+        end_y = self.last_point[1] - oy
+        return {
+            'type': 'line',
+            'start': project(0.0, 0.0),
+            'end': project(end_x, end_y)
+        }
+
+    def _circle_suggestion(self) -> Optional[Dict]:
+        """Circle from an algebraic (Kasa) least squares fit of the running moments"""
+        if self._closure_ratio() > 5:  # Not closed
+            return None
+
+        # Solve x^2 + y^2 + D*x + E*y + F = 0 in the least squares sense
+        sz = self.sxx + self.syy
+        normal_matrix = np.array([
+            [self.sxx, self.sxy, self.sx],
+            [self.sxy, self.syy, self.sy],
+            [self.sx, self.sy, self.n]
+        ])
+        rhs = -np.array([self.sxz, self.syz, sz])
+        try:
+            d, e, f = np.linalg.solve(normal_matrix, rhs)
+        except np.linalg.LinAlgError:
+            return None
+
+        radius_sq = (d * d + e * e) / 4.0 - f
+        if radius_sq <= 0:
+            return None
+        radius = math.sqrt(radius_sq)
+
+        # Algebraic residual ~ 2R * (r_i - R), so radial std ~ RMS residual / 2R
+        residual_sq = self.szz + d * self.sxz + e * self.syz + f * sz
+        radial_std = math.sqrt(max(residual_sq, 0.0) / self.n) / (2.0 * radius)
+
+        # Only circles rounder than any polygon - ShapeRecognizer takes those as
+        # circles before its templates, so the preview matches the final shape
+        if radial_std >= radius * config.CIRCLE_CLEAR_STD_THRESHOLD:
+            return None
+
+        return {
+            'type': 'circle',
+            'center': (int(round(self.origin[0] - d / 2.0)), int(round(self.origin[1] - e / 2.0))),
+            'radius': int(radius)
+        }
+
+    def get_suggestion(self) -> Optional[Dict]:
+        """
+        Current best shape guess for the stroke being drawn
+
+        Returns:
+            Shape info dict (same format as ShapeRecognizer) or None
+        """
+        if self.n < config.MIN_POINTS_FOR_SHAPE:
+            return None
+
+        # Same order as ShapeRecognizer: line first, then circle
+        return self._line_suggestion() or self._circle_suggestion()
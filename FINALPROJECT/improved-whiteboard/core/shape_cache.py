@@ -0,0 +1,149 @@
+"""
+Shape Sprite Cache Module
+Caches rasterised perfect shapes so canvas redraws blit instead of re-drawing
+
+Each entry is a small colour sprite plus its mask, keyed by the shape
+geometry, colour and thickness, with least-recently-used eviction.
+"""
+
+import cv2
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Tuple
+import config
+
+# shape_info fields that describe geometry ('points' of an arrow is the raw stroke)
+_POINT_FIELDS = ('center', 'start', 'end', 'tail', 'head')
+
+
+def shape_key(shape_info: Dict) -> Tuple:
+    """
+    Hashable key describing how a shape looks
+
+    Args:
+        shape_info: Shape information from ShapeRecognizer
+
+    Returns:
+        tuple: Shape type and all geometry that affects drawing
+    """
+    key = [shape_info['type']]
+    for field in _POINT_FIELDS:
+        if field in shape_info:
+            key.append((field, tuple(int(v) for v in shape_info[field])))
+    if 'radius' in shape_info:
+        key.append(('radius', int(shape_info['radius'])))
+    if shape_info['type'] != 'arrow' and 'points' in shape_info:
+        key.append(('points', np.asarray(shape_info['points'], dtype=np.int32).tobytes()))
+        key.append(('closed', shape_info.get('closed', True)))
+    return tuple(key)
+
+
+def shape_bounds(shape_info: Dict, thickness: int) -> Tuple[int, int, int, int]:
+    """Bounding box (x_min, y_min, x_max, y_max) of everything the shape draws"""
+    coords = [np.asarray(shape_info[f], dtype=np.float64).reshape(-1, 2)
+              for f in _POINT_FIELDS if f in shape_info]
+    if shape_info['type'] != 'arrow' and 'points' in shape_info:
+        coords.append(np.asarray(shape_info['points'], dtype=np.float64).reshape(-1, 2))
+    pts = np.vstack(coords)
+
+    # Room for the radius, the line thickness and the arrow head (3x thickness)
+    pad = shape_info.get('radius', 0) + thickness * 4 + 2
+    x_min, y_min = np.floor(pts.min(axis=0) - pad).astype(int)
+    x_max, y_max = np.ceil(pts.max(axis=0) + pad).astype(int)
+    return x_min, y_min, x_max, y_max
+
+
+def _offset_shape(shape_info: Dict, dx: int, dy: int) -> Dict:
+    """Copy of shape_info moved by (dx, dy)"""
+    moved = dict(shape_info)
+    for field in _POINT_FIELDS:
+        if field in shape_info:
+            x, y = shape_info[field]
+            moved[field] = (int(x) + dx, int(y) + dy)
+    if shape_info['type'] != 'arrow' and 'points' in shape_info:
+        moved['points'] = np.asarray(shape_info['points'], dtype=np.int32) + np.array([dx, dy], dtype=np.int32)
+    return moved
+
+
+class ShapeSpriteCache:
+    def __init__(self, max_size: int = config.SHAPE_SPRITE_CACHE_SIZE):
+        """
+        Initialize sprite cache
+
+        Args:
+            max_size: Maximum number of cached sprites (LRU eviction)
+        """
+        self.max_size = max_size
+        self._sprites = OrderedDict()  # key -> (x, y, sprite, mask)
+        self.hits = 0
+        self.misses = 0
+
+    def _rasterize(self, shape_info: Dict, color: Tuple[int, int, int], thickness: int, draw_fn):
+        """Draw the shape once into a tight sprite + mask"""
+        x_min, y_min, x_max, y_max = shape_bounds(shape_info, thickness)
+        mask = np.zeros((y_max - y_min + 1, x_max - x_min + 1), dtype=np.uint8)
+
+        draw_fn(mask, _offset_shape(shape_info, -x_min, -y_min), (255, 255, 255), thickness)
+
+        # Crop to the pixels actually drawn
+        ys, xs = np.nonzero(mask)
+        if len(ys) == 0:
+            return None
+        top, bottom = ys.min(), ys.max() + 1
+        left, right = xs.min(), xs.max() + 1
+        mask = np.ascontiguousarray(mask[top:bottom, left:right])
+
+        sprite = np.empty(mask.shape + (3,), dtype=np.uint8)
+        sprite[:] = color
+        return (x_min + left, y_min + top, sprite, mask)
+
+    def draw(self, canvas: np.ndarray, shape_info: Dict, color: Tuple[int, int, int], thickness: int, draw_fn):
+        """
+        Draw shape onto canvas, rasterising it only on a cache miss
+
+        Args:
+            canvas: Image to draw on
+            shape_info: Shape information from ShapeRecognizer
+            color: BGR color
+            thickness: Line thickness
+            draw_fn: Renderer with the signature of ShapeRecognizer.draw_perfect_shape
+        """
+        # A straight line is one cheap cv2.line call, cheaper than blitting its box
+        if shape_info['type'] == 'line':
+            draw_fn(canvas, shape_info, color, thickness)
+            return
+        
+        key = (shape_key(shape_info), tuple(int(c) for c in color), int(thickness))
+
+        entry = self._sprites.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = self._rasterize(shape_info, color, thickness, draw_fn)
+            self._sprites[key] = entry
+            if len(self._sprites) > self.max_size:
+                self._sprites.popitem(last=False)
+        else:
+            self.hits += 1
+            self._sprites.move_to_end(key)
+
+        if entry is None:
+            return
+
+        # Blit sprite, clipped to the canvas
+        x, y, sprite, mask = entry
+        h, w = canvas.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + mask.shape[1], w), min(y + mask.shape[0], h)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        sx, sy = x0 - x, y0 - y
+        cv2.copyTo(
+            sprite[sy:sy + (y1 - y0), sx:sx + (x1 - x0)],
+            mask[sy:sy + (y1 - y0), sx:sx + (x1 - x0)],
+            canvas[y0:y1, x0:x1]
+        )
+
+    def clear(self):
+        """Drop all cached sprites"""
+        self._sprites.clear()
@@ -0,0 +1,101 @@
+"""
+Shape Feature Module
+Computes every stroke statistic the shape detectors need in ONE pass
+(centroid, PCA line fit, radial stats, closure, arc length, convex hull)
+"""
+
+import cv2
+import numpy as np
+from typing import Tuple
+from .line_fit import fit_line_tls
+
+
+class StrokeFeatures:
+    """Precomputed geometric features of a single stroke"""
+
+    def __init__(self, points: np.ndarray):
+        """
+        Compute stroke features
+
+        Args:
+            points: numpy array of (x, y) coordinates
+        """
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.num_points = len(self.points)
+
+        # Centroid
+        self.centroid = self.points.mean(axis=0)
+        self.centered = self.points - self.centroid
+
+        # Arc length and average spacing between samples
+        steps = np.diff(self.points, axis=0)
+        segment_lengths = np.hypot(steps[:, 0], steps[:, 1])
+        self.arc_length = float(segment_lengths.sum())
+        self.avg_segment_length = float(segment_lengths.mean()) if len(segment_lengths) else 0.0
+
+        # Closure (distance between first and last point)
+        gap = self.points[0] - self.points[-1]
+        self.closure_distance = float(np.hypot(gap[0], gap[1]))
+
+        # Radial statistics around the centroid
+        radii = np.hypot(self.centered[:, 0], self.centered[:, 1])
+        self.radial_mean = float(radii.mean())
+        self.radial_std = float(radii.std())
+
+        # PCA / total least squares line fit of the whole stroke
+        self.line_fit = fit_line_tls(self.points)
+        self.line_error = float(self.line_fit.mean_error)
+
+        # Computed on demand - only circle/polygon detection needs them
+        self._hull = None
+        self._hull_perimeter = None
+        self._box_fill = None
+
+    @property
+    def is_closed(self) -> bool:
+        """True if start and end points are close together (closed loop)"""
+        return self.closure_distance <= self.avg_segment_length * 5
+
+    @property
+    def hull(self) -> np.ndarray:
+        """Convex hull of the stroke (OpenCV contour format)"""
+        if self._hull is None:
+            self._hull = cv2.convexHull(self.points.astype(np.int32))
+        return self._hull
+
+    @property
+    def hull_perimeter(self) -> float:
+        """Perimeter of the convex hull"""
+        if self._hull_perimeter is None:
+            self._hull_perimeter = cv2.arcLength(self.hull, True)
+        return self._hull_perimeter
+
+    @property
+    def box_fill(self) -> float:
+        """
+        Hull area / area of its minimum bounding rectangle
+        (circle or ellipse ~0.785, rectangle close to 1)
+        """
+        if self._box_fill is None:
+            (_, _), (width, height), _ = cv2.minAreaRect(self.hull)
+            box_area = width * height
+            self._box_fill = cv2.contourArea(self.hull) / box_area if box_area > 0 else 0.0
+        return self._box_fill
+
+    def end_section_errors(self, count: int) -> Tuple[float, float]:
+        """
+        Line-fit error of the first and last `count` points (used for arrow heads)
+
+        Both sections are fitted together in one batched call.
+
+        Args:
+            count: Number of points in each end section
+
+        Returns:
+            (start_error, end_error), inf for sections shorter than 3 points
+        """
+        if count < 3:
+            return float('inf'), float('inf')
+        sections = np.stack([self.points[:count], self.points[-count:]])
+        start_error, end_error = fit_line_tls(sections).mean_error
+        return float(start_error), float(end_error)
@@ -2,17 +2,87 @@
 Shape Recognition Module
 AI-powered shape detection with improved algorithms
 Detects: Circle, Line, Rectangle, Triangle, Square, Arrow
++ any shape with a template (Pentagon, Hexagon, Star, ...)
 """
 
+import multiprocessing
+import os
 import cv2
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional, Dict, List, Tuple
 import config
+from .shape_features import StrokeFeatures
+from .line_fit import project_onto_line
+from .template_recognizer import TemplateRecognizer
+
+# Recognizer used inside pool worker processes (created once per worker)
+_worker_recognizer = None
+
+# Process pool for batch recognition, shared by every room (see start_batch_pool)
+_batch_pool = None
+_batch_workers = 0
+
+
+def _recognize_in_worker(points: np.ndarray) -> Optional[Dict]:
+    """Recognize one stroke inside a process pool worker"""
+    global _worker_recognizer
+    if _worker_recognizer is None:
+        _worker_recognizer = ShapeRecognizer(verbose=False)
+    return _worker_recognizer.recognize_shape(points)
+
+
+def start_batch_pool(workers: int = None):
+    """
+    Start the batch recognition process pool (once, at startup, from the main thread)
+    
+    Workers are spawned as fresh interpreters, not forked, so they never
+    inherit the server's threads, locks or green-thread hub. Until this is
+    called, recognize_shapes() runs every batch inline.
+    
+    Args:
+        workers: Pool size (None = config.SHAPE_BATCH_WORKERS, or the number of CPU cores)
+    """
+    global _batch_pool, _batch_workers
+    if _batch_pool is not None:
+        return
+    _batch_workers = workers or config.SHAPE_BATCH_WORKERS or os.cpu_count() or 1
+    _batch_pool = ProcessPoolExecutor(max_workers=_batch_workers,
+                                      mp_context=multiprocessing.get_context('spawn'))
+    # Start every worker now rather than inside the first request
+    for future in [_batch_pool.submit(int) for _ in range(_batch_workers)]:
+        future.result()
+
+
+def shutdown_batch_pool():
+    """Stop the batch recognition process pool (if started)"""
+    global _batch_pool
+    if _batch_pool is not None:
+        _batch_pool.shutdown(cancel_futures=True)
+        _batch_pool = None
+
 
 class ShapeRecognizer:
-    def __init__(self):
-        """Initialize shape recognizer"""
-        pass
+    def __init__(self, verbose: bool = True):
+        """
+        Initialize shape recognizer
+
+        Args:
+            verbose: Print detection messages (disable for benchmarks/batch use)
+        """
+        self.verbose = verbose
+        
+        # Template matcher for shapes without hand-tuned rules
+        self.template_recognizer = None
+        if config.SHAPE_TEMPLATES_ENABLED:
+            self.template_recognizer = TemplateRecognizer()
+            if config.SHAPE_TEMPLATE_FILE:
+                self.template_recognizer.load_templates(config.SHAPE_TEMPLATE_FILE)
+
+    def _log(self, message: str):
+        """Print message if verbose"""
+        if self.verbose:
+            print(message)
     
     def recognize_shape(self, points: np.ndarray) -> Optional[Dict]:
         """
@@ -25,117 +95,155 @@ class ShapeRecognizer:
             Dictionary with shape info or None if not recognized
         """
         if len(points) < config.MIN_POINTS_FOR_SHAPE:
-            print("⚠️ Not enough points for shape recognition")
+            self._log("⚠️ Not enough points for shape recognition")
             return None
         
+        # Compute all statistics once - every detector reads from this bundle
+        features = StrokeFeatures(points)
+        
         # Try to recognize different shapes in order of specificity
-        # Check line FIRST (most distinctive - low variance in one direction)
         
-        # 1. Try Line (check first - very distinctive)
-        line = self._detect_line(points)
+        # 1. Try Arrow (before line - an arrow is a line with a head)
+        arrow = self._detect_arrow(features)
+        if arrow:
+            return arrow
+        
+        # 2. Try Line (very distinctive - low variance in one direction)
+        line = self._detect_line(features)
         if line:
             return line
         
-        # 2. Try Circle (second - needs consistent radius)
-        circle = self._detect_circle(points)
+        # 3. Try a clear Circle (cheap - spares the template bank the most common shape)
+        circle = self._detect_circle(features, config.CIRCLE_CLEAR_STD_THRESHOLD)
         if circle:
             return circle
         
-        # 3. Try Arrow (before polygons)
-        arrow = self._detect_arrow(points)
-        if arrow:
-            return arrow
+        # 4. Try Templates (closest template, only if it matches very well)
+        template = self._detect_template(features)
+        if template:
+            return template
         
-        # 4. Try Polygons last (Rectangle, Square, Triangle)
-        polygon = self._detect_polygon(points)
+        # 5. Try Circle (needs consistent radius)
+        circle = self._detect_circle(features)
+        if circle:
+            return circle
+        
+        # 6. Try Polygons last (Rectangle, Square, Triangle)
+        polygon = self._detect_polygon(features)
         if polygon:
             return polygon
         
-        print("❓ Could not recognize shape")
+        self._log("❓ Could not recognize shape")
         return None
     
-    def _detect_circle(self, points: np.ndarray) -> Optional[Dict]:
+    def recognize_shapes(self, points_list: List[np.ndarray]) -> List[Optional[Dict]]:
+        """
+        Recognize many strokes at once (whole-board beautification)
+        
+        Small batches run inline; batches of at least
+        config.SHAPE_BATCH_POOL_MIN_STROKES strokes are spread over the process
+        pool (if start_batch_pool() was called).
+        
+        Args:
+            points_list: List of numpy arrays of (x, y) coordinates
+            
+        Returns:
+            List of shape info dicts (None where no shape was recognized),
+            in the same order as points_list
+        """
+        pool = _batch_pool
+        if pool is None or len(points_list) < config.SHAPE_BATCH_POOL_MIN_STROKES:
+            verbose = self.verbose
+            self.verbose = False
+            try:
+                return [self.recognize_shape(points) for points in points_list]
+            finally:
+                self.verbose = verbose
+        
+        chunksize = max(1, len(points_list) // (_batch_workers * 4))
+        return list(pool.map(_recognize_in_worker, points_list, chunksize=chunksize))
+    
+    def _detect_template(self, features: StrokeFeatures) -> Optional[Dict]:
+        """
+        Detect shape by nearest template
+        
+        Algorithm:
+        - Resample and normalise the stroke
+        - Score it against every template (all rotations/start points) at once
+        - Accept the best template if its score is high enough
+        """
+        if self.template_recognizer is None:
+            return None
+        
+        shape_info = self.template_recognizer.recognize(features.points)
+        if shape_info:
+            self._log(f"✅ Detected {shape_info['type'].upper()} (template score {shape_info['score']:.3f})")
+        return shape_info
+    
+    def _detect_circle(self, features: StrokeFeatures, std_threshold: Optional[float] = None) -> Optional[Dict]:
         """
         Detect if points form a circle
         
         Algorithm:
-        - Calculate center point (mean of all points)
-        - Calculate distance of each point from center
         - Check if start and end points are close (closed loop)
-        - If standard deviation of distances is low, it's a circle
+        - If standard deviation of distances from the centroid is low, it's a circle
+        - ...unless it fills its bounding box like a rectangle (a rounded
+          rectangle has a fairly even radius too)
+        
+        Args:
+            features: Stroke statistics
+            std_threshold: Allowed radial std as a fraction of the radius
+                           (default config.CIRCLE_STD_THRESHOLD)
         """
-        # Check if path is closed (start and end points close together)
-        start_point = points[0]
-        end_point = points[-1]
-        closure_distance = np.linalg.norm(start_point - end_point)
+        if std_threshold is None:
+            std_threshold = config.CIRCLE_STD_THRESHOLD
         
         # If not closed, probably not a circle
-        avg_point_distance = np.linalg.norm(points[1:] - points[:-1], axis=1).mean()
-        if closure_distance > avg_point_distance * 5:  # Not closed
+        if not features.is_closed:
             return None
         
-        # Calculate center
-        center = points.mean(axis=0).astype(int)
-        center_x, center_y = center[0], center[1]
-        
-        # Calculate distances from center
-        distances = np.linalg.norm(points - center, axis=1)
-        avg_distance = distances.mean()
-        std_distance = distances.std()
-        
         # Check if it's circular (low variance in distances)
-        if std_distance < avg_distance * config.CIRCLE_STD_THRESHOLD:
-            print(f"✅ Detected CIRCLE - center: ({center_x}, {center_y}), radius: {int(avg_distance)}")
+        if (features.radial_std < features.radial_mean * std_threshold
+                and features.box_fill < config.CIRCLE_MAX_BOX_FILL):
+            center_x, center_y = (int(c) for c in features.centroid)
+            radius = int(features.radial_mean)
+            self._log(f"✅ Detected CIRCLE - center: ({center_x}, {center_y}), radius: {radius}")
             return {
                 'type': 'circle',
                 'center': (center_x, center_y),
-                'radius': int(avg_distance)
+                'radius': radius
             }
         
         return None
     
-    def _detect_line(self, points: np.ndarray) -> Optional[Dict]:
+    def _detect_line(self, features: StrokeFeatures) -> Optional[Dict]:
         """
         Detect if points form a straight line
         
         Algorithm:
-        - Fit a line using linear regression
-        - Calculate error (distance from fitted line)
-        - If error is low, it's a line
+        - Use the total least squares fit (perpendicular error, works at any angle)
+        - If error is low (in pixels and relative to the stroke length), it's a line
+        - Snap the end points onto the fitted line
         """
-        if len(points) < 2:
+        if features.num_points < 2:
             return None
         
-        x = points[:, 0]
-        y = points[:, 1]
-        
-        try:
-            # Fit line using least squares
-            slope, intercept = np.polyfit(x, y, 1)
+        if (features.line_error < config.LINE_ERROR_THRESHOLD
+                and features.line_error < features.arc_length * config.LINE_ERROR_RATIO):
+            fit = features.line_fit
+            start_point = tuple(project_onto_line(fit, features.points[0]).round().astype(int))
+            end_point = tuple(project_onto_line(fit, features.points[-1]).round().astype(int))
             
-            # Calculate predicted y values
-            predicted_y = slope * x + intercept
-            
-            # Calculate mean error
-            error = np.abs(y - predicted_y).mean()
-            
-            # Check if it's a straight line
-            if error < config.LINE_ERROR_THRESHOLD:
-                start_point = tuple(points[0].astype(int))
-                end_point = tuple(points[-1].astype(int))
-                
-                print(f"✅ Detected LINE - from {start_point} to {end_point}")
-                return {
-                    'type': 'line',
-                    'start': start_point,
-                    'end': end_point
-                }
-        except:
-            pass
+            self._log(f"✅ Detected LINE - from {start_point} to {end_point}")
+            return {
+                'type': 'line',
+                'start': start_point,
+                'end': end_point
+            }
         
         return None
     
-    def _detect_polygon(self, points: np.ndarray) -> Optional[Dict]:
+    def _detect_polygon(self, features: StrokeFeatures) -> Optional[Dict]:
         """
         Detect polygons (triangle, rectangle, square)
         
@@ -144,57 +252,47 @@ class ShapeRecognizer:
         - Approximate polygon
         - Count vertices
         """
-        # Get convex hull
-        hull = cv2.convexHull(points)
+        # Approximate polygon from the (cached) convex hull
+        epsilon = config.POLYGON_EPSILON * features.hull_perimeter
+        approx = cv2.approxPolyDP(features.hull, epsilon, True)
+        if len(approx) > 4 and features.box_fill >= config.CIRCLE_MAX_BOX_FILL:
+            # Fills its bounding box like a rectangle - a wobbly side left an extra corner
+            approx = cv2.approxPolyDP(features.hull, 2 * epsilon, True)
+        points_2d = approx.reshape(-1, 2).astype(int)
         
-        # Approximate polygon
-        epsilon = config.POLYGON_EPSILON * cv2.arcLength(hull, True)
-        approx = cv2.approxPolyDP(hull, epsilon, True)
-        
-        num_vertices = len(approx)
+        num_vertices = len(points_2d)
         
         # Triangle (3 vertices)
         if num_vertices == 3:
-            print("✅ Detected TRIANGLE")
+            self._log("✅ Detected TRIANGLE")
             return {
                 'type': 'triangle',
-                'points': approx.reshape(-1, 2).astype(int)
+                'points': points_2d
             }
         
         # Rectangle or Square (4 vertices)
         elif num_vertices == 4:
             # Check if it's a square (all sides approximately equal)
-            points_2d = approx.reshape(-1, 2)
-            
-            # Calculate side lengths
-            sides = []
-            for i in range(4):
-                p1 = points_2d[i]
-                p2 = points_2d[(i + 1) % 4]
-                length = np.linalg.norm(p1 - p2)
-                sides.append(length)
-            
-            sides = np.array(sides)
-            mean_side = sides.mean()
-            std_side = sides.std()
+            edges = np.roll(points_2d, -1, axis=0) - points_2d
+            sides = np.hypot(edges[:, 0], edges[:, 1])
             
             # If all sides are similar, it's a square
-            if std_side < mean_side * config.SQUARE_SIDE_VARIANCE:
-                print("✅ Detected SQUARE")
+            if sides.std() < sides.mean() * config.SQUARE_SIDE_VARIANCE:
+                self._log("✅ Detected SQUARE")
                 return {
                     'type': 'square',
-                    'points': approx.reshape(-1, 2).astype(int)
+                    'points': points_2d
                 }
             else:
-                print("✅ Detected RECTANGLE")
+                self._log("✅ Detected RECTANGLE")
                 return {
                     'type': 'rectangle',
-                    'points': approx.reshape(-1, 2).astype(int)
+                    'points': points_2d
                 }
         
         return None
     
-    def _detect_arrow(self, points: np.ndarray) -> Optional[Dict]:
+    def _detect_arrow(self, features: StrokeFeatures) -> Optional[Dict]:
         """
         Detect arrow shape
         
@@ -202,66 +300,42 @@ class ShapeRecognizer:
         - Arrow = straight line + V-shape at one end
         - Check if points form mostly straight path with deviation at end
         """
-        if len(points) < 20:  # Need enough points
+        if features.num_points < 20:  # Need enough points
             return None
         
-        # First check if it's reasonably linear overall
-        x = points[:, 0]
-        y = points[:, 1]
+        # If not reasonably linear overall, not an arrow
+        if features.line_error > features.arc_length * config.ARROW_MAX_LINE_ERROR_RATIO:  # Too curved
+            return None
         
-        try:
-            # Fit line to all points
-            slope, intercept = np.polyfit(x, y, 1)
-            predicted_y = slope * x + intercept
-            overall_error = np.abs(y - predicted_y).mean()
-            
-            # If not reasonably linear, not an arrow
-            if overall_error > 40:  # Too curved
-                return None
-            
-            # Now check each end separately
-            # Split into three sections: start 30%, middle 40%, end 30%
-            third = len(points) // 3
-            start_section = points[:third]
-            end_section = points[-third:]
-            
-            # Check straightness of each end
-            def check_straightness(section):
-                if len(section) < 3:
-                    return 999
-                sx = section[:, 0]
-                sy = section[:, 1]
-                try:
-                    s_slope, s_intercept = np.polyfit(sx, sy, 1)
-                    s_predicted = s_slope * sx + s_intercept
-                    return np.abs(sy - s_predicted).mean()
-                except:
-                    return 999
-            
-            start_error = check_straightness(start_section)
-            end_error = check_straightness(end_section)
-            
-            # If one end is significantly less straight (has the arrow head)
-            if start_error > end_error * 1.5 and start_error > 15:
-                # Arrow head at start
-                print(f"✅ Detected ARROW - head at START")
-                return {
-                    'type': 'arrow',
-                    'tail': tuple(points[-1].astype(int)),
-                    'head': tuple(points[0].astype(int)),
-                    'points': points
-                }
-            elif end_error > start_error * 1.5 and end_error > 15:
-                # Arrow head at end
-                print(f"✅ Detected ARROW - head at END")
-                return {
-                    'type': 'arrow',
-                    'tail': tuple(points[0].astype(int)),
-                    'head': tuple(points[-1].astype(int)),
-                    'points': points
-                }
-        except:
-            pass
+        # Now check each end separately
+        # Split into three sections: start 30%, middle 40%, end 30%
+        third = features.num_points // 3
+        start_error, end_error = features.end_section_errors(third)
+        
+        points = features.points.astype(int)
+        
+        # Head bends its end well away from a straight line (scales with the arrow's size)
+        min_head_error = features.arc_length * config.ARROW_HEAD_MIN_ERROR_RATIO
+        
+        # If one end is significantly less straight (has the arrow head)
+        if start_error > end_error * 1.5 and start_error > min_head_error:
+            # Arrow head at start
+            self._log(f"✅ Detected ARROW - head at START")
+            return {
+                'type': 'arrow',
+                'tail': tuple(points[-1].astype(int)),
+                'head': tuple(points[0].astype(int)),
+                'points': points
+            }
+        elif end_error > start_error * 1.5 and end_error > min_head_error:
+            # Arrow head at end
+            self._log(f"✅ Detected ARROW - head at END")
+            return {
+                'type': 'arrow',
+                'tail': tuple(points[0].astype(int)),
+                'head': tuple(points[-1].astype(int)),
+                'points': points
+            }
         
         return None
     
@@ -295,12 +369,13 @@ class ShapeRecognizer:
                 thickness
             )
         
-        elif shape_type in ['rectangle', 'square', 'triangle']:
-            pts = shape_info['points'].reshape((-1, 1, 2))
+        elif shape_type != 'arrow':
+            # Polygons: rectangle, square, triangle and template shapes
+            pts = np.asarray(shape_info['points'], dtype=np.int32).reshape((-1, 1, 2))
             cv2.polylines(
                 canvas,
                 [pts],
-                isClosed=True,
+                isClosed=shape_info.get('closed', True),
                 color=color,
                 thickness=thickness
             )
@@ -1,11 +1,19 @@
 """
 Stroke Management Module
 Tracks individual drawing strokes for undo/redo and shape recognition
+
+Every mutation is reported to listeners (see add_listener), so the stroke
+list can be mirrored elsewhere - e.g. streamed to clients as deltas.
 """
 
+import itertools
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 import config
+from .shape_cache import shape_bounds
+
+# Unique id for every stroke ever created (a replaced shape gets a new id)
+_stroke_ids = itertools.count(1)
 
 class Stroke:
     """Represents a single drawing stroke"""
@@ -19,11 +27,13 @@ class Stroke:
             thickness: Brush thickness
             stroke_type: 'line', 'shape', or 'erase'
         """
+        self.id = next(_stroke_ids)
         self.points = []  # List of (x, y) coordinates
         self.color = color
         self.thickness = thickness
         self.stroke_type = stroke_type
         self.is_complete = False
+        self._bounds = None
     
     def add_point(self, x: int, y: int):
         """Add a point to the stroke"""
@@ -41,6 +51,32 @@ class Stroke:
         """Get points as numpy array for shape recognition"""
         return np.array(self.points)
     
+    def get_bounds(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Get bounding box of everything this stroke draws
+        
+        Returns:
+            (x_min, y_min, x_max, y_max) including brush thickness, or None if empty
+        """
+        if self._bounds is not None:
+            return self._bounds
+        
+        if hasattr(self, 'shape_info'):
+            bounds = tuple(int(v) for v in shape_bounds(self.shape_info, self.thickness))
+        elif self.points:
+            pts = self.get_numpy_points()
+            half = self.thickness // 2 + 1
+            x_min, y_min = pts.min(axis=0) - half
+            x_max, y_max = pts.max(axis=0) + half
+            bounds = (int(x_min), int(y_min), int(x_max), int(y_max))
+        else:
+            return None
+        
+        # Completed strokes never change, so their bounds can be kept
+        if self.is_complete:
+            self._bounds = bounds
+        return bounds
+    
     def clear_points(self):
         """Clear all points (used when replacing with perfect shape)"""
         self.points = []
@@ -51,12 +87,47 @@ class StrokeManager:
     
     def __init__(self):
         """Initialize stroke manager"""
-        self.current_stroke = None
+        self.current_strokes = {}  # Hand id -> stroke being drawn by that hand
         self.all_strokes = []  # All strokes currently on canvas
         self.history = []  # For undo/redo
         self.redo_stack = []
+        
+        # Mutation listeners
+        self.listeners: List[Callable[[Dict], None]] = []
+    
+    @property
+    def current_stroke(self) -> Optional[Stroke]:
+        """Stroke being drawn by the first hand"""
+        return self.current_strokes.get(0)
     
-    def start_new_stroke(self, color: Tuple[int, int, int], thickness: int, stroke_type: str = 'line'):
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """
+        Register a callback for stroke list changes
+        
+        Args:
+            listener: Called with {'type': ..., ...}:
+                      'stroke_start' (stroke, hand_id), 'stroke_point' (stroke, point),
+                      'stroke_end' (stroke, kept), 'shape_replace' (replacements:
+                      [(old stroke, shape stroke), ...]), 'undo' (stroke),
+                      'redo' (stroke), 'clear'
+        """
+        self.listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[Dict], None]):
+        """Unregister a callback"""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+    
+    def _notify(self, event_type: str, **data):
+        """Tell all listeners about a mutation"""
+        if not self.listeners:
+            return
+        event = {'type': event_type, **data}
+        for listener in self.listeners:
+            listener(event)
+    
+    def start_new_stroke(self, color: Tuple[int, int, int], thickness: int, stroke_type: str = 'line',
+                         hand_id: int = 0):
         """
         Start a new stroke
         
@@ -64,31 +135,41 @@ class StrokeManager:
             color: BGR color tuple
             thickness: Brush thickness
             stroke_type: 'line', 'shape', or 'erase'
+            hand_id: Hand drawing the stroke (each hand has its own active stroke)
         """
-        self.current_stroke = Stroke(color, thickness, stroke_type)
+        stroke = Stroke(color, thickness, stroke_type)
+        self.current_strokes[hand_id] = stroke
+        self._notify('stroke_start', stroke=stroke, hand_id=hand_id)
     
-    def add_point_to_current_stroke(self, x: int, y: int):
-        """Add point to current stroke"""
-        if self.current_stroke:
-            self.current_stroke.add_point(x, y)
+    def add_point_to_current_stroke(self, x: int, y: int, hand_id: int = 0):
+        """Add point to the hand's current stroke"""
+        stroke = self.current_strokes.get(hand_id)
+        if stroke:
+            stroke.add_point(x, y)
+            self._notify('stroke_point', stroke=stroke, point=(x, y))
     
-    def complete_current_stroke(self):
-        """Complete current stroke and add to canvas"""
-        if self.current_stroke and len(self.current_stroke.points) > 0:
-            self.current_stroke.complete()
-            self.all_strokes.append(self.current_stroke)
-            
-            # Add to history for undo
-            self.history.append(self.current_stroke)
-            
-            # Limit history size
-            if len(self.history) > config.MAX_HISTORY_SIZE:
-                self.history.pop(0)
-            
-            # Clear redo stack when new stroke added
-            self.redo_stack = []
-            
-            self.current_stroke = None
+    def complete_current_stroke(self, hand_id: int = 0):
+        """Complete the hand's current stroke and add to canvas"""
+        stroke = self.current_strokes.pop(hand_id, None)
+        if stroke is None:
+            return
+        if len(stroke.points) == 0:
+            self._notify('stroke_end', stroke=stroke, kept=False)
+            return
+        
+        stroke.complete()
+        self.all_strokes.append(stroke)
+        
+        # Add to history for undo
+        self.history.append(stroke)
+        
+        # Limit history size
+        if len(self.history) > config.MAX_HISTORY_SIZE:
+            self.history.pop(0)
+        
+        # Clear redo stack when new stroke added
+        self.redo_stack = []
+        self._notify('stroke_end', stroke=stroke, kept=True)
     
     def get_last_completed_stroke(self) -> Optional[Stroke]:
         """Get the most recent completed stroke"""
@@ -114,6 +195,43 @@ class StrokeManager:
             if removed_stroke in self.history:
                 idx = self.history.index(removed_stroke)
                 self.history[idx] = shape_stroke
+            
+            self._notify('shape_replace', replacements=[(removed_stroke, shape_stroke)])
+    
+    def get_unrecognized_strokes(self) -> List[Stroke]:
+        """Get completed freehand strokes that have not been turned into shapes"""
+        return [stroke for stroke in self.all_strokes if stroke.stroke_type == 'line']
+    
+    def replace_strokes_with_shapes(self, replacements: Dict[Stroke, Stroke]):
+        """
+        Replace several strokes with perfect shapes in one step
+        
+        The new stroke lists are built first and swapped in together, so
+        readers never see a half-replaced board.
+        
+        Args:
+            replacements: {original stroke: shape stroke}
+        """
+        if not replacements:
+            return
+        
+        self.all_strokes = [replacements.get(stroke, stroke) for stroke in self.all_strokes]
+        self.history = [replacements.get(stroke, stroke) for stroke in self.history]
+        self._notify('shape_replace', replacements=list(replacements.items()))
+    
+    def get_stroke_bounds(self) -> List[Tuple[int, Tuple[int, int, int, int]]]:
+        """
+        Get id and bounding box of every stroke on canvas
+        
+        Returns:
+            list: [(stroke id, (x_min, y_min, x_max, y_max)), ...]
+        """
+        result = []
+        for stroke in self.all_strokes:
+            bounds = stroke.get_bounds()
+            if bounds is not None:
+                result.append((stroke.id, bounds))
+        return result
     
     def undo(self) -> bool:
         """
@@ -133,6 +251,7 @@ class StrokeManager:
             if undone_stroke in self.all_strokes:
                 self.all_strokes.remove(undone_stroke)
             
+            self._notify('undo', stroke=undone_stroke)
             print("⬅️ Undo")
             return True
         
@@ -156,6 +275,7 @@ class StrokeManager:
             # Add back to canvas
             self.all_strokes.append(redone_stroke)
             
+            self._notify('redo', stroke=redone_stroke)
             print("➡️ Redo")
             return True
         
@@ -167,7 +287,8 @@ class StrokeManager:
         self.all_strokes = []
         self.history = []
         self.redo_stack = []
-        self.current_stroke = None
+        self.current_strokes = {}
+        self._notify('clear')
         print("🗑️ Canvas cleared")
     
     def can_undo(self) -> bool:
@@ -0,0 +1,237 @@
+"""
+Template Shape Recognition Module
+$1/$P-style recogniser: resample -> normalise -> nearest template
+
+Every template is stored as a bank of pre-normalised point sets (all start
+points and both drawing directions), so one tensor product scores the
+candidate against every template at once. Adding a shape only adds data,
+never a new code path.
+"""
+
+import json
+import numpy as np
+from typing import Optional, Dict, List
+import config
+
+
+def resample(points: np.ndarray, num_points: int, closed: bool = False) -> np.ndarray:
+    """
+    Resample a path to num_points points evenly spaced along its length
+
+    Args:
+        points: (N, 2) path
+        num_points: Number of output points
+        closed: Treat the path as a loop (last point connects back to first)
+
+    Returns:
+        (num_points, 2) float array
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if closed:
+        pts = np.vstack([pts, pts[:1]])
+
+    steps = np.diff(pts, axis=0)
+    cumulative = np.concatenate([[0.0], np.cumsum(np.hypot(steps[:, 0], steps[:, 1]))])
+    if cumulative[-1] == 0:
+        return np.repeat(pts[:1], num_points, axis=0)
+
+    # For loops, skip the duplicated end point so spacing wraps evenly
+    t = np.linspace(0.0, cumulative[-1], num_points, endpoint=not closed)
+    return np.stack([
+        np.interp(t, cumulative, pts[:, 0]),
+        np.interp(t, cumulative, pts[:, 1])
+    ], axis=1)
+
+
+def normalize(points: np.ndarray):
+    """
+    Translate to the centroid and scale to unit RMS radius
+    (uniform scaling, so lines and thin shapes keep their proportions)
+
+    Returns:
+        (normalized points, centroid, scale)
+    """
+    centroid = points.mean(axis=0)
+    centered = points - centroid
+    scale = np.sqrt((centered ** 2).sum(axis=1).mean())
+    if scale == 0:
+        scale = 1.0
+    return centered / scale, centroid, scale
+
+
+def regular_polygon(sides: int, radius: float = 1.0) -> np.ndarray:
+    """Vertices of a regular polygon (first vertex pointing up)"""
+    angles = np.arange(sides) * 2 * np.pi / sides - np.pi / 2
+    return np.stack([np.cos(angles), np.sin(angles)], axis=1) * radius
+
+
+def star_polygon(points: int = 5, inner_ratio: float = config.STAR_INNER_OUTER_RATIO) -> np.ndarray:
+    """Vertices of a star alternating outer and inner radius"""
+    angles = np.arange(points * 2) * np.pi / points - np.pi / 2
+    radii = np.where(np.arange(points * 2) % 2 == 0, 1.0, inner_ratio)
+    return np.stack([np.cos(angles), np.sin(angles)], axis=1) * radii[:, None]
+
+
+def default_templates() -> List[Dict]:
+    """Built-in templates (closed outlines given by their vertices)"""
+    return [
+        {'name': 'circle', 'closed': True, 'points': regular_polygon(64).tolist()},
+        {'name': 'triangle', 'closed': True, 'points': regular_polygon(3).tolist()},
+        {'name': 'square', 'closed': True, 'points': regular_polygon(4).tolist()},
+        {'name': 'pentagon', 'closed': True, 'points': regular_polygon(5).tolist()},
+        {'name': 'hexagon', 'closed': True, 'points': regular_polygon(6).tolist()},
+        {'name': 'star', 'closed': True, 'points': star_polygon().tolist()},
+    ]
+
+
+class TemplateRecognizer:
+    def __init__(self, num_points: int = config.TEMPLATE_RESAMPLE_POINTS,
+                 min_score: float = config.TEMPLATE_MIN_SCORE):
+        """
+        Initialize template recognizer with the built-in templates
+
+        Args:
+            num_points: Points each path is resampled to
+            min_score: Minimum match score (0-1) to accept a template
+        """
+        self.num_points = num_points
+        self.min_score = min_score
+
+        self.templates = []  # Template dicts: name, closed, vertices, centroid, scale
+        self._bank = np.zeros((0, num_points, 2))  # (variants, num_points, 2)
+        self._bank_template = np.zeros(0, dtype=int)  # Template index of each variant
+
+        self.add_templates(default_templates())
+
+    def add_template(self, name: str, points, closed: bool = True):
+        """
+        Add one template
+
+        Args:
+            name: Shape type reported when this template matches
+            points: Outline vertices (or a recorded stroke) as (x, y) pairs
+            closed: True for loops (any start point matches), False for open paths
+        """
+        self.add_templates([{'name': name, 'points': points, 'closed': closed}])
+
+    def add_templates(self, templates: List[Dict]):
+        """Add several templates and rebuild the matching bank once"""
+        for template in templates:
+            vertices = np.asarray(template['points'], dtype=np.float64).reshape(-1, 2)
+            closed = template.get('closed', True)
+
+            path = resample(vertices, self.num_points, closed=closed)
+            normalized, centroid, scale = normalize(path)
+
+            self.templates.append({
+                'name': template['name'],
+                'closed': closed,
+                'vertices': vertices,
+                'centroid': centroid,
+                'scale': scale,
+                'normalized': normalized
+            })
+
+        self._build_bank()
+
+    def load_templates(self, filepath: str):
+        """
+        Load templates from a JSON file
+
+        Format: [{"name": "pentagon", "closed": true, "points": [[x, y], ...]}, ...]
+        """
+        with open(filepath, 'r') as f:
+            self.add_templates(json.load(f))
+        print(f"📐 Loaded templates from: {filepath}")
+
+    def _build_bank(self):
+        """Expand every template into all start points / directions it can be drawn with"""
+        variants = []
+        owners = []
+
+        for index, template in enumerate(self.templates):
+            forward = template['normalized']
+            backward = forward[::-1]
+
+            if template['closed']:
+                # Every start point, both directions
+                shifts = [np.roll(path, -k, axis=0) for path in (forward, backward)
+                          for k in range(self.num_points)]
+            else:
+                shifts = [forward, backward]
+
+            variants.extend(shifts)
+            owners.extend([index] * len(shifts))
+
+        self._bank = np.array(variants)
+        self._bank_template = np.array(owners, dtype=int)
+
+    def match(self, points: np.ndarray) -> Optional[Dict]:
+        """
+        Find the nearest template (best rotation, start point and direction)
+
+        Returns:
+            dict with template index, score (0-1), rotation angle and the
+            candidate's centroid/scale, or None if there are no templates
+        """
+        if len(self._bank) == 0:
+            return None
+
+        candidate, centroid, scale = normalize(resample(points, self.num_points))
+
+        # For unit-RMS paths c and t, the best rotation of t onto c has
+        # cos/sin terms a = sum(c . t), b = sum(c x t) and mean squared
+        # distance 2 - 2 * sqrt(a^2 + b^2) / N, so the score is sqrt(a^2 + b^2) / N
+        perpendicular = np.stack([candidate[:, 1], -candidate[:, 0]], axis=1)
+        basis = np.stack([candidate, perpendicular], axis=-1)  # (N, 2, 2)
+        ab = np.tensordot(self._bank, basis, axes=([1, 2], [0, 1]))  # (variants, 2)
+
+        scores = np.hypot(ab[:, 0], ab[:, 1]) / self.num_points
+        best = int(np.argmax(scores))
+
+        return {
+            'template': int(self._bank_template[best]),
+            'score': float(scores[best]),
+            'angle': float(np.arctan2(ab[best, 1], ab[best, 0])),
+            'centroid': centroid,
+            'scale': float(scale)
+        }
+
+    def recognize(self, points: np.ndarray) -> Optional[Dict]:
+        """
+        Recognize a stroke against all templates
+
+        Args:
+            points: numpy array of (x, y) coordinates
+
+        Returns:
+            Shape info dict ('points' = template outline fitted onto the
+            stroke) or None if no template scores above min_score
+        """
+        result = self.match(points)
+        if result is None or result['score'] < self.min_score:
+            return None
+
+        template = self.templates[result['template']]
+
+        # Map template vertices into stroke coordinates: normalise, rotate, rescale
+        cos_t, sin_t = np.cos(result['angle']), np.sin(result['angle'])
+        rotation = np.array([[cos_t, sin_t], [-sin_t, cos_t]])
+        local = (template['vertices'] - template['centroid']) / template['scale']
+        fitted = local @ rotation * result['scale'] + result['centroid']
+
+        if template['name'] == 'circle':
+            radii = np.hypot(*(fitted - result['centroid']).T)
+            return {
+                'type': 'circle',
+                'center': tuple(int(c) for c in result['centroid'].round()),
+                'radius': int(radii.mean()),
+                'score': result['score']
+            }
+
+        return {
+            'type': template['name'],
+            'points': fitted.round().astype(int),
+            'closed': template['closed'],
+            'score': result['score']
+        }
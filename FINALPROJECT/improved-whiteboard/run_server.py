@@ -0,0 +1,75 @@
+"""
+Production Server Entry Point
+Runs the backend in threading or async (eventlet/gevent) mode
+
+Usage:
+    python run_server.py [--mode eventlet] [--host 0.0.0.0] [--port 5000]
+
+--mode eventlet needs eventlet; --mode gevent needs gevent and
+gevent-websocket (see requirements.txt).
+
+In async mode every socket client, HTTP request and video loop is a green
+thread, so hundreds of clients share a handful of OS threads instead of
+one thread each. Camera reads, MediaPipe and JPEG encoding are offloaded to
+the async library's thread pool (utils/offload.py). The async library must
+patch the standard library BEFORE the app is imported, which is why this
+is a separate entry point and not a flag of app.py.
+"""
+
+import argparse
+
+
+def _patch(mode: str):
+    """Make blocking standard library calls cooperative"""
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+        try:
+            import geventwebsocket  # Flask-SocketIO's WebSocket transport under gevent
+        except ImportError:
+            print("⚠️ gevent-websocket is not installed - clients can only use HTTP long-polling "
+                  "(pip install gevent-websocket)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the whiteboard backend")
+    parser.add_argument("--mode", choices=['threading', 'eventlet', 'gevent'], default='eventlet',
+                        help="Server concurrency mode (default: eventlet; gevent also needs gevent-websocket)")
+    parser.add_argument("--host", default='0.0.0.0')
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    _patch(args.mode)
+
+    import config
+    config.SERVER_ASYNC_MODE = args.mode
+
+    from app import app, socketio, room_registry
+    from core.shape_recognizer import shutdown_batch_pool, start_batch_pool
+    from utils.ocr_service import shutdown_ocr_service, start_ocr_service
+
+    print("=" * 60)
+    print(f"🎨 AI WHITEBOARD BACKEND ({socketio.async_mode} mode)")
+    print("=" * 60)
+    print(f"📡 Server: http://{args.host}:{args.port}")
+    print("=" * 60)
+
+    room_registry.start_sweeper()
+
+    # Shape batch and OCR workers start here, in the main thread, never inside a request
+    start_batch_pool()
+    start_ocr_service()
+
+    try:
+        socketio.run(app, host=args.host, port=args.port, debug=False,
+                     allow_unsafe_werkzeug=args.mode == 'threading')
+    finally:
+        shutdown_batch_pool()
+        shutdown_ocr_service()
+
+
+if __name__ == "__main__":
+    main()
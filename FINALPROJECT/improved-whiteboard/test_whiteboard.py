@@ -16,7 +16,7 @@ from core.hand_tracker import HandTracker
 from core.gesture_recognizer import GestureRecognizer
 from core.canvas import Canvas
 from utils.file_handler import FileHandler
-from utils.text_recognizer import TextRecognizer
+from utils.ocr_service import OCRService
 
 def main():
     print("=" * 60)
@@ -46,18 +46,31 @@ def main():
     cap.set(4, config.CAMERA_HEIGHT)
     
     hand_tracker = HandTracker()
-    gesture_recognizer = GestureRecognizer()
+    # One gesture recognizer (mode + color) per hand; the first hand follows keyboard colors
+    gesture_recognizers = [GestureRecognizer(color_index=i, hand_id=i) for i in range(config.MAX_NUM_HANDS)]
+    gesture_recognizer = gesture_recognizers[0]
+    
+    # Status text for the UI, refreshed only when the first hand's mode/color changes
+    ui_status = {}
+    
+    def update_ui_status(event=None):
+        ui_status['mode'] = gesture_recognizer.get_mode_display_text()
+        ui_status['color'] = gesture_recognizer.get_current_color_name()
+    
+    update_ui_status()
+    gesture_recognizer.add_listener(update_ui_status)
     canvas = Canvas(config.CAMERA_WIDTH, config.CAMERA_HEIGHT)
     file_handler = FileHandler()
-    text_recognizer = TextRecognizer()
+    ocr_service = OCRService()  # OCR runs in background workers
     
-    # Drawing state
-    prev_x, prev_y = None, None
+    # Drawing state (hand id -> last drawn point)
+    prev_points = {}
     brush_thickness = config.BRUSH_THICKNESS_DEFAULT
     
     # Text recognition display
     recognized_text = ""  # Store recognized text
     show_text = False  # Flag to show/hide text on screen
+    ocr_future = None  # Pending OCR request
     
     print("\n✅ Whiteboard ready! Show your hand to the camera.\n")
     
@@ -71,68 +84,63 @@ def main():
         frame = cv2.flip(frame, 1)
         h, w, c = frame.shape
         
-        # Detect hand
-        hand_detected = hand_tracker.detect_hand(frame)
+        # Detect all hands; tips and finger counts come out for every hand at once
+        num_hands = hand_tracker.detect_hands(frame)
+        finger_tips = hand_tracker.get_index_finger_tips(w, h)
+        finger_counts = hand_tracker.count_fingers_all()
         
-        if hand_detected:
-            # Get finger tip position
-            finger_pos = hand_tracker.get_index_finger_tip(w, h)
-            
-            # Count fingers for gesture
-            finger_count = hand_tracker.count_fingers()
+        for hand_id, finger_pos, finger_count in zip(hand_tracker.hand_ids, finger_tips, finger_counts):
+            x, y = int(finger_pos[0]), int(finger_pos[1])
+            hand_gestures = gesture_recognizers[hand_id]
             
             # Recognize gesture
-            gesture_result = gesture_recognizer.recognize_gesture(finger_count)
+            gesture_result = hand_gestures.recognize_gesture(int(finger_count))
             mode = gesture_result['mode']
             
             # Get current color
-            current_color = gesture_recognizer.get_current_color_bgr()
+            current_color = hand_gestures.get_current_color_bgr()
             
             # Handle drawing based on mode
-            if mode == 'draw' and finger_pos:
-                x, y = finger_pos
-                
-                if prev_x is None:
-                    canvas.start_drawing(x, y, current_color, brush_thickness, mode)
+            if mode == 'draw':
+                if hand_id not in prev_points:
+                    canvas.start_drawing(x, y, current_color, brush_thickness, mode, hand_id)
                 else:
-                    canvas.continue_drawing(x, y, current_color, brush_thickness, mode)
+                    canvas.continue_drawing(x, y, current_color, brush_thickness, mode, hand_id)
                 
-                prev_x, prev_y = x, y
+                prev_points[hand_id] = (x, y)
                 
                 # Visual feedback
                 cv2.circle(frame, (x, y), 10, current_color, -1)
             
-            elif mode == 'erase' and finger_pos:
-                x, y = finger_pos
-                
-                if prev_x is None:
-                    canvas.start_drawing(x, y, (0, 0, 0), config.ERASER_THICKNESS, mode)
+            elif mode == 'erase':
+                if hand_id not in prev_points:
+                    canvas.start_drawing(x, y, (0, 0, 0), config.ERASER_THICKNESS, mode, hand_id)
                 else:
-                    canvas.continue_drawing(x, y, (0, 0, 0), config.ERASER_THICKNESS, mode)
+                    canvas.continue_drawing(x, y, (0, 0, 0), config.ERASER_THICKNESS, mode, hand_id)
                 
-                prev_x, prev_y = x, y
+                prev_points[hand_id] = (x, y)
                 
                 # Visual feedback
                 cv2.circle(frame, (x, y), config.ERASER_THICKNESS//2, (100, 100, 100), 2)
             
             else:
                 # Stop drawing
-                if prev_x is not None:
-                    canvas.stop_drawing()
-                prev_x, prev_y = None, None
+                if hand_id in prev_points:
+                    canvas.stop_drawing(hand_id)
+                    del prev_points[hand_id]
                 
                 # Visual feedback for idle
-                if finger_pos:
-                    cv2.circle(frame, finger_pos, 10, (0, 255, 0), 2)
-            
-            # Draw hand skeleton
-            frame = hand_tracker.draw_hand_skeleton(frame)
+                cv2.circle(frame, (x, y), 10, (0, 255, 0), 2)
+        
+        # Hands that left the view - stop their strokes
+        for hand_id in list(prev_points):
+            if hand_id not in hand_tracker.hand_ids:
+                canvas.stop_drawing(hand_id)
+                del prev_points[hand_id]
         
-        else:
-            # No hand detected - stop drawing
-            if prev_x is not None:
-                canvas.stop_drawing()
-            prev_x, prev_y = None, None
+        if num_hands:
+            # Draw hand skeletons
+            frame = hand_tracker.draw_hand_skeleton(frame)
         
         # Combine frame and canvas
         canvas_img = canvas.get_canvas()
@@ -157,7 +165,7 @@ def main():
                          (255, 255, 255), 2)
             
             # Highlight current color
-            if color_name == gesture_recognizer.get_current_color_name():
+            if color_name == ui_status['color']:
                 cv2.rectangle(result, 
                              (x_pos - 3, palette_y - 3), 
                              (x_pos + config.UI_BUTTON_SIZE + 3, palette_y + config.UI_BUTTON_SIZE + 3), 
@@ -165,8 +173,8 @@ def main():
         
         # Draw status
         status_y = 100
-        mode_text = gesture_recognizer.get_mode_display_text()
-        color_text = gesture_recognizer.get_current_color_name().upper()
+        mode_text = ui_status['mode']
+        color_text = ui_status['color'].upper()
         
         cv2.putText(result, f"Mode: {mode_text}", 
                    (palette_x, status_y), 
@@ -187,6 +195,28 @@ def main():
                    (palette_x, status_y + 90), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         
+        # Collect OCR result when the background worker is done
+        if ocr_future is not None and ocr_future.done():
+            try:
+                result_ocr = ocr_future.result()
+                
+                if result_ocr['text']:
+                    recognized_text = result_ocr['text']
+                    show_text = True  # Enable on-screen display
+                    print(f"✨ Recognized: '{recognized_text}'")
+                    print(f"📊 Confidence: {result_ocr['confidence']:.1f}%")
+                    print(f"💡 Text is now displayed on screen! Press 'x' to clear.")
+                else:
+                    print("⚠️ No text recognized. Try writing clearer/bigger.")
+                    print("💡 Tip: Use white/yellow color for better recognition")
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                print("💡 Make sure Tesseract is installed:")
+                print("   Mac: brew install tesseract")
+                print("   Linux: sudo apt-get install tesseract-ocr")
+                print("   Windows: Download from https://github.com/UB-Mannheim/tesseract/wiki")
+            ocr_future = None
+        
         # Display recognized text on screen (NEW!)
         if show_text and recognized_text:
             # Create semi-transparent background for text
@@ -256,30 +286,17 @@ def main():
                 print("⚠️ Draw a line first, then press 'a'")
         
         elif key == ord('t'):
-            # Text recognition with ON-SCREEN DISPLAY
-            print("\n📝 Recognizing text from canvas...")
-            try:
-                # Get ONLY the canvas (not the video overlay)
-                canvas_only = canvas.get_canvas()
-                
-                # Run OCR
-                result_ocr = text_recognizer.recognize_with_confidence(canvas_only)
-                
-                if result_ocr['text']:
-                    recognized_text = result_ocr['text']
-                    show_text = True  # Enable on-screen display
-                    print(f"✨ Recognized: '{recognized_text}'")
-                    print(f"📊 Confidence: {result_ocr['confidence']:.1f}%")
-                    print(f"💡 Text is now displayed on screen! Press 'x' to clear.")
-                else:
-                    print("⚠️ No text recognized. Try writing clearer/bigger.")
-                    print("💡 Tip: Use white/yellow color for better recognition")
-            except Exception as e:
-                print(f"❌ Error: {e}")
-                print("💡 Make sure Tesseract is installed:")
-                print("   Mac: brew install tesseract")
-                print("   Linux: sudo apt-get install tesseract-ocr")
-                print("   Windows: Download from https://github.com/UB-Mannheim/tesseract/wiki")
+            # Text recognition with ON-SCREEN DISPLAY (runs in background)
+            if ocr_future is not None:
+                print("⏳ Still recognizing previous text...")
+            else:
+                print("\n📝 Recognizing text from canvas...")
+                # Send ONLY the canvas (not the video overlay)
+                ocr_future = ocr_service.submit(
+                    canvas.get_canvas().copy(),
+                    version=canvas.version,
+                    strokes=canvas.stroke_manager.get_stroke_bounds()
+                )
         
         elif key == ord('x'):
             # Clear displayed text
@@ -313,6 +330,7 @@ def main():
     cap.release()
     cv2.destroyAllWindows()
     hand_tracker.release()
+    ocr_service.shutdown()
     
     print("\n✅ Whiteboard closed. Thank you!")
 
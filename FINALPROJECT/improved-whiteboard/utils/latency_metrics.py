@@ -0,0 +1,141 @@
+"""
+Latency Metrics
+Per-stage timing of the video pipeline with rolling percentiles
+
+A FrameTimer is started for every frame and lap()'d after each stage
+(capture, convert, inference, gesture, canvas, sync, compose, ui, encode, emit).
+Laps only call time.perf_counter() and add to a dict, so timing a frame
+costs a few microseconds. When the frame is done LatencyMetrics keeps the
+durations in a fixed-size ring buffer per stage (the last
+config.METRICS_WINDOW frames); percentiles are only computed when someone
+asks (GET /metrics, 'debug_metrics' event), never in the video loop.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List
+
+import numpy as np
+import config
+
+# Video pipeline stages in processing order ('frame' = whole process_frame call)
+# 'sync' = stroke sync, shape suggestion and status pushes; 'emit' = sending the video frame
+PIPELINE_STAGES = ('capture', 'convert', 'inference', 'gesture', 'canvas', 'sync',
+                   'compose', 'ui', 'encode', 'emit', 'frame')
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def escape_label(value) -> str:
+    """Prometheus label value (room names come from clients)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class FrameTimer:
+    """Stage durations of one frame"""
+
+    __slots__ = ('start', 'durations', '_last')
+
+    def __init__(self):
+        self.start = self._last = time.perf_counter()
+        self.durations = {}
+
+    def lap(self, stage: str):
+        """Charge the time since the last lap to stage (adds up if a stage runs twice)"""
+        now = time.perf_counter()
+        self.durations[stage] = self.durations.get(stage, 0.0) + now - self._last
+        self._last = now
+
+
+class LatencyMetrics:
+    def __init__(self, stages: Iterable[str] = PIPELINE_STAGES, window: int = config.METRICS_WINDOW):
+        """
+        Initialize metrics
+
+        Args:
+            stages: Stage names (unknown stages passed to record() are ignored)
+            window: Frames kept per stage for the rolling percentiles
+        """
+        self.stages = list(stages)
+        self.window = window
+
+        # stage -> ring buffer of durations (seconds)
+        self._samples = {stage: np.zeros(window) for stage in self.stages}
+        self._next = 0    # Ring buffer slot for the next frame
+        self._filled = 0  # Slots holding samples (< window until the buffer wraps)
+
+        # Totals since start (Prometheus _count/_sum)
+        self.counts = dict.fromkeys(self.stages, 0)
+        self.sums = dict.fromkeys(self.stages, 0.0)
+
+        self._lock = threading.Lock()
+
+    def frame(self) -> FrameTimer:
+        """Start timing a frame"""
+        return FrameTimer()
+
+    def record(self, timer: FrameTimer):
+        """Store a finished frame (stages it skipped count as 0 for this frame)"""
+        durations = timer.durations
+        durations['frame'] = time.perf_counter() - timer.start
+
+        with self._lock:
+            slot = self._next
+            for stage, samples in self._samples.items():
+                seconds = durations.get(stage, 0.0)
+                samples[slot] = seconds
+                if stage in durations:
+                    self.counts[stage] += 1
+                    self.sums[stage] += seconds
+            self._next = (slot + 1) % self.window
+            self._filled = min(self._filled + 1, self.window)
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Rolling percentiles per stage
+
+        Returns:
+            {stage: {'p50', 'p95', 'p99', 'mean' (ms over the window), 'count' (frames since start)}}
+        """
+        with self._lock:
+            filled = self._filled
+            windows = {stage: samples[:filled].copy() for stage, samples in self._samples.items()}
+            counts = dict(self.counts)
+
+        result = {}
+        for stage, samples in windows.items():
+            if filled:
+                p50, p95, p99 = np.percentile(samples, [q * 100 for q in QUANTILES]) * 1000
+                mean = samples.mean() * 1000
+            else:
+                p50 = p95 = p99 = mean = 0.0
+            result[stage] = {'p50': round(float(p50), 3), 'p95': round(float(p95), 3),
+                             'p99': round(float(p99), 3), 'mean': round(float(mean), 3),
+                             'count': counts[stage]}
+        return result
+
+    def prometheus(self, labels: Dict[str, str] = None) -> List[str]:
+        """
+        Samples in Prometheus text format (summary 'whiteboard_stage_latency_seconds')
+
+        Args:
+            labels: Extra labels for every sample, e.g. {'room': 'default'}
+
+        Returns:
+            list of lines (without HELP/TYPE headers, so several rooms can share them)
+        """
+        with self._lock:
+            filled = self._filled
+            windows = {stage: samples[:filled].copy() for stage, samples in self._samples.items()}
+            counts = dict(self.counts)
+            sums = dict(self.sums)
+
+        base = ''.join(f'{key}="{escape_label(value)}",' for key, value in (labels or {}).items())
+        lines = []
+        for stage, samples in windows.items():
+            quantiles = np.percentile(samples, [q * 100 for q in QUANTILES]) if filled else [0.0] * len(QUANTILES)
+            for q, value in zip(QUANTILES, quantiles):
+                lines.append(f'whiteboard_stage_latency_seconds{{{base}stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'whiteboard_stage_latency_seconds_sum{{{base}stage="{stage}"}} {sums[stage]:.6f}')
+            lines.append(f'whiteboard_stage_latency_seconds_count{{{base}stage="{stage}"}} {counts[stage]}')
+        return lines
@@ -0,0 +1,117 @@
+"""
+OCR Region Cache
+Remembers OCR results per text region so a growing board only OCRs what changed
+
+A region's key is its box plus the ids of every stroke that touches it.
+Strokes never change after they are completed (erasing, undo and shape
+replacement all add or remove whole strokes), so the same key means the
+same pixels and the cached text can be reused.
+"""
+
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+import config
+
+
+def region_stroke_ids(regions: List[Tuple[int, int, int, int]],
+                      strokes: List[Tuple[int, Tuple[int, int, int, int]]]) -> List[Tuple[int, ...]]:
+    """
+    Find the strokes intersecting each region
+
+    Args:
+        regions: (x, y, w, h) boxes
+        strokes: [(stroke id, (x_min, y_min, x_max, y_max)), ...]
+                 (StrokeManager.get_stroke_bounds)
+
+    Returns:
+        list: Sorted tuple of stroke ids for every region
+    """
+    if not regions:
+        return []
+    if not strokes:
+        return [() for _ in regions]
+
+    ids = np.array([stroke_id for stroke_id, _ in strokes])
+    bounds = np.array([b for _, b in strokes])  # (S, 4)
+    boxes = np.array(regions)  # (R, 4)
+
+    # (R, S) overlap test between every region and every stroke box
+    overlap = (
+        (bounds[None, :, 0] < (boxes[:, None, 0] + boxes[:, None, 2])) &
+        (bounds[None, :, 2] >= boxes[:, None, 0]) &
+        (bounds[None, :, 1] < (boxes[:, None, 1] + boxes[:, None, 3])) &
+        (bounds[None, :, 3] >= boxes[:, None, 1])
+    )
+    return [tuple(sorted(ids[row].tolist())) for row in overlap]
+
+
+class OCRRegionCache:
+    def __init__(self, max_size: int = config.OCR_REGION_CACHE_SIZE):
+        """
+        Initialize region cache
+
+        Args:
+            max_size: Maximum number of cached regions (LRU eviction)
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> region result
+        self._added = {}  # Entries added since the last load() (sent back by OCR workers)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(box: Tuple[int, int, int, int], stroke_ids: Tuple[int, ...], with_confidence: bool) -> Tuple:
+        """Key for one region (the OCR mode is part of it - results differ)"""
+        return (tuple(box), stroke_ids, with_confidence)
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        """Get cached result (None on miss)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple, result: Dict):
+        """Store result for key"""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        self._added[key] = result
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def entries(self, stroke_ids: Optional[Set[int]] = None) -> Dict:
+        """
+        Copy of cached entries (oldest first)
+
+        Args:
+            stroke_ids: Only entries whose strokes are all in this set
+                        (the strokes on the board - other entries cannot match)
+        """
+        if stroke_ids is None:
+            return dict(self._entries)
+        return {key: result for key, result in self._entries.items() if stroke_ids.issuperset(key[1])}
+
+    def load(self, entries: Dict):
+        """Replace contents with entries (e.g. a snapshot from the main process)"""
+        self._entries = OrderedDict(entries)
+        self._added = {}
+
+    def update(self, entries: Dict):
+        """Merge entries (e.g. new results from an OCR worker)"""
+        for key, result in entries.items():
+            self.put(key, result)
+        self._added = {}
+
+    def take_added(self) -> Dict:
+        """Entries added since the last load/update/take_added"""
+        added, self._added = self._added, {}
+        return added
+
+    def clear(self):
+        """Drop all cached results"""
+        self._entries.clear()
+        self._added = {}
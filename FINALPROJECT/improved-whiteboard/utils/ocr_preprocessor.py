@@ -0,0 +1,141 @@
+"""
+OCR Preprocessing Pipeline
+One grayscale -> invert -> threshold -> clean -> upscale chain shared by
+every TextRecognizer method
+
+Full-canvas buffers are allocated once and reused, and the result is
+memoised by canvas version, so asking for text twice on an unchanged
+canvas preprocesses it only once.
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import config
+
+
+class OCRPreprocessor:
+    def __init__(self):
+        """Initialize preprocessing pipeline (buffers are sized on first use)"""
+        self.kernel = np.ones((2, 2), np.uint8)
+        merge_w, merge_h = config.OCR_REGION_MERGE_KERNEL
+        self.merge_kernel = np.ones((merge_h, merge_w), np.uint8)
+
+        # Reused full-canvas buffers
+        self._gray = None
+        self._ink = None
+
+        # Memoised result for the last canvas version
+        self._cached_version = None
+        self._cached_result = None
+
+    def _ensure_buffers(self, shape: Tuple[int, int]):
+        """(Re)allocate buffers if the canvas size changed"""
+        if self._gray is None or self._gray.shape != shape:
+            self._gray = np.empty(shape, dtype=np.uint8)
+            self._ink = np.empty(shape, dtype=np.uint8)
+            self._cached_version = None
+
+    def process(self, canvas: np.ndarray, version: Optional[int] = None) -> Dict:
+        """
+        Find text regions and preprocess each one for OCR
+
+        Args:
+            canvas: BGR canvas image
+            version: Canvas version (Canvas.version - unique across canvases, so
+                     one preprocessor can serve several rooms); if it matches
+                     the last call, the memoised result is returned without any work
+
+        Returns:
+            dict: {'gray': grayscale canvas (reused buffer - valid until the next call),
+                   'regions': [(x, y, w, h), ...],
+                   'images': [upscaled black-on-white region image, ...]}
+        """
+        if version is not None and version == self._cached_version:
+            return self._cached_result
+
+        self._ensure_buffers(canvas.shape[:2])
+        gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+        regions = self.find_regions(gray)
+        images = [self.preprocess_region(gray, box) for box in regions]
+
+        result = {'gray': gray, 'regions': regions, 'images': images}
+        self._cached_version = version
+        self._cached_result = result
+        return result
+
+    def find_regions(self, gray: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """
+        Ink bounding box -> dilate letters together -> connected components
+
+        Returns:
+            list: (x, y, w, h) boxes in reading order (top to bottom, left to right)
+        """
+        # Ink = pixels that end up black after invert + threshold
+        self._ensure_buffers(gray.shape)
+        _, ink = cv2.threshold(gray, 254 - config.OCR_BINARY_THRESHOLD, 255, cv2.THRESH_BINARY, dst=self._ink)
+
+        # Step 1: Crop to the bounding box of all ink (empty canvas -> no regions)
+        ink_points = cv2.findNonZero(ink)
+        if ink_points is None:
+            return []
+        bx, by, bw, bh = cv2.boundingRect(ink_points)
+
+        # Leave room for the dilation so a region's box never depends on far-away ink
+        height, width = gray.shape
+        kh, kw = self.merge_kernel.shape
+        x_end, y_end = min(bx + bw + kw, width), min(by + bh + kh, height)
+        bx, by = max(bx - kw, 0), max(by - kh, 0)
+        bw, bh = x_end - bx, y_end - by
+
+        # Step 2: Smear letters horizontally so each word/line becomes one component
+        merged = cv2.dilate(ink[by:by + bh, bx:bx + bw], self.merge_kernel)
+
+        # Step 3: One region per connected component
+        _, _, stats, _ = cv2.connectedComponentsWithStats(merged, connectivity=8)
+
+        pad = config.OCR_REGION_PADDING
+        regions = []
+        for x, y, w, h, area in stats[1:]:  # Skip background label 0
+            if area < config.OCR_REGION_MIN_AREA:
+                continue
+            x0 = max(bx + x - pad, 0)
+            y0 = max(by + y - pad, 0)
+            x1 = min(bx + x + w + pad, width)
+            y1 = min(by + y + h + pad, height)
+            regions.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0)))
+
+        regions.sort(key=lambda box: (box[1], box[0]))
+        return regions
+
+    def preprocess_region(self, gray: np.ndarray, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """Invert -> threshold -> clean -> upscale ONE region"""
+        x, y, w, h = box
+        return self._chain(gray[y:y + h, x:x + w])[-1][1]
+
+    def _chain(self, gray: np.ndarray) -> List[Tuple[str, np.ndarray]]:
+        """The preprocessing chain, returning every intermediate step"""
+        # Make text black on white background
+        inverted = cv2.bitwise_not(gray)
+        _, binary = cv2.threshold(inverted, config.OCR_BINARY_THRESHOLD, 255, cv2.THRESH_BINARY)
+
+        # Clean up noise
+        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self.kernel)
+
+        # Tesseract works better with larger text - scale up
+        height, width = cleaned.shape
+        scale = config.OCR_SCALE
+        resized = cv2.resize(cleaned, (width * scale, height * scale), interpolation=cv2.INTER_CUBIC)
+
+        return [
+            ('Inverted', inverted),
+            ('Binary (Black & White)', binary),
+            ('Cleaned', cleaned),
+            ('Final (What OCR Sees)', resized)
+        ]
+
+    def full_canvas_steps(self, canvas: np.ndarray) -> List[Tuple[str, np.ndarray]]:
+        """Every preprocessing step applied to the whole canvas (for debugging)"""
+        gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
+        return [('Original Canvas', canvas), ('Grayscale', gray)] + self._chain(gray)
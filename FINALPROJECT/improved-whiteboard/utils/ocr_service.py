@@ -0,0 +1,169 @@
+"""
+OCR Service
+Runs text recognition in a pool of long-lived worker processes
+
+Each worker creates ONE TextRecognizer (and Tesseract engine, if tesserocr
+is installed) and reuses it for every request. Canvas images are handed
+over in memory - nothing is written to disk. Callers get a Future back
+immediately, so the video loop never waits for OCR.
+
+Without tesserocr, pytesseract still launches the tesseract program for
+every region: the pool then runs requests in parallel across cores, but a
+single request is no faster.
+
+The server starts one service for all rooms (start_ocr_service(), used by
+POST /api/recognize-text); test_whiteboard.py creates its own.
+
+Region results are cached in the main process (see utils/ocr_cache.py) and
+handed to whichever worker picks up the next request, so the cache works no
+matter how requests are spread over the workers.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Optional
+import numpy as np
+import config
+from utils.text_recognizer import TextRecognizer
+from utils.ocr_cache import OCRRegionCache
+
+# Recognizer owned by each worker process
+_worker_recognizer = None
+
+# Service shared by every room of the server (see start_ocr_service)
+_service = None
+
+
+def _init_worker():
+    """Create the worker's persistent TextRecognizer"""
+    global _worker_recognizer
+    _worker_recognizer = TextRecognizer()
+
+
+def _run_ocr(method: str, canvas: np.ndarray, version: Optional[int] = None,
+             strokes=None, cached: Optional[dict] = None):
+    """
+    Run one OCR request inside a worker
+
+    Returns:
+        (method result, region cache entries added by this request)
+    """
+    try:
+        if cached is not None:
+            _worker_recognizer.region_cache.load(cached)
+        result = getattr(_worker_recognizer, method)(canvas, version=version, strokes=strokes)
+        return result, _worker_recognizer.region_cache.take_added()
+    except Exception as e:
+        # Some pytesseract errors cannot be pickled back to the parent process
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+class OCRService:
+    def __init__(self, num_workers: int = config.OCR_WORKERS, max_pending: int = config.OCR_MAX_PENDING):
+        """
+        Start OCR worker pool
+
+        Args:
+            num_workers: Worker processes (None = number of CPU cores)
+            max_pending: Maximum queued + running requests
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+
+        # 'spawn': forking a process that runs server threads (or eventlet) is unsafe
+        self.executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        # Start every worker (and its recognizer) now rather than inside the first request
+        for future in [self.executor.submit(int) for _ in range(self.num_workers)]:
+            future.result()
+
+        self._pending = 0
+        self._lock = threading.Lock()
+        
+        # Region results shared by all workers
+        self.region_cache = OCRRegionCache()
+
+    def submit(self, canvas: np.ndarray, method: str = 'recognize_with_confidence',
+               version: Optional[int] = None, strokes=None) -> Optional[Future]:
+        """
+        Queue a canvas for OCR (returns immediately)
+
+        Args:
+            canvas: BGR canvas image - a copy the caller no longer changes (taken
+                    together with version and strokes, so all three match)
+            method: TextRecognizer method to run
+                    ('recognize_with_confidence' or 'recognize_from_canvas')
+            version: Canvas version (Canvas.version) - lets a worker reuse
+                     its preprocessing for an unchanged canvas
+            strokes: StrokeManager.get_stroke_bounds() - only regions whose
+                     strokes changed since an earlier request are OCR'd
+
+        Returns:
+            Future with the method's result, or None if the queue is full
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                print("⚠️ OCR busy - request dropped")
+                return None
+            self._pending += 1
+
+            # Only the results a worker could reuse for these strokes
+            cached = None
+            if strokes is not None:
+                cached = self.region_cache.entries({stroke_id for stroke_id, _ in strokes})
+
+        task = self.executor.submit(_run_ocr, method, canvas, version, strokes, cached)
+        
+        # Caller's future resolves to the method result alone
+        future = Future()
+        task.add_done_callback(lambda done: self._on_done(done, future))
+        return future
+
+    def _on_done(self, task: Future, future: Future):
+        """Free a queue slot, keep new region results and resolve the caller's future"""
+        with self._lock:
+            self._pending -= 1
+
+        if task.cancelled():
+            future.cancel()
+            return
+        error = task.exception()
+        if error is not None:
+            future.set_exception(error)
+            return
+
+        result, added = task.result()
+        with self._lock:
+            self.region_cache.update(added)
+        future.set_result(result)
+
+    @property
+    def pending(self) -> int:
+        """Number of queued + running requests"""
+        return self._pending
+
+    def shutdown(self):
+        """Stop all workers"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def start_ocr_service():
+    """Start the server's OCR service (once, at startup, from the main thread)"""
+    global _service
+    if _service is None:
+        _service = OCRService()
+
+
+def get_ocr_service() -> Optional[OCRService]:
+    """The server's OCR service, or None if it was not started"""
+    return _service
+
+
+def shutdown_ocr_service():
+    """Stop the server's OCR service (if started)"""
+    global _service
+    if _service is not None:
+        _service.shutdown()
+        _service = None
@@ -0,0 +1,38 @@
+"""
+Blocking Call Offload
+Keeps CPU-heavy calls (camera read, MediaPipe, JPEG encoding) off the event loop
+
+In async server mode (eventlet/gevent, see run_server.py) every socket
+client and every video loop is a green thread on ONE OS thread, so a long
+C call would stall all of them. offload() runs such a call on the async
+library's native thread pool and lets the other green threads run
+meanwhile. In threading mode it simply calls the function - every video
+loop already has its own thread.
+"""
+
+from typing import Callable
+
+# Set by the app from socketio.async_mode
+_async_mode = 'threading'
+
+
+def set_async_mode(mode: str):
+    """Select how offload() runs calls ('threading', 'eventlet' or 'gevent')"""
+    global _async_mode
+    _async_mode = mode
+
+
+def offload(func: Callable, *args, **kwargs):
+    """
+    Run a blocking/CPU-heavy call without blocking other clients
+
+    Returns:
+        Whatever func returns (exceptions are re-raised)
+    """
+    if _async_mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args, **kwargs)
+    if _async_mode == 'gevent':
+        import gevent
+        return gevent.get_hub().threadpool.apply(func, args, kwargs)
+    return func(*args, **kwargs)
@@ -0,0 +1,239 @@
+"""
+Replay Source
+Recorded input instead of a camera - a video file or a landmark session
+
+ReplaySource has the cv2.VideoCapture methods VideoHandler uses (isOpened,
+read, set, release), so the whole pipeline runs on it unchanged:
+
+- Video file: frames are decoded and fed in; MediaPipe runs on them as
+  on camera frames.
+- Landmark session (.npz, written by SessionRecorder or save_session):
+  hand landmarks with timestamps. Frames are a plain background and
+  MediaPipe is replaced by the recorded landmarks (ReplayHands), so
+  replays are deterministic and need no model.
+
+realtime=True paces frames by their timestamps (like a presenter in front
+of a camera): the caller waits time_until_next() between reads - the
+stream loop does that with socketio.sleep, so waiting never blocks other
+clients. realtime=False feeds frames as fast as the pipeline runs.
+"""
+
+import os
+import time
+from types import SimpleNamespace
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+import config
+
+SESSION_EXTENSION = '.npz'
+
+
+def save_session(path: str, stream: List[np.ndarray], timestamps: Optional[List[float]] = None):
+    """
+    Write a landmark session
+
+    Args:
+        path: .npz file
+        stream: One (hands, 21, 3) normalized landmark array per frame
+        timestamps: Seconds of every frame (None = evenly at config.CAMERA_FPS)
+    """
+    counts = np.array([len(hands) for hands in stream], dtype=int)
+    landmarks = np.concatenate(stream) if counts.sum() else np.zeros((0, 21, 3))
+    if timestamps is None:
+        timestamps = np.arange(len(stream)) / config.CAMERA_FPS
+    timestamps = np.asarray(timestamps, dtype=float)
+    np.savez_compressed(path, landmarks=landmarks.astype(np.float32), counts=counts,
+                        timestamps=timestamps - (timestamps[0] if len(timestamps) else 0.0))
+
+
+def load_session(path: str) -> Tuple[List[np.ndarray], np.ndarray]:
+    """
+    Read a landmark session
+
+    Returns:
+        (stream, timestamps): per-frame (hands, 21, 3) arrays and seconds from the first frame
+    """
+    data = np.load(path)
+    counts = data['counts']
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    landmarks = data['landmarks'].astype(float)
+    stream = [landmarks[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+    timestamps = data['timestamps'] if 'timestamps' in data else np.arange(len(counts)) / config.CAMERA_FPS
+    return stream, timestamps
+
+
+def resolve_replay_path(name: str) -> Optional[str]:
+    """
+    Replay file in config.REPLAY_FOLDER (names only - clients cannot point elsewhere)
+
+    Returns:
+        str path, or None if there is no such file
+    """
+    path = os.path.join(config.REPLAY_FOLDER, os.path.basename(str(name)))
+    return path if os.path.isfile(path) else None
+
+
+class ReplayHands:
+    """Stands in for MediaPipe's Hands: returns the landmarks of the frame last read from a source"""
+
+    def __init__(self, source: 'ReplaySource'):
+        from mediapipe.framework.formats import landmark_pb2
+
+        # Same message types MediaPipe returns, so skeleton drawing works unchanged
+        self.frames = [
+            [landmark_pb2.NormalizedLandmarkList(landmark=[
+                landmark_pb2.NormalizedLandmark(x=x, y=y, z=z) for x, y, z in hand
+            ]) for hand in hands]
+            for hands in source.stream
+        ]
+        self.source = source
+
+    def process(self, rgb_frame):
+        hands = self.frames[self.source.index] if self.frames else []
+        return SimpleNamespace(multi_hand_landmarks=hands or None)
+
+    def close(self):
+        pass
+
+
+class ReplaySource:
+    def __init__(self, path: str, realtime: bool = True, loop: bool = config.REPLAY_LOOP,
+                 width: int = config.CAMERA_WIDTH, height: int = config.CAMERA_HEIGHT):
+        """
+        Open a recording
+
+        Args:
+            path: Video file, or landmark session (.npz)
+            realtime: Pace frames by their timestamps (False = as fast as read() is called)
+            loop: Start over at the end (False = read() fails at the end, like a camera that stopped)
+            width, height: Frame size handed to the pipeline
+        """
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.width = width
+        self.height = height
+
+        self.index = -1     # Frame last returned by read()
+        self.frames_read = 0
+        self.finished = False  # Reached the end (without loop)
+        self._capture = None
+        self._background = None
+        self.stream = None
+
+        if path.endswith(SESSION_EXTENSION):
+            self.stream, self.timestamps = load_session(path)
+            self._background = np.full((height, width, 3), 40, dtype=np.uint8)
+            self.frame_count = len(self.stream)
+        else:
+            self._capture = cv2.VideoCapture(path)
+            self.frame_count = int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+            fps = self._capture.get(cv2.CAP_PROP_FPS) or config.CAMERA_FPS
+            self.timestamps = None
+            self._frame_interval = 1.0 / fps
+
+        self._clock_start = None  # perf_counter() time of frame 0 of the current pass
+        self._pass_offset = 0.0   # Recording time at the start of the current pass (grows with every loop)
+
+    @property
+    def has_landmarks(self) -> bool:
+        """True if hands come from the recording (use hands() instead of MediaPipe)"""
+        return self.stream is not None
+
+    def hands(self) -> ReplayHands:
+        """MediaPipe stand-in that follows this source (landmark sessions only)"""
+        return ReplayHands(self)
+
+    def isOpened(self) -> bool:
+        if self._capture is not None:
+            return self._capture.isOpened()
+        return self.frame_count > 0
+
+    def set(self, prop_id, value) -> bool:
+        return False  # Size and FPS come from the recording
+
+    def _frame_time(self, index: int) -> float:
+        if self.timestamps is not None:
+            return float(self.timestamps[index])
+        return index * self._frame_interval
+
+    def _next_frame(self):
+        """(frame, index) of the next frame, or (None, None) at the end"""
+        if self._capture is not None:
+            success, frame = self._capture.read()
+            if not success:
+                return None, None
+            if frame.shape[1] != self.width or frame.shape[0] != self.height:
+                frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+            return frame, self.index + 1
+
+        index = self.index + 1
+        if index >= self.frame_count:
+            return None, None
+        # Plain background - the hands come from the recorded landmarks
+        return self._background.copy(), index
+
+    def _rewind(self):
+        if self._capture is not None:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._pass_offset += self._frame_time(self.index) + 1.0 / config.CAMERA_FPS
+        self.index = -1
+        self._clock_start = None
+
+    def read(self):
+        """Next frame (returns at once - pacing is time_until_next())"""
+        frame, index = self._next_frame()
+        if frame is None and self.loop and self.frames_read:
+            self._rewind()
+            frame, index = self._next_frame()
+        if frame is None:
+            self.finished = True
+            return False, None
+
+        self.index = index
+        self.frames_read += 1
+        if self._clock_start is None:
+            self._clock_start = time.perf_counter() - self._frame_time(index)
+        return True, frame
+
+    @property
+    def timestamp(self) -> float:
+        """Recording time of the frame last read, in seconds (keeps growing when looping)"""
+        return self._pass_offset + (self._frame_time(self.index) if self.index >= 0 else 0.0)
+
+    def time_until_next(self) -> float:
+        """Seconds until the next frame is due (0 = read now; always 0 when not realtime)"""
+        if not self.realtime or self._clock_start is None:
+            return 0.0
+        next_index = self.index + 1
+        if self.frame_count and next_index >= self.frame_count:
+            return 0.0  # Next pass starts its own clock
+        return max(0.0, self._clock_start + self._frame_time(next_index) - time.perf_counter())
+
+    def release(self):
+        if self._capture is not None:
+            self._capture.release()
+
+
+class SessionRecorder:
+    """Collects the landmarks VideoHandler sees, for saving as a replayable session"""
+
+    def __init__(self):
+        self.stream = []
+        self.timestamps = []
+
+    def add(self, landmark_array: np.ndarray):
+        self.stream.append(np.array(landmark_array, copy=True))
+        self.timestamps.append(time.perf_counter())
+
+    def save(self, path: str) -> int:
+        """
+        Write the session
+
+        Returns:
+            int: Frames saved
+        """
+        save_session(path, self.stream, self.timestamps or None)
+        return len(self.stream)
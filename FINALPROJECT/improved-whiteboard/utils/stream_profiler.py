@@ -0,0 +1,235 @@
+"""
+Stream Profiler
+On-demand profiling of a room's video loop (POST /admin/profile)
+
+The stream loop calls frame_started()/frame_finished() around every
+process_frame(); both return at once unless a capture is running. A
+capture lasts a given number of seconds and is one of:
+
+- 'sample': a sampler thread reads the loop's stack every
+  config.PROFILE_SAMPLE_INTERVAL seconds while a frame is being processed
+  and counts collapsed stacks ("stream_video (app.py:170);process_frame
+  (video_handler.py:222);_draw_ui (video_handler.py:330) 42",
+  the input of flamegraph.pl and speedscope). The loop does no extra
+  work, so this is safe on a busy room.
+- 'cprofile': cProfile runs in the loop's thread during frames and the
+  result is pstats. Exact call counts, but every Python call is traced,
+  so frames get noticeably slower while it runs.
+
+Either can add tracemalloc: memory is snapshotted at the start and end of
+every frame, giving per-frame peak/net allocation and the source lines
+that keep memory across frames.
+
+One capture runs at a time in the process (cProfile and tracemalloc are
+process-wide). In async server mode the calls offloaded to the thread
+pool (capture, inference, encode) run on pool threads and are not in the
+samples; their time is in the per-stage /metrics.
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Optional
+
+import numpy as np
+import config
+from utils.offload import offload
+
+PROFILE_MODES = ('sample', 'cprofile')
+
+# One capture at a time in the process
+_capture_lock = threading.Lock()
+
+# tracemalloc's own allocations are not the pipeline's
+_TRACEMALLOC_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+
+def _frame_name(frame) -> str:
+    """"function (file.py:line)" - the line shows where C calls (OpenCV, NumPy) spend their time"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _percentiles_kb(values) -> Dict[str, float]:
+    values = np.asarray(values, dtype=float) / 1024
+    if not len(values):
+        return {'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    p50, p95 = np.percentile(values, [50, 95])
+    return {'p50': round(float(p50), 1), 'p95': round(float(p95), 1), 'max': round(float(values.max()), 1)}
+
+
+class _Capture:
+    """One running capture, shared by the stream loop and the caller of run()"""
+
+    def __init__(self, mode: str, trace_memory: bool):
+        self.mode = mode
+        self.trace_memory = trace_memory
+        self.stopped = False
+        self.frames = 0
+
+        self.thread_id = None  # OS thread of the loop (found on the first frame)
+        self.root = None       # Loop's frame object while a frame is processed, else None
+        self.idle = threading.Event()  # Set while no frame is being processed
+        self.idle.set()
+
+        self.profile = cProfile.Profile() if mode == 'cprofile' else None
+        self.stacks = Counter()  # Collapsed stack -> samples
+        self.off_loop = 0        # Samples taken while the loop's thread ran something else
+
+        self.frame_memory = []      # (peak, net) bytes allocated per frame
+        self.line_sizes = Counter()  # "file:line" -> bytes kept by frames
+        self.line_blocks = Counter()
+        self.snapshot = None
+        self.start_memory = 0
+
+
+class StreamProfiler:
+    def __init__(self):
+        """Initialize profiler (idle until run() is called)"""
+        self._capture = None
+        self._frame_capture = None  # Capture the frame in progress belongs to
+
+    def frame_started(self):
+        """Called by the stream loop right before process_frame()"""
+        capture = self._capture
+        if capture is None:
+            return
+        capture.idle.clear()
+        if capture.stopped:  # run() is collecting results
+            capture.idle.set()
+            return
+        self._frame_capture = capture
+
+        if capture.thread_id is None:
+            me = sys._getframe()
+            capture.thread_id = next((ident for ident, frame in sys._current_frames().items() if frame is me), None)
+        if capture.trace_memory and tracemalloc.is_tracing():
+            capture.snapshot = tracemalloc.take_snapshot().filter_traces(_TRACEMALLOC_FILTERS)
+            tracemalloc.reset_peak()
+            capture.start_memory = tracemalloc.get_traced_memory()[0]
+
+        capture.root = sys._getframe(1)
+        if capture.profile is not None:
+            capture.profile.enable()
+
+    def frame_finished(self):
+        """Called by the stream loop right after process_frame()"""
+        capture, self._frame_capture = self._frame_capture, None
+        if capture is None:
+            return
+        if capture.profile is not None:
+            capture.profile.disable()
+        capture.root = None
+
+        # run() stops tracemalloc if it gave up waiting for this frame - then the frame is not measured
+        if capture.trace_memory and capture.snapshot is not None and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            capture.frame_memory.append((peak - capture.start_memory, current - capture.start_memory))
+            snapshot = tracemalloc.take_snapshot().filter_traces(_TRACEMALLOC_FILTERS)
+            for stat in snapshot.compare_to(capture.snapshot, 'lineno'):
+                if stat.size_diff > 0:
+                    line = str(stat.traceback[0])
+                    capture.line_sizes[line] += stat.size_diff
+                    capture.line_blocks[line] += max(stat.count_diff, 0)
+            capture.snapshot = None
+
+        capture.frames += 1
+        capture.idle.set()
+
+    def _sample(self, capture: _Capture, seconds: float, interval: float):
+        """Sample the loop's stack until the capture ends (runs on its own OS thread)"""
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            root = capture.root
+            if root is not None and capture.thread_id is not None:
+                frame = sys._current_frames().get(capture.thread_id)
+                stack = []
+                while frame is not None and frame is not root:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if frame is None:
+                    # Another green thread is running, or the frame just ended
+                    capture.off_loop += 1
+                else:
+                    stack.append(_frame_name(root))
+                    capture.stacks[';'.join(reversed(stack))] += 1
+            time.sleep(interval)
+
+    def run(self, mode: str, seconds: float, interval: float = config.PROFILE_SAMPLE_INTERVAL,
+            trace_memory: bool = False) -> Optional[Dict]:
+        """
+        Profile the stream loop (blocks for `seconds`)
+
+        Args:
+            mode: 'sample' or 'cprofile'
+            seconds: Capture length
+            interval: Seconds between stack samples ('sample' mode)
+            trace_memory: Also snapshot memory with tracemalloc every frame
+
+        Returns:
+            dict with 'mode', 'seconds', 'frames' and
+            'samples', 'off_loop_samples', 'collapsed' ('sample'), or
+            'stats' (text, top config.PROFILE_TOP_N by cumulative time), 'pstats' (bytes) ('cprofile'),
+            plus 'memory' with trace_memory - or None if another capture is running
+        """
+        if not _capture_lock.acquire(blocking=False):
+            return None
+
+        started_tracing = trace_memory and not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start()
+            capture = _Capture(mode, trace_memory)
+            start = time.perf_counter()
+            self._capture = capture
+            if mode == 'sample':
+                # Needs a real OS thread - in async mode the loop shares this one
+                offload(self._sample, capture, seconds, interval)
+            else:
+                time.sleep(seconds)
+
+            capture.stopped = True
+            self._capture = None
+            if not capture.idle.wait(5.0):  # Let a frame in progress finish
+                print("⚠️ Profiler: frame still running after the capture, results may be incomplete")
+            elapsed = time.perf_counter() - start
+            return self._result(capture, elapsed)
+        finally:
+            self._capture = None
+            if started_tracing:
+                tracemalloc.stop()
+            _capture_lock.release()
+
+    def _result(self, capture: _Capture, seconds: float) -> Dict:
+        result = {'mode': capture.mode, 'seconds': round(seconds, 2), 'frames': capture.frames}
+
+        if capture.mode == 'sample':
+            result['samples'] = sum(capture.stacks.values())
+            result['off_loop_samples'] = capture.off_loop
+            result['collapsed'] = '\n'.join(f"{stack} {count}" for stack, count in capture.stacks.most_common())
+        else:
+            capture.profile.create_stats()
+            result['pstats'] = marshal.dumps(capture.profile.stats)  # Same as a pstats dump_stats() file
+            text = io.StringIO()
+            if capture.profile.stats:
+                pstats.Stats(capture.profile, stream=text).sort_stats('cumulative').print_stats(config.PROFILE_TOP_N)
+            result['stats'] = text.getvalue()
+
+        if capture.trace_memory:
+            frames = max(capture.frames, 1)
+            result['memory'] = {
+                'peak_kb': _percentiles_kb([peak for peak, net in capture.frame_memory]),
+                'net_kb': _percentiles_kb([net for peak, net in capture.frame_memory]),
+                'per_frame_kb': [[round(peak / 1024, 1), round(net / 1024, 1)] for peak, net in capture.frame_memory],
+                'top_lines': [{'line': line, 'kb_per_frame': round(size / 1024 / frames, 2),
+                               'blocks_per_frame': round(capture.line_blocks[line] / frames, 1)}
+                              for line, size in capture.line_sizes.most_common(config.PROFILE_TOP_N)]
+            }
+        return result
@@ -3,91 +3,230 @@ Text Recognition Module
 Converts hand-written text on canvas to digital text using OCR
 """
 
+import os
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 from PIL import Image
 import pytesseract
+import config
+from utils.ocr_preprocessor import OCRPreprocessor
+from utils.ocr_cache import OCRRegionCache, region_stroke_ids
+
+# Optional: tesserocr keeps one Tesseract engine loaded in-process
+# instead of launching the tesseract CLI for every call (see requirements.txt;
+# without it every call pays for starting tesseract)
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 class TextRecognizer:
-    def __init__(self):
-        """Initialize text recognizer"""
+    def __init__(self, save_debug_image: bool = config.OCR_SAVE_DEBUG_IMAGE,
+                 parallel_regions: bool = config.OCR_PARALLEL_REGIONS):
+        """
+        Initialize text recognizer
+        
+        Args:
+            save_debug_image: Write the preprocessed image to disk on every call
+            parallel_regions: OCR text regions in parallel threads
+        """
         # Configure Tesseract path (uncomment for Windows)
         # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-        pass
+        self.save_debug_image = save_debug_image
+        self.parallel_regions = parallel_regions
+        self._region_pool = None
+        
+        # Shared preprocessing (memoised per canvas version)
+        self.preprocessor = OCRPreprocessor()
+        
+        # Per-region results, reused while a region's strokes are unchanged
+        self.region_cache = OCRRegionCache()
+        
+        # Persistent engine (only if tesserocr is installed)
+        self.api = None
+        if tesserocr is not None:
+            self.api = tesserocr.PyTessBaseAPI(oem=tesserocr.OEM.DEFAULT)
+    
+    def _image_to_string(self, image: np.ndarray, psm: int) -> str:
+        """Run OCR on a preprocessed (binary) image and return the text"""
+        if self.api is not None:
+            self.api.SetPageSegMode(psm)
+            self.api.SetImage(Image.fromarray(image))
+            return self.api.GetUTF8Text()
+        
+        custom_config = f'--oem 3 --psm {psm}'
+        return pytesseract.image_to_string(Image.fromarray(image), config=custom_config)
     
-    def recognize_from_canvas(self, canvas):
+    def _image_to_words(self, image: np.ndarray, psm: int = 3):
+        """
+        Run OCR on a preprocessed (binary) image and return words with confidence
+        
+        Returns:
+            (words, confidences, details) - details is the raw engine output
+        """
+        if self.api is not None:
+            self.api.SetPageSegMode(psm)
+            self.api.SetImage(Image.fromarray(image))
+            pairs = self.api.MapWordConfidences()
+            words = [word for word, _ in pairs]
+            confidences = [float(conf) for _, conf in pairs]
+            return words, confidences, {'text': words, 'conf': confidences}
+        
+        data = pytesseract.image_to_data(Image.fromarray(image), config=f'--oem 3 --psm {psm}',
+                                         output_type=pytesseract.Output.DICT)
+        confidences = [float(conf) for conf in data['conf']]
+        return data['text'], confidences, data
+    
+    def close(self):
+        """Release the persistent Tesseract engine (if any)"""
+        if self.api is not None:
+            self.api.End()
+            self.api = None
+        if self._region_pool is not None:
+            self._region_pool.shutdown()
+            self._region_pool = None
+    
+    def find_text_regions(self, canvas, version=None) -> List[Tuple[int, int, int, int]]:
+        """
+        Find boxes around groups of ink (words / lines of text)
+        
+        Args:
+            canvas: numpy array (BGR image) - the PURE canvas
+            version: Canvas version (skips preprocessing if unchanged)
+            
+        Returns:
+            list: (x, y, w, h) boxes in reading order (top to bottom, left to right)
+        """
+        return self.preprocessor.process(canvas, version)['regions']
+    
+    def _map_regions(self, func, images):
+        """Run func over region images, in parallel threads if enabled"""
+        # A single tesserocr engine is not thread-safe; pytesseract runs one
+        # tesseract process per call, so threads overlap nicely
+        if not self.parallel_regions or self.api is not None or len(images) < 2:
+            return [func(image) for image in images]
+        
+        if self._region_pool is None:
+            self._region_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        return list(self._region_pool.map(func, images))
+    
+    def _save_debug_image(self, canvas, regions):
+        """Save preprocessed canvas with region boxes (what OCR sees, and where)"""
+        binary = dict(self.preprocessor.full_canvas_steps(canvas))['Binary (Black & White)']
+        debug = cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
+        for x, y, w, h in regions:
+            cv2.rectangle(debug, (x, y), (x + w, y + h), (0, 0, 255), 2)
+        cv2.imwrite(config.OCR_DEBUG_IMAGE_PATH, debug)
+        print(f"💾 Saved preprocessed image: {config.OCR_DEBUG_IMAGE_PATH}")
+    
+    def recognize_regions(self, canvas, with_confidence: bool = False, version=None,
+                          strokes=None) -> List[Dict]:
+        """
+        Crop canvas to text regions and run OCR on each region
+        
+        Args:
+            canvas: numpy array (BGR image) - the PURE canvas, not video overlay
+            with_confidence: Also collect word confidences (slower OCR mode)
+            version: Canvas version (Canvas.version) - preprocessing is reused
+                     while it stays the same
+            strokes: [(stroke id, bounds), ...] from StrokeManager.get_stroke_bounds -
+                     if given, only regions whose strokes changed are OCR'd
+            
+        Returns:
+            list of {'box': (x, y, w, h), 'text': str, 'confidence': float or None,
+                     'words': [(word, confidence), ...],
+                     'details': raw OCR output (None for regions taken from the cache)}
+        """
+        prepared = self.preprocessor.process(canvas, version)
+        regions = prepared['regions']
+        images = prepared['images']
+        
+        if self.save_debug_image:
+            self._save_debug_image(canvas, regions)
+        
+        # Look up regions whose strokes haven't changed
+        results = [None] * len(regions)
+        keys = [None] * len(regions)
+        if strokes is not None:
+            for i, (box, ids) in enumerate(zip(regions, region_stroke_ids(regions, strokes))):
+                keys[i] = OCRRegionCache.make_key(box, ids, with_confidence)
+                results[i] = self.region_cache.get(keys[i])
+        
+        todo = [i for i, result in enumerate(results) if result is None]
+        
+        # PSM 7 = single line of text (each region is one word/line)
+        todo_images = [images[i] for i in todo]
+        if with_confidence:
+            outputs = self._map_regions(lambda image: self._image_to_words(image, psm=7), todo_images)
+        else:
+            outputs = self._map_regions(lambda image: self._image_to_string(image, psm=7), todo_images)
+        
+        for i, output in zip(todo, outputs):
+            if with_confidence:
+                words, confidences, data = output
+                # Keep only high-confidence words (> 60%)
+                kept = [(word, conf) for word, conf in zip(words, confidences)
+                        if conf > 60 and word.strip()]
+                text = ' '.join(word for word, _ in kept)
+                confidence = sum(conf for _, conf in kept) / len(kept) if kept else 0
+            else:
+                kept, data = [], output
+                text = output
+                confidence = None
+            
+            results[i] = {
+                'box': regions[i],
+                'text': text.strip(),
+                'confidence': confidence,
+                'words': kept,
+                'details': data
+            }
+            if keys[i] is not None:
+                # Raw OCR output is not cached - it is large and only needed for new regions
+                self.region_cache.put(keys[i], dict(results[i], details=None))
+        
+        return results
+    
+    def recognize_from_canvas(self, canvas, version=None, strokes=None):
         """
         Recognize text from canvas drawing
         
         Args:
             canvas: numpy array (BGR image) - the PURE canvas, not video overlay
+            version: Canvas version (optional, avoids repeated preprocessing)
+            strokes: Stroke ids and bounds (optional, enables the region cache)
             
         Returns:
             str: Recognized text
         """
-        # Step 1: Convert canvas to grayscale
-        gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
-        
-        # Step 2: Invert (make text black on white background)
-        # Currently: colored text on black background
-        # OCR needs: black text on white background
-        inverted = cv2.bitwise_not(gray)
-        
-        # Step 3: Apply threshold to make it pure black and white
-        _, binary = cv2.threshold(inverted, 50, 255, cv2.THRESH_BINARY)
-        
-        # Step 4: Optional - Clean up noise
-        # Use morphological operations to remove small noise
-        kernel = np.ones((2, 2), np.uint8)
-        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        
-        # Step 5: Resize for better OCR (Tesseract works better with larger text)
-        # Scale up 2x
-        height, width = cleaned.shape
-        resized = cv2.resize(cleaned, (width * 2, height * 2), interpolation=cv2.INTER_CUBIC)
-        
-        # Step 6: Save preprocessed image (for debugging)
-        cv2.imwrite('preprocessed_for_ocr.png', resized)
-        print("💾 Saved preprocessed image: preprocessed_for_ocr.png")
-        
-        # Step 7: Convert to PIL Image
-        pil_image = Image.fromarray(resized)
-        
-        # Step 8: Run Tesseract OCR
-        # Configure Tesseract for better handwriting recognition
-        custom_config = r'--oem 3 --psm 7'  # PSM 7 = single line of text
-        text = pytesseract.image_to_string(pil_image, config=custom_config)
-        
-        return text.strip()
+        regions = self.recognize_regions(canvas, version=version, strokes=strokes)
+        return ' '.join(region['text'] for region in regions if region['text'])
     
-    def recognize_with_confidence(self, canvas):
+    def recognize_with_confidence(self, canvas, version=None, strokes=None):
         """
         Recognize text with confidence scores
         
+        Args:
+            canvas: numpy array (BGR image) - the PURE canvas, not video overlay
+            version: Canvas version (optional, avoids repeated preprocessing)
+            strokes: Stroke ids and bounds (optional, enables the region cache)
+        
         Returns:
-            dict: {'text': str, 'confidence': float, 'details': list}
+            dict: {'text': str, 'confidence': float, 'details': list (None for cached regions),
+                   'regions': [{'box': (x, y, w, h), 'text': str, 'confidence': float}, ...]}
         """
-        # Preprocess
-        gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
-        inverted = cv2.bitwise_not(gray)
-        _, binary = cv2.threshold(inverted, 50, 255, cv2.THRESH_BINARY)
-        kernel = np.ones((2, 2), np.uint8)
-        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        height, width = cleaned.shape
-        resized = cv2.resize(cleaned, (width * 2, height * 2), interpolation=cv2.INTER_CUBIC)
-        pil_image = Image.fromarray(resized)
-        
-        # Get detailed results with confidence
-        data = pytesseract.image_to_data(pil_image, output_type=pytesseract.Output.DICT)
-        
-        # Extract text with confidence > 60%
+        regions = self.recognize_regions(canvas, with_confidence=True, version=version, strokes=strokes)
+        
+        # Combine high-confidence words from every region
         text_parts = []
         confidences = []
         
-        for i in range(len(data['text'])):
-            if int(data['conf'][i]) > 60:  # Only high-confidence text
-                text_parts.append(data['text'][i])
-                confidences.append(data['conf'][i])
+        for region in regions:
+            for word, confidence in region['words']:
+                text_parts.append(word)
+                confidences.append(confidence)
         
         full_text = ' '.join(text_parts)
         avg_confidence = sum(confidences) / len(confidences) if confidences else 0
@@ -95,7 +234,11 @@ class TextRecognizer:
         return {
             'text': full_text.strip(),
             'confidence': avg_confidence,
-            'details': data
+            'details': [region['details'] for region in regions],
+            'regions': [
+                {'box': region['box'], 'text': region['text'], 'confidence': region['confidence']}
+                for region in regions
+            ]
         }
     
     def preprocess_and_show(self, canvas):
@@ -103,30 +246,9 @@ class TextRecognizer:
         Show preprocessing steps for debugging
         Useful to see what Tesseract actually sees
         """
-        # Original
-        cv2.imshow('1. Original Canvas', canvas)
-        
-        # Grayscale
-        gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
-        cv2.imshow('2. Grayscale', gray)
-        
-        # Inverted
-        inverted = cv2.bitwise_not(gray)
-        cv2.imshow('3. Inverted', inverted)
-        
-        # Binary
-        _, binary = cv2.threshold(inverted, 50, 255, cv2.THRESH_BINARY)
-        cv2.imshow('4. Binary (Black & White)', binary)
-        
-        # Cleaned
-        kernel = np.ones((2, 2), np.uint8)
-        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        cv2.imshow('5. Cleaned', cleaned)
-        
-        # Resized
-        height, width = cleaned.shape
-        resized = cv2.resize(cleaned, (width * 2, height * 2), interpolation=cv2.INTER_CUBIC)
-        cv2.imshow('6. Final (What OCR Sees)', resized)
+        steps = self.preprocessor.full_canvas_steps(canvas)
+        for i, (name, image) in enumerate(steps, start=1):
+            cv2.imshow(f'{i}. {name}', image)
         
         cv2.waitKey(0)
         cv2.destroyAllWindows()
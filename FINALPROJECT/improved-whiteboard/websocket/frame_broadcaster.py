@@ -0,0 +1,162 @@
+"""
+Frame Broadcaster
+Encodes each video frame once per quality tier and fans it out to viewers
+
+Viewers of a tier share one Socket.IO room, so a frame is resized, JPEG
+encoded, base64'd and packet-encoded ONCE per tier no matter how many
+viewers watch it. Tiers nobody watches are not encoded at all.
+
+Slow viewers are not queued for: clients acknowledge frames ('frame_ack'),
+and a viewer with config.VIDEO_MAX_IN_FLIGHT unacknowledged frames simply
+skips frames until it catches up. Frames that stay unacknowledged for
+config.VIDEO_ACK_TIMEOUT seconds count as lost, so a viewer whose acks got
+lost starts receiving again. Clients that never acknowledge get every
+frame (no flow control).
+"""
+
+import base64
+import threading
+import time
+from typing import Dict, Optional
+
+import cv2
+import config
+from utils.offload import offload
+
+
+class FrameBroadcaster:
+    def __init__(self, socketio, room: Optional[str] = None,
+                 tiers: Dict = config.VIDEO_QUALITY_TIERS,
+                 max_in_flight: int = config.VIDEO_MAX_IN_FLIGHT,
+                 ack_timeout: float = config.VIDEO_ACK_TIMEOUT):
+        """
+        Initialize broadcaster
+
+        Args:
+            socketio: Flask-SocketIO instance
+            room: Whiteboard room the frames belong to (None = standalone)
+            tiers: {tier name: {'quality': JPEG quality, 'scale': resize factor}}
+            max_in_flight: Unacknowledged frames before a viewer skips frames
+            ack_timeout: Seconds without an ack after which in-flight frames count as lost
+        """
+        self.socketio = socketio
+        self.room = room
+        self.tiers = tiers
+        self.max_in_flight = max(1, max_in_flight)
+        self.ack_timeout = ack_timeout
+
+        # sid -> {'tier', 'last_sent', 'last_acked' (None until the client acks), 'acked_at'}
+        self.viewers = {}
+        self.seq = 0
+
+        # Counters (frames encoded, frames delivered, frames skipped for slow viewers)
+        self.stats = {'encoded': 0, 'sent': 0, 'skipped': 0}
+
+        self._lock = threading.Lock()
+
+    def tier_room(self, tier: str) -> str:
+        """Socket.IO room of a tier's viewers"""
+        return f"{self.room or 'video'}/{tier}"
+
+    def add_viewer(self, sid: str, tier: str = config.VIDEO_DEFAULT_TIER) -> bool:
+        """
+        Start sending frames of a tier to a client (switches tier if already watching)
+
+        Returns:
+            bool: False if the tier does not exist
+        """
+        if tier not in self.tiers:
+            return False
+
+        with self._lock:
+            viewer = self.viewers.get(sid)
+            if viewer is not None:
+                self.socketio.server.leave_room(sid, self.tier_room(viewer['tier']), namespace='/')
+            self.viewers[sid] = {'tier': tier, 'last_sent': self.seq, 'last_acked': None, 'acked_at': 0.0}
+            self.socketio.server.enter_room(sid, self.tier_room(tier), namespace='/')
+        return True
+
+    def remove_viewer(self, sid: str):
+        """Stop sending frames to a client"""
+        with self._lock:
+            viewer = self.viewers.pop(sid, None)
+            if viewer is not None:
+                self.socketio.server.leave_room(sid, self.tier_room(viewer['tier']), namespace='/')
+
+    def viewer_counts(self) -> Dict[str, int]:
+        """Number of viewers per tier"""
+        with self._lock:
+            counts = {}
+            for viewer in self.viewers.values():
+                counts[viewer['tier']] = counts.get(viewer['tier'], 0) + 1
+            return counts
+
+    def ack(self, sid: str, seq: int):
+        """Client has shown frame seq (turns on flow control for this client)"""
+        with self._lock:
+            viewer = self.viewers.get(sid)
+            if viewer is not None and seq <= viewer['last_sent']:
+                viewer['last_acked'] = max(seq, viewer['last_acked'] or 0)
+                viewer['acked_at'] = time.monotonic()
+
+    def encode(self, frame, tier: str) -> str:
+        """JPEG + base64 encode a frame for one tier"""
+        settings = self.tiers[tier]
+        scale = settings.get('scale', 1.0)
+        if scale != 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, settings['quality']])
+        return base64.b64encode(buffer).decode('utf-8')
+
+    def broadcast(self, frame, timer=None) -> int:
+        """
+        Send a frame to every viewer that is keeping up
+
+        Args:
+            frame: BGR composite frame
+            timer: FrameTimer to charge encoding ('encode') and sending ('emit') to
+
+        Returns:
+            int: Number of viewers the frame was sent to
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.seq += 1
+            seq = self.seq
+
+            # tier -> (viewers to send to, slow viewers to skip)
+            groups = {}
+            for sid, viewer in self.viewers.items():
+                send, skip = groups.setdefault(viewer['tier'], ([], []))
+                acked = viewer['last_acked']
+                if acked is not None and viewer['last_sent'] - acked >= self.max_in_flight:
+                    if now - viewer['acked_at'] < self.ack_timeout:
+                        skip.append(sid)
+                        continue
+                    # No ack for too long - the frames (or their acks) were lost, start over
+                    viewer['last_acked'] = viewer['last_sent']
+                    viewer['acked_at'] = now
+                send.append(sid)
+                viewer['last_sent'] = seq
+
+        sent = 0
+        for tier, (send, skip) in groups.items():
+            self.stats['skipped'] += len(skip)
+            if not send:
+                continue
+
+            # One encode and one packet for the whole tier (encoding off the event loop in async mode)
+            data = offload(self.encode, frame, tier)
+            self.stats['encoded'] += 1
+            if timer is not None:
+                timer.lap('encode')
+
+            self.socketio.emit('video_frame', {'frame': data, 'seq': seq, 'quality': tier},
+                               to=self.tier_room(tier), skip_sid=skip or None)
+            sent += len(send)
+            if timer is not None:
+                timer.lap('emit')
+
+        self.stats['sent'] += sent
+        return sent
@@ -0,0 +1,234 @@
+"""
+Room Registry
+Many independent whiteboards (rooms) served by one process
+
+Every room has its own canvas, stroke manager, gesture recognizers, hand
+tracker, video handler, stroke sync and status publisher - boards never
+share state.
+Socket.IO clients join a room and only receive that room's frames and
+events. Rooms are created on first use, at most config.MAX_ROOMS exist at
+once, and a room nobody has been in for config.ROOM_IDLE_TIMEOUT seconds
+is evicted.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+from core.hand_tracker import HandTracker
+from core.gesture_recognizer import GestureRecognizer
+from core.canvas import Canvas
+from utils.file_handler import FileHandler
+from websocket.video_handler import VideoHandler
+from websocket.status_publisher import StatusPublisher
+from websocket.stroke_sync import StrokeSync
+
+
+class Room:
+    def __init__(self, room_id: str, socketio, file_handler: FileHandler):
+        """
+        Create one whiteboard
+
+        Args:
+            room_id: Room name (also the Socket.IO room events are sent to)
+            socketio: Flask-SocketIO instance
+            file_handler: Shared export helper
+        """
+        self.id = room_id
+
+        # One gesture recognizer per tracked hand (each hand starts with a different color)
+        gesture_recognizers = [GestureRecognizer(color_index=i, hand_id=i) for i in range(config.MAX_NUM_HANDS)]
+
+        # Whiteboard state of this room
+        self.state = {
+            'room': room_id,
+            'hand_tracker': HandTracker(),
+            'gesture_recognizer': gesture_recognizers[0],  # First hand (keyboard/API color changes)
+            'gesture_recognizers': gesture_recognizers,
+            'canvas': Canvas(config.CAMERA_WIDTH, config.CAMERA_HEIGHT),
+            'file_handler': file_handler,
+            'brush_thickness': config.BRUSH_THICKNESS_DEFAULT,
+            'hand_detected': False,
+            'hand_ids': []  # Ids of hands currently in view
+        }
+
+        # Stroke deltas, video and status push, all sending to this room only
+        canvas = self.state['canvas']
+        self.stroke_sync = StrokeSync(socketio, canvas.stroke_manager, room=room_id, lock=canvas.lock)
+        self.state['stroke_sync'] = self.stroke_sync
+        self.video_handler = VideoHandler(socketio, self.state, room=room_id)
+        self.status_publisher = StatusPublisher(socketio, self.state, room=room_id)
+        self.state['status_publisher'] = self.status_publisher
+
+        # Connected clients (Socket.IO session ids)
+        self.members = set()
+        self.last_active = time.time()
+
+    def touch(self):
+        """Mark the room as used now"""
+        self.last_active = time.time()
+
+    def is_idle(self, now: float, timeout: float) -> bool:
+        """True if nobody is in the room and it has not been used for timeout seconds"""
+        return not self.members and now - self.last_active >= timeout
+
+    def close(self, timeout: float = config.ROOM_CLOSE_TIMEOUT) -> bool:
+        """
+        Stop the video loop, then the camera, and free MediaPipe resources
+
+        Returns:
+            bool: False if the video loop did not stop within timeout - its
+                  camera and hand tracker are then left to it, not released
+        """
+        if not self.video_handler.stop_stream(timeout):
+            return False
+        if self.video_handler.cap is not None:
+            self.video_handler.stop_camera()
+        self.state['hand_tracker'].release()
+        return True
+
+    def summary(self) -> Dict:
+        """Short description for GET /api/rooms"""
+        return {
+            'id': self.id,
+            'members': len(self.members),
+            'streaming': self.video_handler.running,
+            'viewers': self.video_handler.broadcaster.viewer_counts(),
+            'idle_seconds': round(time.time() - self.last_active, 1)
+        }
+
+
+class RoomRegistry:
+    def __init__(self, socketio, max_rooms: int = config.MAX_ROOMS,
+                 idle_timeout: float = config.ROOM_IDLE_TIMEOUT):
+        """
+        Initialize registry
+
+        Args:
+            socketio: Flask-SocketIO instance
+            max_rooms: Maximum rooms at once
+            idle_timeout: Seconds an empty room is kept before eviction
+        """
+        self.socketio = socketio
+        self.max_rooms = max_rooms
+        self.idle_timeout = idle_timeout
+
+        self.file_handler = FileHandler()  # Exports only need the folder - shared by all rooms
+
+        self.rooms: Dict[str, Room] = {}
+        self.sid_rooms: Dict[str, str] = {}  # Socket.IO session id -> room id
+        self._lock = threading.RLock()
+
+        self._sweeper = None
+
+    def get(self, room_id: str) -> Optional[Room]:
+        """Existing room, or None"""
+        with self._lock:
+            return self.rooms.get(room_id)
+
+    def get_or_create(self, room_id: str) -> Optional[Room]:
+        """
+        Get a room, creating it if needed
+
+        Returns:
+            Room, or None if the room limit is reached
+        """
+        with self._lock:
+            room = self.rooms.get(room_id)
+            if room is None:
+                if len(self.rooms) >= self.max_rooms:
+                    self.evict_idle()
+                if len(self.rooms) >= self.max_rooms:
+                    print(f"⚠️ Room limit reached ({self.max_rooms}) - '{room_id}' not created")
+                    return None
+
+                room = Room(room_id, self.socketio, self.file_handler)
+                self.rooms[room_id] = room
+                print(f"🏠 Room created: {room_id}")
+
+            room.touch()
+            return room
+
+    def join(self, sid: str, room_id: str) -> Optional[Room]:
+        """
+        Move a client into a room (leaving its previous room)
+
+        Returns:
+            Room joined, or None if it could not be created (client stays where it was)
+        """
+        with self._lock:
+            room = self.get_or_create(room_id)
+            if room is None:
+                return None
+
+            previous = self.room_of(sid)
+            if previous is not None and previous is not room:
+                previous.members.discard(sid)
+                previous.video_handler.broadcaster.remove_viewer(sid)
+                previous.touch()
+
+            if sid not in room.members:
+                room.members.add(sid)
+                room.video_handler.broadcaster.add_viewer(sid)
+            self.sid_rooms[sid] = room_id
+            return room
+
+    def leave(self, sid: str) -> Optional[Room]:
+        """
+        Remove a client from its room
+
+        Returns:
+            Room it left, or None
+        """
+        with self._lock:
+            room_id = self.sid_rooms.pop(sid, None)
+            room = self.rooms.get(room_id)
+            if room is not None:
+                room.members.discard(sid)
+                room.video_handler.broadcaster.remove_viewer(sid)
+                room.touch()  # Idle timeout starts when the last client leaves
+            return room
+
+    def room_of(self, sid: str) -> Optional[Room]:
+        """Room a client is in, or None"""
+        with self._lock:
+            return self.rooms.get(self.sid_rooms.get(sid))
+
+    def evict_idle(self) -> List[str]:
+        """
+        Close and remove rooms that have been empty for idle_timeout seconds
+
+        Returns:
+            Ids of evicted rooms
+        """
+        now = time.time()
+        with self._lock:
+            evicted = [room_id for room_id, room in self.rooms.items()
+                       if room.is_idle(now, self.idle_timeout)]
+            rooms = [self.rooms.pop(room_id) for room_id in evicted]
+
+        # Outside the lock - closing waits for a streaming room's video loop
+        for room in rooms:
+            if room.close():
+                print(f"🧹 Room evicted (idle): {room.id}")
+            else:
+                print(f"⚠️ Room evicted (idle): {room.id} - video loop did not stop, resources not released")
+        return evicted
+
+    def list_rooms(self) -> List[Dict]:
+        """Summary of every room"""
+        with self._lock:
+            return [room.summary() for room in self.rooms.values()]
+
+    def start_sweeper(self, interval: float = config.ROOM_SWEEP_INTERVAL):
+        """Evict idle rooms in the background every interval seconds"""
+        if self._sweeper is not None:
+            return
+
+        def sweep():
+            while True:
+                self.socketio.sleep(interval)
+                self.evict_idle()
+
+        self._sweeper = self.socketio.start_background_task(sweep)
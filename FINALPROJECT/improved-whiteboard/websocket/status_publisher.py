@@ -0,0 +1,74 @@
+"""
+WebSocket Status Publisher
+Pushes whiteboard status to clients when it changes
+
+Clients get the full status once when they connect, then a 'status' event
+containing only the fields that changed since the last push - so nobody
+needs to poll GET /api/status.
+"""
+
+import threading
+from typing import Dict, Optional
+
+
+class StatusPublisher:
+    def __init__(self, socketio, whiteboard_state, room=None):
+        """
+        Initialize status publisher
+
+        Args:
+            socketio: Flask-SocketIO instance
+            whiteboard_state: Shared whiteboard state dictionary
+            room: Socket.IO room status goes to (None = all clients)
+        """
+        self.socketio = socketio
+        self.state = whiteboard_state
+        self.room = room
+
+        self.last_snapshot = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Dict:
+        """
+        Build current status (same fields as GET /api/status)
+
+        Returns:
+            dict: mode, color, brush_size, can_undo, can_redo, hand_detected, hands
+        """
+        # Mode/color are cached by gesture events - no recognizer polling here
+        gesture_status = self.state['gesture_status']
+        canvas = self.state['canvas']
+
+        return {
+            'mode': gesture_status[0]['mode'],
+            'color': gesture_status[0]['color'],
+            'brush_size': self.state['brush_thickness'],
+            'can_undo': canvas.can_undo(),
+            'can_redo': canvas.can_redo(),
+            'hand_detected': self.state.get('hand_detected', False),
+            'hands': [
+                {'id': hand_id, **gesture_status[hand_id]}
+                for hand_id in self.state.get('hand_ids', [])
+            ]
+        }
+
+    def publish(self) -> Optional[Dict]:
+        """
+        Push changed fields to all clients (nothing is sent if nothing changed)
+
+        Returns:
+            dict of changed fields, or None
+        """
+        snapshot = self.snapshot()
+
+        with self._lock:
+            changes = {
+                key: value for key, value in snapshot.items()
+                if self.last_snapshot.get(key) != value
+            }
+            if not changes:
+                return None
+            self.last_snapshot = snapshot
+
+        self.socketio.emit('status', changes, to=self.room)
+        return changes
@@ -0,0 +1,196 @@
+"""
+Stroke Sync
+Streams stroke changes to clients instead of (or next to) video frames
+
+Every StrokeManager mutation becomes a small 'stroke_delta' event with a
+sequence number: stroke_start, stroke_points (all points a stroke gained
+during one frame, batched), stroke_end, undo, redo, shape_replace and
+clear. Clients that keep their own copy of the stroke list can render the
+board locally for a tiny fraction of the video bandwidth.
+
+Late joiners get a 'stroke_sync' payload: a board snapshot plus the tail of
+events after it. The snapshot is cached and only rebuilt every
+config.STROKE_SYNC_SNAPSHOT_INTERVAL events, so many joiners cost one
+serialisation. A client that reconnects with the last seq it applied only
+gets the missed events, as long as they are still in the tail.
+"""
+
+import itertools
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import config
+
+
+def _jsonable(value):
+    """Shape info values (numpy arrays/ints, tuples) as plain JSON types"""
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def serialize_stroke(stroke) -> Dict:
+    """
+    Stroke as a JSON-ready dict
+
+    Returns:
+        {'id', 'type' ('line', 'erase' or 'shape'), 'color' (BGR), 'thickness',
+         'points': [[x, y], ...], 'shape': shape info (shapes only)}
+    """
+    data = {
+        'id': stroke.id,
+        'type': stroke.stroke_type,
+        'color': [int(c) for c in stroke.color],
+        'thickness': int(stroke.thickness),
+        'points': [[int(x), int(y)] for x, y in stroke.points]
+    }
+    if hasattr(stroke, 'shape_info'):
+        data['shape'] = _jsonable(stroke.shape_info)
+    return data
+
+
+class StrokeSync:
+    def __init__(self, socketio, stroke_manager, room: Optional[str] = None,
+                 tail_size: int = config.STROKE_SYNC_TAIL,
+                 snapshot_interval: int = config.STROKE_SYNC_SNAPSHOT_INTERVAL,
+                 lock=None):
+        """
+        Initialize stroke sync
+
+        Args:
+            socketio: Flask-SocketIO instance
+            stroke_manager: StrokeManager to mirror
+            room: Socket.IO room deltas go to (None = all clients)
+            tail_size: Recent events kept for late joiners / reconnects
+            snapshot_interval: Events between snapshot rebuilds (<= tail_size)
+            lock: Lock guarding the stroke manager (Canvas.lock) - shared, so
+                  snapshots never see strokes halfway through a change
+        """
+        self.socketio = socketio
+        self.stroke_manager = stroke_manager
+        self.room = room
+        self.snapshot_interval = min(snapshot_interval, tail_size)
+
+        self.seq = 0
+        self.tail = deque(maxlen=tail_size)
+
+        # Stroke id -> points added since the last flush (sent once per frame)
+        self.pending_points: Dict[int, List[List[int]]] = {}
+
+        self._snapshot = None  # Cached {'seq', 'strokes', 'current'}
+        self._lock = lock or threading.RLock()
+
+        stroke_manager.add_listener(self._on_stroke_event)
+
+    def _on_stroke_event(self, event: Dict):
+        """StrokeManager mutation -> delta event"""
+        event_type = event['type']
+        with self._lock:
+            if event_type == 'stroke_point':
+                x, y = event['point']
+                self.pending_points.setdefault(event['stroke'].id, []).append([int(x), int(y)])
+                return
+
+            # Points first, so clients see events in the order they happened
+            self._flush_points()
+
+            if event_type == 'stroke_start':
+                self._record({'type': 'stroke_start', 'hand_id': event['hand_id'],
+                              'stroke': serialize_stroke(event['stroke'])})
+            elif event_type == 'stroke_end':
+                self._record({'type': 'stroke_end', 'id': event['stroke'].id, 'kept': event['kept']})
+            elif event_type == 'shape_replace':
+                self._record({'type': 'shape_replace', 'replacements': [
+                    {'id': old.id, 'stroke': serialize_stroke(new)}
+                    for old, new in event['replacements']
+                ]})
+            elif event_type == 'undo':
+                self._record({'type': 'undo', 'id': event['stroke'].id})
+            elif event_type == 'redo':
+                self._record({'type': 'redo', 'stroke': serialize_stroke(event['stroke'])})
+            elif event_type == 'clear':
+                self._record({'type': 'clear'})
+
+    def _record(self, delta: Dict):
+        """Number a delta, keep it in the tail and send it to the room"""
+        self.seq += 1
+        delta['seq'] = self.seq
+        self.tail.append(delta)
+        self.socketio.emit('stroke_delta', delta, to=self.room)
+
+    def _flush_points(self):
+        """Send batched points (one delta per stroke)"""
+        if not self.pending_points:
+            return
+        pending, self.pending_points = self.pending_points, {}
+        for stroke_id, points in pending.items():
+            self._record({'type': 'stroke_points', 'id': stroke_id, 'points': points})
+
+    def flush(self):
+        """Send points gathered since the last call (call once per frame)"""
+        with self._lock:
+            self._flush_points()
+
+    def snapshot(self) -> Dict:
+        """
+        Board state at self.seq (cached until snapshot_interval events later)
+
+        Returns:
+            {'seq', 'strokes': completed strokes in drawing order,
+             'current': [{'hand_id', 'stroke'}, ...] strokes being drawn}
+        """
+        with self._lock:
+            self._flush_points()
+
+            snapshot = self._snapshot
+            if snapshot is None or self.seq - snapshot['seq'] >= self.snapshot_interval:
+                manager = self.stroke_manager
+                snapshot = {
+                    'seq': self.seq,
+                    'strokes': [serialize_stroke(stroke) for stroke in manager.get_all_strokes()],
+                    'current': [{'hand_id': hand_id, 'stroke': serialize_stroke(stroke)}
+                                for hand_id, stroke in manager.current_strokes.items()]
+                }
+                self._snapshot = snapshot
+            return snapshot
+
+    def events_since(self, seq: int) -> Optional[List[Dict]]:
+        """
+        Events after seq
+
+        Returns:
+            list of deltas, or None if some of them are no longer in the tail
+        """
+        with self._lock:
+            if seq >= self.seq:
+                return []
+            if not self.tail or seq < self.tail[0]['seq'] - 1:
+                return None
+            return list(itertools.islice(self.tail, seq - self.tail[0]['seq'] + 1, None))
+
+    def sync_payload(self, since: Optional[int] = None) -> Dict:
+        """
+        Everything a client needs to catch up
+
+        Args:
+            since: Last seq the client applied (None = new client)
+
+        Returns:
+            {'seq', 'snapshot' (None if the events alone are enough), 'events'}
+        """
+        with self._lock:
+            self._flush_points()
+
+            if since is not None:
+                events = self.events_since(since)
+                if events is not None:
+                    return {'seq': self.seq, 'snapshot': None, 'events': events}
+
+            snapshot = self.snapshot()
+            return {'seq': self.seq, 'snapshot': snapshot, 'events': self.events_since(snapshot['seq'])}
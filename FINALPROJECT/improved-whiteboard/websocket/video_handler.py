@@ -3,52 +3,155 @@ WebSocket Video Handler
 Streams video frames with hand tracking and canvas overlay
 """
 
+import time
+
 import cv2
-import numpy as np
-import base64
-from flask_socketio import emit
 import config
+from utils.latency_metrics import LatencyMetrics
+from utils.offload import offload
+from utils.replay_source import ReplaySource, SessionRecorder, resolve_replay_path
+from utils.stream_profiler import StreamProfiler
+from websocket.frame_broadcaster import FrameBroadcaster
 
 class VideoHandler:
-    def __init__(self, socketio, whiteboard_state):
+    def __init__(self, socketio, whiteboard_state, room=None):
         """
         Initialize video handler
         
         Args:
             socketio: Flask-SocketIO instance
             whiteboard_state: Shared whiteboard state dictionary
+            room: Socket.IO room frames and events go to (None = all clients)
         """
         self.socketio = socketio
         self.state = whiteboard_state
+        self.room = room
         self.running = False
         
-        # Camera
+        # Set while no stream loop is running (an event of the server's async mode)
+        self.loop_stopped = socketio.server.eio.create_event()
+        self.loop_stopped.set()
+        
+        # Camera (or a ReplaySource)
         self.cap = None
+        self.live_hands = None  # MediaPipe hands, set aside while a landmark session replays
+        
+        # Landmarks being recorded as a replayable session (None = not recording)
+        self.recorder = None
+        
+        # Encodes each frame once per quality tier for all viewers
+        self.broadcaster = FrameBroadcaster(socketio, room)
+        
+        # Per-stage latency (GET /metrics, 'debug_metrics' event)
+        self.metrics = LatencyMetrics()
+        self.last_debug_push = 0.0
         
-        # Drawing state
-        self.prev_point = None
+        # On-demand profiling of the stream loop (POST /admin/profile)
+        self.profiler = StreamProfiler()
+        
+        # Drawing state (hand id -> last drawn point)
+        self.prev_points = {}
+        
+        # Last live shape suggestion sent to the client (hand id -> shape)
+        self.last_suggestions = {}
+        
+        # Mode/color of every hand, updated only when a gesture transition happens
+        self.state['gesture_status'] = {}
+        for recognizer in self.state['gesture_recognizers']:
+            self._update_gesture_status(recognizer)
+            recognizer.add_listener(self._on_gesture_event)
     
-    def start_camera(self):
-        """Start camera capture"""
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(3, config.CAMERA_WIDTH)
-        self.cap.set(4, config.CAMERA_HEIGHT)
+    def start_camera(self, source=None, realtime: bool = True, loop: bool = config.REPLAY_LOOP) -> bool:
+        """
+        Start camera capture, or replay a recording
+        
+        Args:
+            source: Camera index, or path of a video file / landmark session (.npz)
+                    (None = config.CAMERA_SOURCE)
+            realtime: Replay at recorded speed (False = as fast as frames are processed)
+            loop: Start a replay over when it ends
+            
+        Returns:
+            bool: False if the source could not be opened
+        """
+        if source is None:
+            source = config.CAMERA_SOURCE
+            if not isinstance(source, int):
+                source = resolve_replay_path(source) or source  # File names are looked up in REPLAY_FOLDER
+        
+        if isinstance(source, int):
+            self.cap = offload(cv2.VideoCapture, source)
+            self.cap.set(3, config.CAMERA_WIDTH)
+            self.cap.set(4, config.CAMERA_HEIGHT)
+        else:
+            self.cap = offload(ReplaySource, source, realtime=realtime, loop=loop)
+            if self.cap.has_landmarks:
+                # Recorded hands replace MediaPipe until the replay stops
+                hand_tracker = self.state['hand_tracker']
+                self.live_hands = hand_tracker.hands
+                hand_tracker.hands = self.cap.hands()
+        
+        if not self.cap.isOpened():
+            print(f"⚠️ Cannot open video source: {source}")
+            self.stop_camera()
+            return False
+        
         self.running = True
-        print("📹 Camera started")
+        print(f"📹 Camera started ({source})")
+        return True
     
     def stop_camera(self):
         """Stop camera capture"""
         self.running = False
         if self.cap:
             self.cap.release()
+        if self.live_hands is not None:
+            self.state['hand_tracker'].hands = self.live_hands
+            self.live_hands = None
         print("📹 Camera stopped")
     
+    def stop_stream(self, timeout: float) -> bool:
+        """
+        Ask the stream loop to stop and wait until it has finished its frame
+        
+        Returns:
+            bool: True if no loop is running any more
+        """
+        self.running = False
+        return self.loop_stopped.wait(timeout)
+    
+    def frame_delay(self) -> float:
+        """Seconds the stream loop waits before the next frame"""
+        if isinstance(self.cap, ReplaySource):
+            return self.cap.time_until_next()  # Paced by the recording's timestamps
+        return 0.033  # ~30 FPS
+    
+    def replay_finished(self) -> bool:
+        """True if a replay without loop has played its last frame"""
+        return isinstance(self.cap, ReplaySource) and self.cap.finished
+    
+    def start_recording(self):
+        """Record the landmarks of every processed frame (saved by stop_recording)"""
+        self.recorder = SessionRecorder()
+    
+    def stop_recording(self, path: str) -> int:
+        """
+        Save the recorded landmarks as a replayable session
+        
+        Returns:
+            int: Frames saved (0 if nothing was being recorded)
+        """
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return 0
+        return recorder.save(path)
+    
     def process_frame(self):
         """
         Process single frame:
         1. Read from camera
-        2. Detect hand
-        3. Recognize gesture
+        2. Detect hands
+        3. Recognize gesture (per hand)
         4. Update canvas
         5. Combine and send to client
         
@@ -58,104 +161,180 @@ class VideoHandler:
         if not self.cap or not self.cap.isOpened():
             return False
         
-        # Read frame
-        success, frame = self.cap.read()
+        timer = self.metrics.frame()
+        
+        # Read frame (blocking calls are offloaded in async server mode)
+        success, frame = offload(self.cap.read)
         if not success:
             return False
+        timer.lap('capture')
         
-        # Flip frame (mirror effect)
+        # Flip frame (mirror effect); MediaPipe wants RGB
         frame = cv2.flip(frame, 1)
         h, w, c = frame.shape
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        timer.lap('convert')
         
         # Get whiteboard components
         hand_tracker = self.state['hand_tracker']
-        gesture_recognizer = self.state['gesture_recognizer']
+        gesture_recognizers = self.state['gesture_recognizers']
         canvas = self.state['canvas']
         brush_thickness = self.state['brush_thickness']
         
-        # Detect hand
-        hand_detected = hand_tracker.detect_hand(frame)
-        self.state['hand_detected'] = hand_detected
+        # Detect all hands; tips and finger counts come out for every hand at once
+        num_hands = offload(hand_tracker.detect_hands_rgb, rgb_frame)
+        self.state['hand_detected'] = num_hands > 0
+        self.state['hand_ids'] = list(hand_tracker.hand_ids)
         
-        if hand_detected:
-            # Get finger tip position
-            finger_pos = hand_tracker.get_index_finger_tip(w, h)
-            
-            # Count fingers for gesture
-            finger_count = hand_tracker.count_fingers()
-            
-            # Recognize gesture
-            gesture_result = gesture_recognizer.recognize_gesture(finger_count)
-            mode = gesture_result['mode']
+        finger_tips = hand_tracker.get_index_finger_tips(w, h)
+        finger_counts = hand_tracker.count_fingers_all()
+        if self.recorder is not None:
+            self.recorder.add(hand_tracker.landmark_array)
+        timer.lap('inference')
+        
+        # Recognize every hand's gesture, then draw/erase with it (replays use recording time)
+        timestamp = self.cap.timestamp if isinstance(self.cap, ReplaySource) else None
+        gestures = [
+            (hand_id, (int(finger_pos[0]), int(finger_pos[1])),
+             gesture_recognizers[hand_id].recognize_gesture(int(finger_count), timestamp)['mode'])
+            for hand_id, finger_pos, finger_count in zip(hand_tracker.hand_ids, finger_tips, finger_counts)
+        ]
+        timer.lap('gesture')
+        
+        for hand_id, finger_pos, mode in gestures:
+            self._handle_hand(frame, canvas, gesture_recognizers[hand_id], hand_id,
+                              finger_pos, mode, brush_thickness)
+        
+        # Hands that left the view - stop their strokes
+        for hand_id in list(self.prev_points):
+            if hand_id not in hand_tracker.hand_ids:
+                canvas.stop_drawing(hand_id)
+                del self.prev_points[hand_id]
+        
+        suggestions = {hand_id: canvas.get_live_shape_suggestion(hand_id) for hand_id in hand_tracker.hand_ids}
+        timer.lap('canvas')
+        
+        # Push this frame's stroke points, live shape suggestion and status when they change
+        self.state['stroke_sync'].flush()
+        self._emit_shape_suggestions(suggestions)
+        self.state['status_publisher'].publish()
+        timer.lap('sync')
+        
+        if num_hands:
+            # Draw hand skeletons
+            frame = hand_tracker.draw_hand_skeleton(frame)
+        
+        # Combine frame and canvas
+        canvas_img = canvas.get_canvas()
+        result = cv2.addWeighted(frame, 0.5, canvas_img, 0.5, 0)
+        timer.lap('compose')
+        
+        # Draw UI
+        self._draw_ui(result, canvas, brush_thickness)
+        timer.lap('ui')
+        
+        # Encode once per quality tier and send to the room's viewers (laps 'encode' and 'emit')
+        self.broadcaster.broadcast(result, timer)
+        
+        self.metrics.record(timer)
+        self._push_debug_metrics()
+        
+        return True
+    
+    def _handle_hand(self, frame, canvas, gesture_recognizer, hand_id, finger_pos, mode, brush_thickness):
+        """Draw/erase with one hand in the mode its gesture selected"""
+        # Get current color
+        current_color = gesture_recognizer.get_current_color_bgr()
+        
+        # Handle drawing based on mode
+        if mode == 'draw':
+            x, y = finger_pos
             
-            # Get current color
-            current_color = gesture_recognizer.get_current_color_bgr()
+            if hand_id not in self.prev_points:
+                canvas.start_drawing(x, y, current_color, brush_thickness, mode, hand_id)
+            else:
+                canvas.continue_drawing(x, y, current_color, brush_thickness, mode, hand_id)
             
-            # Handle drawing based on mode
-            if mode == 'draw' and finger_pos:
-                x, y = finger_pos
-                
-                if self.prev_point is None:
-                    canvas.start_drawing(x, y, current_color, brush_thickness, mode)
-                else:
-                    canvas.continue_drawing(x, y, current_color, brush_thickness, mode)
-                
-                self.prev_point = (x, y)
-                
-                # Visual feedback
-                cv2.circle(frame, (x, y), 10, current_color, -1)
+            self.prev_points[hand_id] = (x, y)
             
-            elif mode == 'erase' and finger_pos:
-                x, y = finger_pos
-                
-                if self.prev_point is None:
-                    canvas.start_drawing(x, y, (0, 0, 0), config.ERASER_THICKNESS, mode)
-                else:
-                    canvas.continue_drawing(x, y, (0, 0, 0), config.ERASER_THICKNESS, mode)
-                
-                self.prev_point = (x, y)
-                
-                # Visual feedback
-                cv2.circle(frame, (x, y), config.ERASER_THICKNESS//2, (100, 100, 100), 2)
+            # Visual feedback
+            cv2.circle(frame, (x, y), 10, current_color, -1)
+        
+        elif mode == 'erase':
+            x, y = finger_pos
             
+            if hand_id not in self.prev_points:
+                canvas.start_drawing(x, y, (0, 0, 0), config.ERASER_THICKNESS, mode, hand_id)
             else:
-                # Stop drawing
-                if self.prev_point is not None:
-                    canvas.stop_drawing()
-                self.prev_point = None
-                
-                # Visual feedback for idle
-                if finger_pos:
-                    cv2.circle(frame, finger_pos, 10, (0, 255, 0), 2)
+                canvas.continue_drawing(x, y, (0, 0, 0), config.ERASER_THICKNESS, mode, hand_id)
             
-            # Draw hand skeleton
-            frame = hand_tracker.draw_hand_skeleton(frame)
+            self.prev_points[hand_id] = (x, y)
+            
+            # Visual feedback
+            cv2.circle(frame, (x, y), config.ERASER_THICKNESS//2, (100, 100, 100), 2)
         
         else:
-            # No hand detected - stop drawing
-            if self.prev_point is not None:
-                canvas.stop_drawing()
-            self.prev_point = None
-        
-        # Combine frame and canvas
-        canvas_img = canvas.get_canvas()
-        result = cv2.addWeighted(frame, 0.5, canvas_img, 0.5, 0)
+            # Stop drawing
+            if hand_id in self.prev_points:
+                canvas.stop_drawing(hand_id)
+                del self.prev_points[hand_id]
+            
+            # Visual feedback for idle
+            cv2.circle(frame, finger_pos, 10, (0, 255, 0), 2)
+    
+    def _update_gesture_status(self, recognizer):
+        """Cache a hand's mode/color for the UI and the /status endpoint"""
+        self.state['gesture_status'][recognizer.hand_id] = {
+            'mode': recognizer.get_mode_display_text(),
+            'color': recognizer.get_current_color_name()
+        }
+    
+    def _on_gesture_event(self, event):
+        """Gesture transition: refresh cached status and tell the client"""
+        recognizer = self.state['gesture_recognizers'][event['hand_id']]
+        self._update_gesture_status(recognizer)
         
-        # Draw UI
-        self._draw_ui(result, gesture_recognizer, canvas, brush_thickness)
+        status = self.state['gesture_status'][event['hand_id']]
+        self.socketio.emit('gesture_changed', {
+            'hand_id': event['hand_id'],
+            'type': event['type'],
+            'mode': status['mode'],
+            'color': status['color']
+        }, to=self.room)
+        self.state['status_publisher'].publish()
+    
+    def debug_room(self) -> str:
+        """Socket.IO room of clients subscribed to 'debug_metrics'"""
+        return f"{self.room or 'video'}/debug"
+    
+    def _push_debug_metrics(self):
+        """Send stage percentiles to debug subscribers (every METRICS_DEBUG_INTERVAL seconds)"""
+        now = time.monotonic()
+        if now - self.last_debug_push < config.METRICS_DEBUG_INTERVAL:
+            return
         
-        # Encode frame as JPEG
-        _, buffer = cv2.imencode('.jpg', result, [cv2.IMWRITE_JPEG_QUALITY, config.FRAME_ENCODE_QUALITY])
-        frame_base64 = base64.b64encode(buffer).decode('utf-8')
+        self.last_debug_push = now
+        self.socketio.emit('debug_metrics', {'room': self.room, 'stages': self.metrics.summary()},
+                           to=self.debug_room())
+    
+    def _emit_shape_suggestions(self, suggestions):
+        """Send every hand's live shape suggestion to clients (only the ones that changed)"""
+        # Hands that left the view clear their suggestion
+        for hand_id in self.last_suggestions:
+            suggestions.setdefault(hand_id, None)
         
-        # Send frame to client
-        self.socketio.emit('video_frame', {'frame': frame_base64})
+        for hand_id, suggestion in suggestions.items():
+            if suggestion == self.last_suggestions.get(hand_id):
+                continue
+            self.socketio.emit('shape_suggestion', {'hand_id': hand_id, 'shape': suggestion}, to=self.room)
         
-        return True
+        self.last_suggestions = {hand_id: suggestion for hand_id, suggestion in suggestions.items()
+                                 if suggestion is not None}
     
-    def _draw_ui(self, frame, gesture_recognizer, canvas, brush_thickness):
-        """Draw UI elements on frame"""
+    def _draw_ui(self, frame, canvas, brush_thickness):
+        """Draw UI elements on frame (mode/color come from the cached gesture status)"""
         h, w = frame.shape[:2]
+        status = self.state['gesture_status'][0]
         
         # Color Palette
         palette_y = config.UI_COLOR_PALETTE_Y
@@ -176,7 +355,7 @@ class VideoHandler:
                          (255, 255, 255), 2)
             
             # Highlight current color
-            if color_name == gesture_recognizer.get_current_color_name():
+            if color_name == status['color']:
                 cv2.rectangle(frame, 
                              (x_pos - 3, palette_y - 3), 
                              (x_pos + config.UI_BUTTON_SIZE + 3, palette_y + config.UI_BUTTON_SIZE + 3), 
@@ -184,8 +363,8 @@ class VideoHandler:
         
         # Status text
         status_y = 100
-        mode_text = gesture_recognizer.get_mode_display_text()
-        color_text = gesture_recognizer.get_current_color_name().upper()
+        mode_text = status['mode']
+        color_text = status['color'].upper()
         
         cv2.putText(frame, f"Mode: {mode_text}", 
                    (palette_x, status_y), 
@@ -1,80 +1,207 @@
+import argparse
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
-import numpy as np
 import easyocr
 
+from ink_mask import INK_COLORS, InkMasker
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+
+
 # ----------------------------
-# 1. Load image
+# 1. Load OCR model (ONCE per run - this is the slow part)
 # ----------------------------
-img = cv2.imread("input.png")
-if img is None:
-    raise Exception("Image not found. Check filename/path.")
+def load_reader():
+    return easyocr.Reader(['en'])
 
-original = img.copy()
 
 # ----------------------------
-# 2. Convert to HSV & extract YELLOW drawing
+# 2. Remove handwritten text & overlay digital text
 # ----------------------------
-hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+def render_output(masker, img, mask, results):
+    # Paint over detected drawing (wall-like gray, or inpainted background)
+    clean_img = masker.fill(img, mask)
 
-# Yellow color range (tuned for air-drawn yellow)
-lower_yellow = np.array([20, 100, 100])
-upper_yellow = np.array([35, 255, 255])
+    for bbox, text, confidence in results:
+        if confidence < 0.3:
+            continue
 
-mask = cv2.inRange(hsv, lower_yellow, upper_yellow)
+        # Bounding box points
+        (tl, tr, br, bl) = bbox
+        x = int(tl[0])
+        y = int(tl[1])
+        h = int(bl[1] - tl[1])
 
-# ----------------------------
-# 3. Clean the mask
-# ----------------------------
-kernel = np.ones((3, 3), np.uint8)
-mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-mask = cv2.dilate(mask, kernel, iterations=2)
+        # Scale font based on drawing size
+        font_scale = max(1, h / 25)
 
-# ----------------------------
-# 4. OCR on extracted drawing
-# ----------------------------
-reader = easyocr.Reader(['en'])
-results = reader.readtext(mask, detail=1)
+        cv2.putText(
+            clean_img,
+            text,
+            (x, y + h),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            font_scale,
+            (0, 0, 0),
+            3,
+            cv2.LINE_AA
+        )
+
+    return clean_img
 
-print("OCR Results:", results)
 
 # ----------------------------
-# 5. Remove handwritten text
+# Single image (original behaviour)
 # ----------------------------
-clean_img = original.copy()
+def process_file(reader, masker, input_path, output_path):
+    img = cv2.imread(input_path)
+    if img is None:
+        raise Exception("Image not found. Check filename/path.")
 
-# Paint over detected drawing (wall-like gray)
-clean_img[mask > 0] = (200, 200, 200)
+    # Extract drawing (HSV colour ranges) & clean the mask - see ink_mask.py
+    mask = masker.mask(img)
+    results = reader.readtext(mask, detail=1)
+    print("OCR Results:", results)
+
+    cv2.imwrite(output_path, render_output(masker, img, mask, results))
+    print(f"✅ Done! Saved as {output_path}")
 
-# ----------------------------
-# 6. Overlay digital text
-# ----------------------------
-for bbox, text, confidence in results:
-    if confidence < 0.3:
-        continue
-
-    # Bounding box points
-    (tl, tr, br, bl) = bbox
-    x = int(tl[0])
-    y = int(tl[1])
-    h = int(bl[1] - tl[1])
-
-    # Scale font based on drawing size
-    font_scale = max(1, h / 25)
-
-    cv2.putText(
-        clean_img,
-        text,
-        (x, y + h),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        font_scale,
-        (0, 0, 0),
-        3,
-        cv2.LINE_AA
-    )
 
 # ----------------------------
-# 7. Save final output
+# Batch mode
 # ----------------------------
-cv2.imwrite("output_digital_overlay.png", clean_img)
-
-print("✅ Done! Saved as output_digital_overlay.png")
+def find_images(pattern):
+    """Image files in a directory, or matching a glob pattern"""
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    else:
+        paths = glob.glob(pattern)
+    return sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def prefetch_images(paths, depth):
+    """Yield (path, image) while a background thread reads ahead up to depth images"""
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+
+    def load():
+        for path in paths:
+            buffer.put((path, cv2.imread(path)))
+        buffer.put(done)
+
+    threading.Thread(target=load, daemon=True).start()
+    while True:
+        item = buffer.get()
+        if item is done:
+            return
+        yield item
+
+
+def run_batch(reader, masker, paths, output_dir, manifest_path, workers, prefetch):
+    """
+    OCR every image: reading is prefetched, masking and rendering run in a
+    thread pool (OpenCV releases the GIL), OCR runs in the main thread with
+    the one shared reader
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    def mask_job(path, img):
+        return path, img, (masker.mask(img) if img is not None else None)
+
+    def render_job(path, img, mask, results):
+        name = os.path.splitext(os.path.basename(path))[0] + "_overlay.png"
+        output_path = os.path.join(output_dir, name)
+        cv2.imwrite(output_path, render_output(masker, img, mask, results))
+        return output_path
+
+    start = time.perf_counter()
+    processed = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(manifest_path, 'w') as manifest:
+        pending_masks = deque()  # Masks being computed ahead of OCR
+        pending_renders = deque()  # (manifest record, render future)
+
+        def ocr_next():
+            path, img, mask = pending_masks.popleft().result()
+            if img is None:
+                print(f"⚠️ Could not read {path}")
+                manifest.write(json.dumps({'input': path, 'error': 'unreadable image'}) + "\n")
+                return
+
+            results = reader.readtext(mask, detail=1)
+            record = {
+                'input': path,
+                'results': [
+                    {'text': text, 'confidence': float(confidence),
+                     'bbox': [[int(x), int(y)] for x, y in bbox]}
+                    for bbox, text, confidence in results
+                ]
+            }
+            pending_renders.append((record, pool.submit(render_job, path, img, mask, results)))
+
+        def write_finished(wait):
+            nonlocal processed
+            while pending_renders and (wait or pending_renders[0][1].done()):
+                record, future = pending_renders.popleft()
+                record['output'] = future.result()
+                manifest.write(json.dumps(record) + "\n")
+                processed += 1
+
+        for path, img in prefetch_images(paths, prefetch):
+            pending_masks.append(pool.submit(mask_job, path, img))
+            if len(pending_masks) >= prefetch:
+                ocr_next()
+                write_finished(wait=False)
+
+        while pending_masks:
+            ocr_next()
+        write_finished(wait=True)
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0
+    print(f"✅ Processed {processed}/{len(paths)} images in {elapsed:.1f}s ({rate:.2f} images/sec)")
+    print(f"📄 Results manifest: {manifest_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replace air-drawn text with digital text")
+    parser.add_argument("--input", default="input.png",
+                        help="Image file, directory or glob pattern (e.g. 'frames/*.png')")
+    parser.add_argument("--output", default="output_digital_overlay.png",
+                        help="Output image (single image mode)")
+    parser.add_argument("--output-dir", default="ocr_output", help="Output directory (batch mode)")
+    parser.add_argument("--manifest", default=None,
+                        help="JSONL results manifest (batch mode, default <output-dir>/results.jsonl)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Threads for masking and rendering")
+    parser.add_argument("--prefetch", type=int, default=8, help="Images read ahead of OCR")
+    parser.add_argument("--colors", nargs="+", default=["yellow"], choices=sorted(INK_COLORS),
+                        help="Ink colours to extract")
+    parser.add_argument("--inpaint", action="store_true",
+                        help="Fill removed ink from the surrounding background instead of gray")
+    args = parser.parse_args()
+
+    masker = InkMasker(colors=args.colors, fill='inpaint' if args.inpaint else 'solid')
+
+    if os.path.isfile(args.input):
+        process_file(load_reader(), masker, args.input, args.output)
+        return
+
+    paths = find_images(args.input)
+    if not paths:
+        raise Exception(f"No images found for: {args.input}")
+
+    reader = load_reader()
+    manifest = args.manifest or os.path.join(args.output_dir, "results.jsonl")
+    run_batch(reader, masker, paths, args.output_dir, manifest, args.workers, max(1, args.prefetch))
+
+
+if __name__ == "__main__":
+    main()
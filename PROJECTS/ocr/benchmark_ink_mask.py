@@ -0,0 +1,81 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from ink_mask import INK_COLORS, InkMasker
+
+
+# ----------------------------
+# Synthetic 4K frame: textured wall + air-drawn strokes in several colours
+# ----------------------------
+def make_frame(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = cv2.GaussianBlur(rng.integers(90, 170, (height, width, 3), dtype=np.uint8), (0, 0), 5)
+
+    bgr = {'yellow': (0, 230, 255), 'green': (60, 200, 40), 'blue': (230, 80, 30), 'red': (30, 30, 230)}
+    for name, color in bgr.items():
+        for _ in range(6):
+            points = rng.integers([width // 8, height // 8], [width * 7 // 8, height * 7 // 8], (8, 2))
+            cv2.polylines(frame, [points.astype(np.int32)], False, color, 12, cv2.LINE_AA)
+    return frame
+
+
+# ----------------------------
+# Original approach: one inRange per range, full-image morphology, boolean fill
+# ----------------------------
+def baseline(img, colors):
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    mask = np.zeros(img.shape[:2], np.uint8)
+    for name in colors:
+        for lower, upper in INK_COLORS[name]:
+            mask |= cv2.inRange(hsv, np.array(lower), np.array(upper))
+
+    kernel = np.ones((3, 3), np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    mask = cv2.dilate(mask, kernel, iterations=2)
+
+    clean = img.copy()
+    clean[mask > 0] = (200, 200, 200)
+    return mask, clean
+
+
+def time_ms(func, repeats):
+    func()  # Warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ink masking on large frames")
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    frame = make_frame(args.width, args.height)
+    print(f"Frame: {args.width}x{args.height}")
+
+    for colors in (('yellow',), tuple(INK_COLORS)):
+        solid = InkMasker(colors=colors)
+        inpaint = InkMasker(colors=colors, fill='inpaint')
+
+        base_mask, _ = baseline(frame, colors)
+        mask = solid.mask(frame)
+        same = np.array_equal(base_mask, mask)
+
+        print(f"\nColours: {', '.join(colors)}  (mask identical to baseline: {same})")
+        print(f"  baseline mask + fill : {time_ms(lambda: baseline(frame, colors), args.repeats):8.2f} ms")
+        print(f"  fused mask           : {time_ms(lambda: solid.mask(frame), args.repeats):8.2f} ms")
+        print(f"  fused mask + solid   : {time_ms(lambda: solid.fill(frame, solid.mask(frame)), args.repeats):8.2f} ms")
+        print(f"  fused mask + inpaint : {time_ms(lambda: inpaint.fill(frame, inpaint.mask(frame)), 1):8.2f} ms")
+
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import threading
+
+import cv2
+import numpy as np
+
+# HSV ranges (OpenCV 8-bit: H 0-179) per ink colour - red wraps around hue 0
+INK_COLORS = {
+    'yellow': [((20, 100, 100), (35, 255, 255))],
+    'green': [((40, 80, 80), (85, 255, 255))],
+    'blue': [((95, 100, 80), (130, 255, 255))],
+    'red': [((0, 120, 100), (10, 255, 255)), ((170, 120, 100), (179, 255, 255))],
+}
+
+
+class InkMasker:
+    """
+    Finds air-drawn ink of one or more colours and paints it out
+
+    All colours are found in ONE pass over the image, whatever their number:
+    each HSV channel goes through a 256-entry lookup table whose bits say
+    which ranges allow that value, the three results are ANDed, and a final
+    table maps range bits to colour bits. Morphology and filling only touch
+    the bounding box of the ink.
+    """
+
+    def __init__(self, colors=('yellow',), ranges=None, kernel_size=3, dilate_iterations=2,
+                 fill='solid', fill_color=(200, 200, 200), inpaint_radius=3):
+        """
+        Args:
+            colors: Names from INK_COLORS (or from ranges)
+            ranges: Extra/overriding {name: [(lower_hsv, upper_hsv), ...]}
+            kernel_size: Morphology kernel size used to clean the mask
+            dilate_iterations: Dilations after closing (covers anti-aliased edges)
+            fill: 'solid' (paint fill_color) or 'inpaint' (cv2.inpaint background)
+            fill_color: BGR colour for solid fill (wall-like gray)
+            inpaint_radius: Neighbourhood radius for cv2.inpaint
+        """
+        table = dict(INK_COLORS)
+        table.update(ranges or {})
+        if fill not in ('solid', 'inpaint'):
+            raise ValueError(f"Unknown fill method: {fill}")
+
+        self.colors = list(colors)
+        self.kernel = np.ones((kernel_size, kernel_size), np.uint8)
+        self.dilate_iterations = dilate_iterations
+        self.fill_method = fill
+        self.fill_color = fill_color
+        self.inpaint_radius = inpaint_radius
+
+        # One bit per HSV range in the channel tables, one bit per colour in the output
+        ranges = [(bit, lower, upper) for bit, name in enumerate(self.colors) for lower, upper in table[name]]
+        if len(ranges) > 8 or len(self.colors) > 8:
+            raise ValueError("At most 8 HSV ranges (and 8 ink colours) are supported")
+
+        self._channel_luts = np.zeros((3, 256), np.uint8)
+        self._color_lut = np.zeros(256, np.uint8)
+        range_bits = np.arange(256)
+        for index, (color_bit, lower, upper) in enumerate(ranges):
+            for channel in range(3):
+                self._channel_luts[channel, lower[channel]:upper[channel] + 1] |= 1 << index
+            self._color_lut[(range_bits >> index) & 1 == 1] |= 1 << color_bit
+
+        # Reused solid-colour buffer for filling, one per thread (batch mode shares a masker)
+        self._local = threading.local()
+
+        # Margin so morphology on the ink crop matches morphology on the full image
+        self._margin = kernel_size * (2 + dilate_iterations)
+
+    def labels(self, img):
+        """
+        Per-pixel colour bits (bit i set = pixel matches self.colors[i])
+
+        Returns:
+            (H, W) uint8 image, 0 = no ink
+        """
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+
+        bits = cv2.LUT(cv2.extractChannel(hsv, 0), self._channel_luts[0])
+        for channel in (1, 2):
+            cv2.bitwise_and(bits, cv2.LUT(cv2.extractChannel(hsv, channel), self._channel_luts[channel]), dst=bits)
+        return cv2.LUT(bits, self._color_lut, dst=bits)
+
+    def ink_box(self, mask):
+        """Bounding box (x0, y0, x1, y1) of the ink plus the morphology margin, or None"""
+        x, y, w, h = cv2.boundingRect(mask)
+        if w == 0 or h == 0:
+            return None
+        height, width = mask.shape
+        m = self._margin
+        return max(x - m, 0), max(y - m, 0), min(x + w + m, width), min(y + h + m, height)
+
+    def mask(self, img):
+        """
+        Cleaned binary mask (255 = ink) of all configured colours
+
+        Returns:
+            (H, W) uint8 mask
+        """
+        mask = cv2.threshold(self.labels(img), 0, 255, cv2.THRESH_BINARY)[1]
+
+        box = self.ink_box(mask)
+        if box is None:
+            return mask
+
+        # Close gaps and thicken, only around the ink
+        x0, y0, x1, y1 = box
+        roi = mask[y0:y1, x0:x1]
+        roi = cv2.morphologyEx(roi, cv2.MORPH_CLOSE, self.kernel)
+        mask[y0:y1, x0:x1] = cv2.dilate(roi, self.kernel, iterations=self.dilate_iterations)
+        return mask
+
+    def fill(self, img, mask):
+        """
+        Copy of img with the masked ink removed
+
+        Args:
+            img: BGR image
+            mask: Mask from self.mask()
+        """
+        clean = img.copy()
+        box = self.ink_box(mask)
+        if box is None:
+            return clean
+
+        x0, y0, x1, y1 = box
+        roi_mask = mask[y0:y1, x0:x1]
+        if self.fill_method == 'inpaint':
+            # Reconstruct the background from surrounding pixels (slower, no gray blobs)
+            clean[y0:y1, x0:x1] = cv2.inpaint(clean[y0:y1, x0:x1], roi_mask,
+                                              self.inpaint_radius, cv2.INPAINT_TELEA)
+        else:
+            h, w = roi_mask.shape
+            solid = getattr(self._local, 'solid', None)
+            if solid is None or solid.shape[0] < h or solid.shape[1] < w:
+                # Grow to cover this and every earlier box
+                if solid is not None:
+                    h, w = max(h, solid.shape[0]), max(w, solid.shape[1])
+                solid = self._local.solid = np.empty((h, w, 3), np.uint8)
+                solid[:] = self.fill_color
+            cv2.copyTo(solid[:roi_mask.shape[0], :roi_mask.shape[1]], roi_mask, clean[y0:y1, x0:x1])
+        return clean